@@ -0,0 +1,291 @@
+import os
+import re
+import csv
+import mmap
+import math
+import struct
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+ZIP_SEED_CSV = os.path.join(DATA_DIR, 'zip_seed.csv')
+ZIP_LEARNED_CSV = os.path.join(DATA_DIR, 'zip_learned.csv')
+ZIP_TABLE_BIN = os.path.join(DATA_DIR, 'zipcodes.bin')
+
+# Fixed-width records sorted by ZIP: zip, latitude, longitude, state, city
+ZIP_RECORD = struct.Struct('<Iff2s30s')
+ZIP_HEADER = struct.Struct('<4sII')
+ZIP_MAGIC = b'ZIPT'
+ZIP_VERSION = 1
+
+# USPS ZIP3 prefix ranges; used to validate state and fill it when the ZIP is not in the table
+ZIP3_STATE_RANGES = [
+    (5, 5, 'NY'), (6, 7, 'PR'), (8, 8, 'VI'), (9, 9, 'PR'), (10, 27, 'MA'), (28, 29, 'RI'),
+    (30, 38, 'NH'), (39, 49, 'ME'), (50, 59, 'VT'), (60, 69, 'CT'), (70, 89, 'NJ'), (90, 99, 'AE'),
+    (100, 149, 'NY'), (150, 196, 'PA'), (197, 199, 'DE'), (200, 200, 'DC'), (201, 201, 'VA'),
+    (202, 205, 'DC'), (206, 219, 'MD'), (220, 246, 'VA'), (247, 268, 'WV'), (270, 289, 'NC'),
+    (290, 299, 'SC'), (300, 319, 'GA'), (320, 339, 'FL'), (340, 340, 'AA'), (341, 349, 'FL'),
+    (350, 369, 'AL'), (370, 385, 'TN'), (386, 397, 'MS'), (398, 399, 'GA'), (400, 427, 'KY'),
+    (430, 459, 'OH'), (460, 479, 'IN'), (480, 499, 'MI'), (500, 528, 'IA'), (530, 549, 'WI'),
+    (550, 567, 'MN'), (569, 569, 'DC'), (570, 577, 'SD'), (580, 588, 'ND'), (590, 599, 'MT'),
+    (600, 629, 'IL'), (630, 658, 'MO'), (660, 679, 'KS'), (680, 693, 'NE'), (700, 714, 'LA'),
+    (716, 729, 'AR'), (730, 732, 'OK'), (733, 733, 'TX'), (734, 749, 'OK'), (750, 799, 'TX'),
+    (800, 816, 'CO'), (820, 831, 'WY'), (832, 838, 'ID'), (840, 847, 'UT'), (850, 865, 'AZ'),
+    (870, 884, 'NM'), (885, 885, 'TX'), (889, 898, 'NV'), (900, 961, 'CA'), (962, 966, 'AP'),
+    (967, 968, 'HI'), (969, 969, 'GU'), (970, 979, 'OR'), (980, 994, 'WA'), (995, 999, 'AK')
+]
+
+ZIP3_STATES = {}
+for _start, _end, _state in ZIP3_STATE_RANGES:
+    for _prefix in range(_start, _end + 1):
+        ZIP3_STATES[_prefix] = _state
+
+# USPS Publication 28 standard suffix abbreviations
+STREET_SUFFIXES = {
+    'alley': 'ALY', 'avenue': 'AVE', 'av': 'AVE', 'ave': 'AVE', 'boulevard': 'BLVD', 'blvd': 'BLVD',
+    'circle': 'CIR', 'cir': 'CIR', 'court': 'CT', 'ct': 'CT', 'cove': 'CV', 'creek': 'CRK',
+    'crossing': 'XING', 'drive': 'DR', 'dr': 'DR', 'expressway': 'EXPY', 'freeway': 'FWY',
+    'heights': 'HTS', 'highway': 'HWY', 'hwy': 'HWY', 'hill': 'HL', 'hollow': 'HOLW',
+    'lane': 'LN', 'ln': 'LN', 'loop': 'LOOP', 'parkway': 'PKWY', 'pkwy': 'PKWY', 'pike': 'PIKE',
+    'place': 'PL', 'pl': 'PL', 'point': 'PT', 'ridge': 'RDG', 'road': 'RD', 'rd': 'RD',
+    'route': 'RTE', 'run': 'RUN', 'square': 'SQ', 'street': 'ST', 'st': 'ST', 'str': 'ST',
+    'terrace': 'TER', 'trail': 'TRL', 'trl': 'TRL', 'way': 'WAY'
+}
+
+DIRECTIONALS = {'n', 's', 'e', 'w', 'ne', 'nw', 'se', 'sw', 'north', 'south', 'east', 'west'}
+
+US_STATES = {state for _, _, state in ZIP3_STATE_RANGES} | {
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS',
+    'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY',
+    'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV',
+    'WI', 'WY', 'DC'
+}
+
+# "CITY, ST 12345-6789" in any case
+CITY_STATE_ZIP_LINE = re.compile(r"^\s*([A-Za-z][A-Za-z .'-]*?),?\s+([A-Za-z]{2})\s+(\d{5})(?:-(\d{4}))?\s*$")
+
+def build_zip_table(csv_paths, out_path=ZIP_TABLE_BIN):
+    """Compile zip,city,state,latitude,longitude CSVs into the memory-mapped lookup table
+
+    Later files win for ZIPs that appear more than once.
+    """
+    entries = {}
+    for path in csv_paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                zip_code = (row.get('zip') or '').strip()[:5]
+                if len(zip_code) != 5 or not zip_code.isdigit():
+                    continue
+                try:
+                    lat = float(row['latitude']) if row.get('latitude') else math.nan
+                    lng = float(row['longitude']) if row.get('longitude') else math.nan
+                except ValueError:
+                    lat = lng = math.nan
+                entries[int(zip_code)] = (lat, lng, (row.get('state') or '').strip().upper(),
+                                          (row.get('city') or '').strip())
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as out:
+        out.write(ZIP_HEADER.pack(ZIP_MAGIC, ZIP_VERSION, len(entries)))
+        for zip_code in sorted(entries):
+            lat, lng, state, city = entries[zip_code]
+            out.write(ZIP_RECORD.pack(zip_code, lat, lng, state.encode('ascii', 'ignore')[:2],
+                                      city.encode('utf-8')[:30]))
+    os.replace(tmp_path, out_path)
+    logger.info('Built ZIP table with %s entries at %s', len(entries), out_path)
+    return len(entries)
+
+class ZipTable:
+    """Read-only ZIP lookup over a memory-mapped, sorted fixed-width file"""
+
+    def __init__(self, path=ZIP_TABLE_BIN):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._mmap = None
+        if os.path.exists(path) and os.path.getsize(path) >= ZIP_HEADER.size:
+            self._file = open(path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, count = ZIP_HEADER.unpack_from(self._mmap, 0)
+            if magic == ZIP_MAGIC and version == ZIP_VERSION:
+                self.count = count
+
+    def lookup(self, zip_code):
+        """Return {'city', 'state', 'latitude', 'longitude'} for a 5-digit ZIP, or None"""
+        if not self.count:
+            return None
+        try:
+            key = int(zip_code[:5])
+        except (TypeError, ValueError):
+            return None
+
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            offset = ZIP_HEADER.size + middle * ZIP_RECORD.size
+            found = struct.unpack_from('<I', self._mmap, offset)[0]
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle - 1
+            else:
+                _, lat, lng, state, city = ZIP_RECORD.unpack_from(self._mmap, offset)
+                return {
+                    'city': city.rstrip(b'\0').decode('utf-8', 'ignore'),
+                    'state': state.rstrip(b'\0').decode('ascii', 'ignore'),
+                    'latitude': None if math.isnan(lat) else round(lat, 6),
+                    'longitude': None if math.isnan(lng) else round(lng, 6)
+                }
+        return None
+
+    def close(self):
+        if self._mmap:
+            self._mmap.close()
+        if self._file:
+            self._file.close()
+
+class AddressNormalizer:
+    """Fill and validate city/state/ZIP and standardize street suffixes on cleaned records
+
+    Lookups go to the bundled ZIP table; ZIPs learned from complete records are
+    appended to data/zip_learned.csv and compiled into the table for later runs.
+    """
+
+    def __init__(self, table_path=ZIP_TABLE_BIN, seed_paths=None):
+        self.table_path = table_path
+        self.seed_paths = seed_paths or [ZIP_SEED_CSV, os.environ.get('ZIP_TABLE_CSV', ''), ZIP_LEARNED_CSV]
+        self.ensure_table()
+        self.table = ZipTable(table_path)
+        self.learned = {}
+        self.stats = Counter()
+
+    def ensure_table(self):
+        """Rebuild the binary table when any source CSV is newer than it"""
+        sources = [path for path in self.seed_paths if path and os.path.exists(path)]
+        if not sources:
+            return
+        built = os.path.getmtime(self.table_path) if os.path.exists(self.table_path) else 0
+        if any(os.path.getmtime(path) > built for path in sources):
+            build_zip_table(sources, self.table_path)
+
+    def normalize(self, record):
+        """Normalize the address fields of a cleaned record in place and return it"""
+        self.stats['records'] += 1
+
+        # A "CITY, ST 12345" line is the most reliable source for all three fields
+        for field in ('address_line2', 'address_line1'):
+            match = CITY_STATE_ZIP_LINE.match(getattr(record, field) or '')
+            if not match:
+                continue
+            city, state, zip5, zip4 = match.groups()
+            if state.upper() not in US_STATES:
+                continue
+            zip_code = f'{zip5}-{zip4}' if zip4 else zip5
+            if record.zip_postal_code[:5] != zip5:
+                self.stats['zip_corrected'] += 1
+                record.zip_postal_code = zip_code
+            if not record.city:
+                record.city = city.strip().title()
+                self.stats['city_from_address'] += 1
+            if not record.state_province_region:
+                record.state_province_region = state.upper()
+                self.stats['state_from_address'] += 1
+            break
+
+        zip5 = (record.zip_postal_code or '')[:5]
+        if len(zip5) == 5 and zip5.isdigit():
+            self.fill_from_zip(record, zip5)
+
+        for field in ('address_line1', 'address_line2'):
+            value = getattr(record, field)
+            if value:
+                setattr(record, field, self.normalize_street(value))
+
+        return record
+
+    def fill_from_zip(self, record, zip5):
+        entry = self.table.lookup(zip5) or self.learned.get(zip5)
+        zip3_state = ZIP3_STATES.get(int(zip5[:3]))
+        state = (record.state_province_region or '').upper()
+
+        if entry:
+            self.stats['zip_hits'] += 1
+            if not record.city and entry['city']:
+                record.city = entry['city']
+                self.stats['city_from_zip'] += 1
+            if not state and entry['state']:
+                record.state_province_region = entry['state']
+                self.stats['state_from_zip'] += 1
+            if record.latitude is None and entry['latitude'] is not None:
+                record.latitude = entry['latitude']
+                record.longitude = entry['longitude']
+                self.stats['geocoded_from_zip'] += 1
+        elif not state and zip3_state:
+            record.state_province_region = zip3_state
+            self.stats['state_from_zip3'] += 1
+
+        state = (record.state_province_region or '').upper()
+        if state and zip3_state and state in US_STATES and state != zip3_state:
+            self.stats['zip_state_mismatch'] += 1
+            logger.debug('ZIP %s belongs to %s, record says %s', zip5, zip3_state, state)
+
+    def normalize_street(self, line):
+        """Abbreviate a trailing street suffix, keeping the line's case style"""
+        words = line.split()
+        if len(words) < 2:
+            return line
+
+        # The suffix is the last word, or the word before a trailing directional ("MAIN ST N")
+        position = len(words) - 1
+        if words[position].lower().strip('.') in DIRECTIONALS and len(words) > 2:
+            position -= 1
+
+        # The first word is the house number; never treat it as a suffix
+        if position < 1:
+            return line
+
+        word = words[position].strip('.,').lower()
+        suffix = STREET_SUFFIXES.get(word)
+        if not suffix or words[position].strip('.,') == suffix:
+            return line
+
+        words[position] = suffix if line.isupper() else suffix.capitalize()
+        self.stats['suffixes_normalized'] += 1
+        return ' '.join(words)
+
+    def learn(self, record):
+        """Remember ZIP -> city/state (and coordinates) from a complete, consistent record"""
+        zip5 = (record.zip_postal_code or '')[:5]
+        city = record.city
+        state = (record.state_province_region or '').upper()
+        if len(zip5) != 5 or not zip5.isdigit() or not city or not state:
+            return
+        if ZIP3_STATES.get(int(zip5[:3])) != state or zip5 in self.learned:
+            return
+        existing = self.table.lookup(zip5)
+        if existing and (existing['latitude'] is not None or record.latitude is None):
+            return
+        self.learned[zip5] = {'city': city, 'state': state,
+                              'latitude': record.latitude, 'longitude': record.longitude}
+
+    def save(self):
+        """Persist learned ZIPs so later runs can fill them from the table"""
+        if not self.learned:
+            return
+        os.makedirs(os.path.dirname(ZIP_LEARNED_CSV), exist_ok=True)
+        new_file = not os.path.exists(ZIP_LEARNED_CSV)
+        with open(ZIP_LEARNED_CSV, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            if new_file:
+                writer.writerow(['zip', 'city', 'state', 'latitude', 'longitude'])
+            for zip5, entry in sorted(self.learned.items()):
+                writer.writerow([zip5, entry['city'], entry['state'],
+                                 '' if entry['latitude'] is None else entry['latitude'],
+                                 '' if entry['longitude'] is None else entry['longitude']])
+        logger.info('Learned %s ZIP codes for the address table', len(self.learned))
+        self.learned = {}
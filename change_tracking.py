@@ -0,0 +1,314 @@
+import copy
+import json
+import logging
+from sqlalchemy import update, or_
+from models import db, ScrapedMember, MemberVersion
+
+logger = logging.getLogger(__name__)
+
+# Fields that differ on every crawl and say nothing about the member
+UNTRACKED_FIELDS = {'date_scraped'}
+
+class MemberChangeTracker:
+    """Upsert members by stable key and record only the fields each crawl changed"""
+
+    def __init__(self, session_ref, key_function, batch_size=500, removal_floor=0.5):
+        # scrape_sessions.id of the crawl being saved
+        self.session_ref = session_ref
+        # Callable(cleaned_record) -> member key or None
+        self.key_function = key_function
+        self.batch_size = batch_size
+        # Skip the removal sweep when a crawl saw fewer than this share of the
+        # active members; a partial crawl would otherwise "remove" the rest
+        self.removal_floor = removal_floor
+        self.stats = {'added': 0, 'changed': 0, 'unchanged': 0, 'restored': 0, 'removed': 0, 'unkeyed': 0,
+                      'failed': 0, 'backfilled': 0, 'superseded': 0}
+        # Keys of members this crawl added, changed or restored
+        self.touched_keys = set()
+
+    def save(self, records, on_progress=None):
+        """Insert new members, update changed ones and write their versions; returns rows saved"""
+        self.backfill_keys()
+        keyed = {}
+        unkeyed = []
+        for record in records:
+            key = self.key_function(record)
+            if key is None:
+                unkeyed.append(record)
+            elif key in keyed:
+                # Two records of one member in a single crawl: keep the fuller values
+                keyed[key].fill_missing(record)
+            else:
+                keyed[key] = copy.copy(record)
+
+        items = list(keyed.items())
+        saved = 0
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            saved += self.save_isolated(batch, self.save_batch)
+            if on_progress:
+                on_progress(min(start + self.batch_size, len(items)), len(items) + len(unkeyed))
+
+        # Records without any identity cannot be tracked and are stored as-is
+        saved += self.save_isolated(unkeyed, self.save_unkeyed)
+        self.stats['unkeyed'] = len(unkeyed)
+
+        logger.info('Saved %s members for session %s: %s', saved, self.session_ref, self.stats)
+        return saved
+
+    def save_isolated(self, items, write):
+        """write(items) in one transaction; when that fails, retry one item at a time and skip the bad ones"""
+        if not items:
+            return 0
+        stats = dict(self.stats)
+        try:
+            return write(items)
+        except Exception as e:
+            db.session.rollback()
+            self.stats.update(stats)
+            logger.warning('Saving %s members failed, retrying one at a time: %s', len(items), e)
+
+        saved = 0
+        for item in items:
+            stats = dict(self.stats)
+            try:
+                saved += write([item])
+            except Exception as e:
+                db.session.rollback()
+                self.stats.update(stats)
+                self.stats['failed'] += 1
+                record = item[1] if isinstance(item, tuple) else item
+                logger.error('Could not save member %r: %s', record.business_name or record.owner1, e)
+        return saved
+
+    def save_unkeyed(self, records):
+        for record in records:
+            db.session.add(ScrapedMember(last_session_ref=self.session_ref, **self.member_values(record)))
+        db.session.commit()
+        return len(records)
+
+    def save_batch(self, batch):
+        keys = [key for key, _ in batch]
+        existing = {member.member_key: member for member in
+                    ScrapedMember.query.filter(ScrapedMember.member_key.in_(keys)).all()}
+
+        versions = []
+        for key, record in batch:
+            values = self.member_values(record)
+            member = existing.get(key)
+
+            if member is None:
+                member = ScrapedMember(member_key=key, last_session_ref=self.session_ref, **values)
+                db.session.add(member)
+                changes = {field: [None, value] for field, value in values.items()
+                           if field not in UNTRACKED_FIELDS and not self.is_empty(value)}
+                versions.append((member, 'added', changes))
+                self.stats['added'] += 1
+                continue
+
+            changes = {}
+            for field, value in values.items():
+                old = getattr(member, field)
+                if self.same_value(old, value):
+                    continue
+                if field not in UNTRACKED_FIELDS:
+                    changes[field] = [old, value]
+                setattr(member, field, value)
+
+            restored = member.removed_session_ref is not None
+            member.last_session_ref = self.session_ref
+            member.removed_session_ref = None
+
+            if restored:
+                versions.append((member, 'restored', changes))
+                self.stats['restored'] += 1
+            elif changes:
+                versions.append((member, 'changed', changes))
+                self.stats['changed'] += 1
+            else:
+                self.stats['unchanged'] += 1
+
+        # New members need their ids before versions can point at them
+        db.session.flush()
+        db.session.add_all([
+            MemberVersion(member_key=member.member_key, member_id=member.id, session_ref=self.session_ref,
+                          change_type=change_type, changes=json.dumps(changes))
+            for member, change_type, changes in versions
+        ])
+        db.session.commit()
+        self.touched_keys.update(member.member_key for member, _, _ in versions)
+        return len(batch)
+
+    def backfill_keys(self, batch_size=500):
+        """Key the rows stored before member keys existed; returns how many were keyed
+
+        Rows from older releases have neither a key nor a last session. The
+        newest row of each key takes the key, so the crawl updates it instead
+        of inserting the member again. Older copies of the same member (the
+        old save inserted every member on every crawl), and rows whose key
+        already belongs to a tracked member, are marked removed by this
+        session without a version, so they stay readable but are not counted
+        as members the crawl removed.
+        """
+        legacy = (ScrapedMember.query
+                  .filter(ScrapedMember.member_key.is_(None),
+                          ScrapedMember.last_session_ref.is_(None),
+                          ScrapedMember.removed_session_ref.is_(None))
+                  .order_by(ScrapedMember.id.desc()))
+        claimed = {}
+        superseded = []
+        for row in legacy.yield_per(1000):
+            key = self.key_function(row)
+            if key is None:
+                continue
+            if key in claimed:
+                superseded.append(row.id)
+            else:
+                claimed[key] = row.id
+        if not claimed:
+            return 0
+
+        keys = list(claimed)
+        for start in range(0, len(keys), batch_size):
+            taken = ScrapedMember.query.with_entities(ScrapedMember.member_key).filter(
+                ScrapedMember.member_key.in_(keys[start:start + batch_size])).all()
+            for (key,) in taken:
+                superseded.append(claimed.pop(key))
+
+        if claimed:
+            db.session.execute(update(ScrapedMember), [
+                {'id': member_id, 'member_key': key} for key, member_id in claimed.items()
+            ])
+        for start in range(0, len(superseded), batch_size):
+            db.session.execute(
+                update(ScrapedMember).where(ScrapedMember.id.in_(superseded[start:start + batch_size]))
+                .values(removed_session_ref=self.session_ref)
+            )
+        db.session.commit()
+
+        self.stats['backfilled'] = len(claimed)
+        self.stats['superseded'] = len(superseded)
+        logger.info('Keyed %s members stored before member keys; %s older copies marked removed',
+                    len(claimed), len(superseded))
+        return len(claimed)
+
+    def sweep_removed(self):
+        """Record members the previous crawls saw but this one did not; returns how many"""
+        conditions = (
+            ScrapedMember.member_key.isnot(None),
+            ScrapedMember.removed_session_ref.is_(None),
+            # Backfilled members no crawl has seen yet have no last session
+            or_(ScrapedMember.last_session_ref.is_(None), ScrapedMember.last_session_ref != self.session_ref)
+        )
+        missing = ScrapedMember.query.filter(*conditions)
+        missing_count = missing.count()
+        seen_count = ScrapedMember.query.filter(ScrapedMember.last_session_ref == self.session_ref).count()
+        active_count = missing_count + seen_count
+
+        if not missing_count:
+            return 0
+        if seen_count < active_count * self.removal_floor:
+            logger.warning('Crawl saw %s of %s active members; not marking %s as removed',
+                           seen_count, active_count, missing_count)
+            return 0
+
+        rows = missing.with_entities(ScrapedMember.id, ScrapedMember.member_key).all()
+        db.session.bulk_insert_mappings(MemberVersion, [
+            {'member_key': member_key, 'member_id': member_id, 'session_ref': self.session_ref,
+             'change_type': 'removed', 'changes': '{}'}
+            for member_id, member_key in rows
+        ])
+        db.session.execute(
+            update(ScrapedMember).where(*conditions).values(removed_session_ref=self.session_ref)
+        )
+        db.session.commit()
+
+        self.stats['removed'] = len(rows)
+        logger.info('Marked %s members as removed in session %s', len(rows), self.session_ref)
+        return len(rows)
+
+    def member_values(self, record):
+        """Model attributes of a cleaned MemberRecord"""
+        return record.to_dict()
+
+    def is_empty(self, value):
+        return value is None or value == ''
+
+    def same_value(self, old, new):
+        if self.is_empty(old) and self.is_empty(new):
+            return True
+        if isinstance(old, float) and isinstance(new, float):
+            return abs(old - new) < 1e-7
+        return old == new
+
+class MemberHistory:
+    """Read member versions back as per-member histories and session-to-session diffs"""
+
+    # How change types combine when one member changes in several sessions of a range
+    combined_types = {
+        ('added', 'changed'): 'added',
+        ('added', 'removed'): None,
+        ('added', 'restored'): 'added',
+        ('changed', 'changed'): 'changed',
+        ('changed', 'removed'): 'removed',
+        ('changed', 'restored'): 'changed',
+        ('removed', 'restored'): 'changed',
+        ('removed', 'changed'): 'changed',
+        ('removed', 'added'): 'changed',
+        (None, 'added'): 'added',
+        (None, 'restored'): 'added',
+        (None, 'changed'): 'changed',
+        (None, 'removed'): 'removed',
+    }
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+
+    def versions(self, member_key):
+        """Every version of one member, oldest first"""
+        if not member_key:
+            return []
+        return (self.session.query(MemberVersion)
+                .filter(MemberVersion.member_key == member_key)
+                .order_by(MemberVersion.session_ref, MemberVersion.id)
+                .all())
+
+    def diff(self, from_ref, to_ref):
+        """Net changes per member between two sessions
+
+        Only versions written by sessions after from_ref up to and including
+        to_ref are read, through the (session_ref, member_key) index.
+        """
+        rows = (self.session.query(MemberVersion.member_key, MemberVersion.member_id,
+                                 MemberVersion.change_type, MemberVersion.changes)
+                .filter(MemberVersion.session_ref > from_ref, MemberVersion.session_ref <= to_ref)
+                .order_by(MemberVersion.session_ref, MemberVersion.id)
+                .all())
+
+        folded = {}
+        for member_key, member_id, change_type, changes in rows:
+            changes = json.loads(changes) if changes else {}
+            entry = folded.get(member_key)
+            if entry is None:
+                # A member restored inside the range was absent at its start
+                first_type = self.combined_types[(None, change_type)]
+                folded[member_key] = {'member_key': member_key, 'member_id': member_id,
+                                      'change_type': first_type, 'changes': changes}
+                continue
+
+            for field, (old, new) in changes.items():
+                if field in entry['changes']:
+                    entry['changes'][field][1] = new
+                else:
+                    entry['changes'][field] = [old, new]
+            entry['change_type'] = self.combined_types.get((entry['change_type'], change_type), change_type)
+
+        results = []
+        for entry in folded.values():
+            if entry['change_type'] is None:
+                continue
+            entry['changes'] = {field: pair for field, pair in entry['changes'].items() if pair[0] != pair[1]}
+            if entry['change_type'] == 'changed' and not entry['changes']:
+                continue
+            results.append(entry)
+        return results
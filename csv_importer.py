@@ -0,0 +1,326 @@
+import io
+import os
+import csv
+import sys
+import glob
+import uuid
+import time
+import logging
+import argparse
+from operator import itemgetter
+from datetime import datetime
+from scrape_cli import EXIT_COMPLETED, EXIT_FAILED, EXIT_BUSY, write_summary, database_label
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERN = 'suffolk_members_*.csv'
+
+class MemberCsvImporter:
+    """Stream CSV exports into scraped_members in chunks, skipping members that are already stored
+
+    Columns are mapped back to model fields through MEMBER_CSV_FIELDS, and
+    members are matched by the same member key a crawl uses, so an imported
+    member is updated rather than duplicated by the next crawl. Within an
+    import the first row of a member wins. Each chunk is one transaction:
+    COPY on Postgres, executemany elsewhere. No member_versions are written;
+    imported rows are attributed to the import's ScrapeSession instead.
+    """
+
+    def __init__(self, session_ref, chunk_size=20000, validate=True, on_chunk=None):
+        from models import ScrapedMember
+        from deduplicator import RecordDeduplicator
+        from record_filter import RecordValidityGate
+        from member_record import FIELD_NAMES
+
+        # scrape_sessions.id of the import, stored as the rows' last_session_ref
+        self.session_ref = session_ref
+        self.chunk_size = chunk_size
+        self.key_function = RecordDeduplicator().member_key
+        # Rows a crawl would have rejected as map chrome or empty are skipped too
+        self.validity_gate = RecordValidityGate() if validate else None
+        # Callable(stats) after every chunk, e.g. to refresh the session heartbeat
+        self.on_chunk = on_chunk
+        self.table = ScrapedMember.__table__
+        self.fields = FIELD_NAMES
+        self.columns = list(FIELD_NAMES) + ['member_key', 'last_session_ref', 'created_at', 'updated_at']
+        # Postgres rejects values longer than their column instead of storing them
+        self.max_lengths = [(FIELD_NAMES.index(column.name), column.type.length) for column in self.table.columns
+                            if getattr(column.type, 'length', None) and column.name in FIELD_NAMES]
+        self.seen_keys = set()
+        self.stats = {'files': 0, 'rows': 0, 'imported': 0, 'existing': 0, 'duplicates': 0, 'invalid': 0,
+                      'unkeyed': 0, 'truncated': 0}
+
+    def read_chunks(self, path):
+        """MemberRecords of a CSV file, chunk_size at a time"""
+        from member_record import MemberRecord, FIELD_ALIASES
+
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            positions = {}
+            for index, name in enumerate(header):
+                name = name.strip()
+                field = name if name in self.fields else FIELD_ALIASES.get(name)
+                if field:
+                    positions.setdefault(field, index)
+            if not positions:
+                raise ValueError(f'{path}: no member columns in the header')
+
+            # Rows are padded by one empty cell, which fields without a column read from
+            width = len(header)
+            field_values = itemgetter(*[positions.get(field, width) for field in self.fields])
+            chunk = []
+            for row in reader:
+                if len(row) != width:
+                    row = (row + [''] * width)[:width]
+                row.append('')
+                record = MemberRecord(*field_values(row))
+                record.latitude = self.coordinate(record.latitude)
+                record.longitude = self.coordinate(record.longitude)
+                chunk.append(record)
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def coordinate(self, value):
+        if value in (None, ''):
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def import_files(self, paths):
+        """Import every file in order; returns the stats"""
+        for path in paths:
+            started = time.perf_counter()
+            imported = self.stats['imported']
+            for chunk in self.read_chunks(path):
+                self.import_chunk(chunk)
+            self.stats['files'] += 1
+            logger.info('Imported %s members from %s in %.1fs',
+                        self.stats['imported'] - imported, path, time.perf_counter() - started)
+        return self.stats
+
+    def import_chunk(self, records):
+        """Insert the chunk's new members in one transaction"""
+        from models import db
+
+        self.stats['rows'] += len(records)
+        keyed = {}
+        rows = []
+        # One timestamp per chunk, as text so the raw SQLite insert stores what SQLAlchemy would
+        now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+        for record in records:
+            if self.validity_gate and not self.validity_gate.is_valid(record):
+                self.stats['invalid'] += 1
+                continue
+            key = self.key_function(record)
+            if key is None:
+                # Nothing to match on, so it is stored as-is like a crawl would
+                self.stats['unkeyed'] += 1
+                rows.append(self.row_values(record, None, now))
+            elif key in self.seen_keys or key in keyed:
+                self.stats['duplicates'] += 1
+            else:
+                keyed[key] = record
+
+        existing = self.existing_keys(list(keyed))
+        for key, record in keyed.items():
+            if key in existing:
+                self.stats['existing'] += 1
+            else:
+                rows.append(self.row_values(record, key, now))
+        self.seen_keys.update(keyed)
+
+        if rows:
+            dialect = db.engine.dialect.name
+            if dialect == 'postgresql':
+                self.copy_rows(rows)
+            elif dialect == 'sqlite':
+                self.insert_rows(rows)
+            else:
+                db.session.execute(self.table.insert(), [dict(zip(self.columns, row)) for row in rows])
+            db.session.commit()
+        self.stats['imported'] += len(rows)
+
+        if self.on_chunk:
+            self.on_chunk(dict(self.stats))
+
+    def existing_keys(self, keys, batch_size=500):
+        """The keys that already belong to stored members"""
+        from models import db, ScrapedMember
+
+        found = set()
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            found.update(db.session.execute(
+                db.select(ScrapedMember.member_key).where(ScrapedMember.member_key.in_(batch))
+            ).scalars())
+        return found
+
+    def row_values(self, record, key, now):
+        """Values in self.columns order"""
+        values = list(record.values())
+        for position, limit in self.max_lengths:
+            value = values[position]
+            if value and len(value) > limit:
+                values[position] = value[:limit]
+                self.stats['truncated'] += 1
+        values += [key, self.session_ref, now, now]
+        return values
+
+    def insert_rows(self, rows):
+        """executemany straight on the DBAPI cursor, inside the session's transaction"""
+        from models import db
+
+        sql = (f'INSERT INTO {self.table.name} ({", ".join(self.columns)}) '
+               f'VALUES ({", ".join("?" * len(self.columns))})')
+        cursor = db.session.connection().connection.driver_connection.cursor()
+        try:
+            cursor.executemany(sql, rows)
+        finally:
+            cursor.close()
+
+    def copy_rows(self, rows):
+        """Load rows with COPY ... FROM STDIN inside the session's transaction"""
+        from models import db
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        for values in rows:
+            writer.writerow(['' if value is None else value for value in values])
+        buffer.seek(0)
+
+        # Quoted empty values are empty strings in CSV COPY; these columns need NULL instead
+        nullable = ', '.join(['member_key', 'latitude', 'longitude', 'last_session_ref'])
+        sql = (f'COPY {self.table.name} ({", ".join(self.columns)}) FROM STDIN '
+               f'WITH (FORMAT csv, FORCE_NULL ({nullable}))')
+        cursor = db.session.connection().connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(sql, buffer)
+        finally:
+            cursor.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m csv_importer',
+        description='Bulk-load CSV exports into the members table, skipping members already stored',
+        epilog=f'Exit codes: {EXIT_COMPLETED} completed, {EXIT_FAILED} import failed, 2 bad arguments, '
+               f'{EXIT_BUSY} a scrape session is running'
+    )
+    parser.add_argument('files', nargs='*',
+                        help=f'CSV files or glob patterns, imported in order (default: {DEFAULT_PATTERN})')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='rows per transaction')
+    parser.add_argument('--no-filter', action='store_true',
+                        help='import rows the validity gate would reject (map chrome, rows without a name)')
+    parser.add_argument('--database', default=None, help='database URL (default: DATABASE_URL)')
+    parser.add_argument('--summary-json', default=None, help="write a JSON summary to this file ('-' for stdout)")
+    parser.add_argument('--quiet', action='store_true', help='only log warnings and errors')
+    args = parser.parse_args(argv)
+
+    args.paths = []
+    for pattern in args.files or [DEFAULT_PATTERN]:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        args.paths.extend(path for path in matches if path not in args.paths)
+    missing = [path for path in args.paths if not os.path.isfile(path)]
+    if missing:
+        parser.error(f'no such file: {", ".join(missing)}')
+    if not args.paths:
+        parser.error(f'no CSV files match {", ".join(args.files or [DEFAULT_PATTERN])}')
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be at least 1')
+    return args
+
+def run(args):
+    """Import the files as one session; returns (exit code, summary)"""
+    # The app reads its database URL at import, so it is imported only now
+    from main import app, init_schema
+    from logging_setup import configure_logging
+    from models import db, ScrapeSession, DataVersion
+    from change_tracking import MemberChangeTracker
+
+    configure_logging('WARNING' if args.quiet else None)
+    init_schema()
+
+    with app.app_context():
+        active = ScrapeSession.find_active(app.config['SCRAPER_STALE_AFTER'])
+        if active:
+            logger.error('Session %s is %s; import later', active.session_id, active.status)
+            return EXIT_BUSY, {'status': 'busy', 'active_session': active.session_id}
+
+        session = ScrapeSession(
+            session_id=str(uuid.uuid4()),
+            status='running',
+            trigger='import',
+            heartbeat_at=datetime.utcnow(),
+            message=f'Importing {len(args.paths)} CSV files'
+        )
+        db.session.add(session)
+        db.session.commit()
+        DataVersion.bump()
+        session_ref = session.id
+
+        def on_chunk(stats):
+            # Keeps the session from looking abandoned during long imports
+            db.session.execute(db.update(ScrapeSession).where(ScrapeSession.id == session_ref).values(
+                heartbeat_at=datetime.utcnow(),
+                message=f"Imported {stats['imported']} of {stats['rows']} rows read"
+            ))
+            db.session.commit()
+
+        importer = MemberCsvImporter(session_ref, chunk_size=args.chunk_size, validate=not args.no_filter,
+                                     on_chunk=on_chunk)
+        started = time.perf_counter()
+        error = None
+        try:
+            # Rows stored before member keys existed must be keyed to be matched
+            MemberChangeTracker(session_ref, importer.key_function).backfill_keys()
+            importer.import_files(args.paths)
+        except Exception as e:
+            db.session.rollback()
+            logger.error('Import failed: %s', e)
+            error = str(e)
+        elapsed = time.perf_counter() - started
+
+        stats = importer.stats
+        session = db.session.get(ScrapeSession, session_ref)
+        session.status = 'failed' if error else 'completed'
+        session.error_message = error
+        session.end_time = datetime.utcnow()
+        session.records_scraped = stats['rows']
+        session.records_saved = stats['imported']
+        session.members_added = stats['imported']
+        session.duplicates_merged = stats['duplicates'] + stats['existing']
+        session.records_rejected = stats['invalid']
+        session.message = (f"Import failed: {error}" if error else
+                           f"Imported {stats['imported']} members from {stats['files']} CSV files")
+        db.session.commit()
+        DataVersion.bump()
+        summary = session.to_dict()
+
+    summary.update({
+        'exit_code': EXIT_FAILED if error else EXIT_COMPLETED,
+        'files': args.paths,
+        'database': database_label(args.database_url),
+        'import_stats': stats,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(stats['rows'] / elapsed) if elapsed else None,
+    })
+    logger.info('Imported %s of %s rows in %.1fs: %s', stats['imported'], stats['rows'], elapsed, stats)
+    return summary['exit_code'], summary
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.database_url = args.database or os.environ.get('DATABASE_URL') or 'sqlite:///suffolk_scraper.db'
+    os.environ['DATABASE_URL'] = args.database_url
+
+    exit_code, summary = run(args)
+    if args.summary_json:
+        write_summary(summary, args.summary_json)
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,73 +2,71 @@ import re
 import csv
 import logging
 from datetime import datetime
+from member_record import MemberRecord, CSV_COLUMNS
+
+logger = logging.getLogger(__name__)
 
 class DataCleaner:
     def __init__(self):
-        self.csv_columns = [
-            'Business Name', 'Owner1', 'Owner2', 'Phone_primary', 'Phone_cell', 
-            'Phone_office', 'Phone_other', 'Address_Line1', 'Address_Line2', 
-            'City', 'State / Province / Region', 'Zip / Postal Code', 'Country', 
-            'Email1', 'Email2', 'Website', 'Business Type', 'Species', 'Breed(s)', 
-            'Social Network1', 'Social Network 2', 'Social Network 3', 
-            'Last Updated', 'About', 'Notes', 'Data Source', 'Data Source URL', 
-            'Date Scraped'
-        ]
+        self.csv_columns = CSV_COLUMNS
 
     def clean_record(self, raw_data):
-        """Clean a single record according to the specified rules"""
-        cleaned = {}
+        """Clean a single record according to the specified rules; returns a new MemberRecord"""
+        if not isinstance(raw_data, MemberRecord):
+            raw_data = MemberRecord.from_dict(raw_data)
         
         # Clean business name
-        cleaned['Business Name'] = self.clean_business_name(raw_data.get('business_name', ''))
+        business_name = self.clean_business_name(raw_data.business_name)
         
         # Clean owner names
-        owner1, owner2 = self.clean_owner_names(
-            raw_data.get('owner1', ''), 
-            raw_data.get('owner2', ''),
-            cleaned['Business Name']
+        owner1, owner2 = self.clean_owner_names(raw_data.owner1, raw_data.owner2, business_name)
+        
+        return MemberRecord(
+            business_name=business_name,
+            owner1=owner1,
+            owner2=owner2,
+            
+            # Clean phone numbers
+            phone_primary=self.clean_phone_number(raw_data.phone_primary),
+            phone_cell=self.clean_phone_number(raw_data.phone_cell),
+            phone_office=self.clean_phone_number(raw_data.phone_office),
+            phone_other=self.clean_phone_number(raw_data.phone_other),
+            
+            # Clean address fields
+            address_line1=self.clean_text(raw_data.address_line1),
+            address_line2=self.clean_text(raw_data.address_line2),
+            city=self.clean_city_name(raw_data.city),
+            state_province_region=self.clean_text(raw_data.state_province_region),
+            zip_postal_code=self.clean_zip_code(raw_data.zip_postal_code),
+            country=self.clean_text(raw_data.country),
+            
+            # Clean contact info
+            email1=self.clean_email(raw_data.email1),
+            email2=self.clean_email(raw_data.email2),
+            website=self.clean_website(raw_data.website),
+            
+            # Clean business details
+            business_type=self.clean_text(raw_data.business_type),
+            species=self.clean_text(raw_data.species),
+            breeds=self.clean_text(raw_data.breeds),
+            
+            # Social networks
+            social_network1=self.clean_text(raw_data.social_network1),
+            social_network2=self.clean_text(raw_data.social_network2),
+            social_network3=self.clean_text(raw_data.social_network3),
+            
+            # Dates and metadata
+            last_updated=self.clean_date(raw_data.last_updated),
+            about=self.clean_text(raw_data.about),
+            notes=self.clean_text(raw_data.notes),
+            data_source=raw_data.data_source or 'Suffolk DigitalOvine',
+            data_source_url=raw_data.data_source_url,
+            date_scraped=self.clean_date(raw_data.date_scraped or datetime.now().strftime('%Y-%m-%d')),
+            
+            # Coordinates are stored in the database but are not part of the CSV layout
+            latitude=self.clean_coordinate(raw_data.latitude, 90),
+            longitude=self.clean_coordinate(raw_data.longitude, 180)
         )
-        cleaned['Owner1'] = owner1
-        cleaned['Owner2'] = owner2
-        
-        # Clean phone numbers
-        cleaned['Phone_primary'] = self.clean_phone_number(raw_data.get('phone_primary', ''))
-        cleaned['Phone_cell'] = self.clean_phone_number(raw_data.get('phone_cell', ''))
-        cleaned['Phone_office'] = self.clean_phone_number(raw_data.get('phone_office', ''))
-        cleaned['Phone_other'] = self.clean_phone_number(raw_data.get('phone_other', ''))
-        
-        # Clean address fields
-        cleaned['Address_Line1'] = self.clean_text(raw_data.get('address_line1', ''))
-        cleaned['Address_Line2'] = self.clean_text(raw_data.get('address_line2', ''))
-        cleaned['City'] = self.clean_city_name(raw_data.get('city', ''))
-        cleaned['State / Province / Region'] = self.clean_text(raw_data.get('state', ''))
-        cleaned['Zip / Postal Code'] = self.clean_zip_code(raw_data.get('zip_code', ''))
-        cleaned['Country'] = self.clean_text(raw_data.get('country', ''))
-        
-        # Clean contact info
-        cleaned['Email1'] = self.clean_email(raw_data.get('email1', ''))
-        cleaned['Email2'] = self.clean_email(raw_data.get('email2', ''))
-        cleaned['Website'] = self.clean_website(raw_data.get('website', ''))
-        
-        # Clean business details
-        cleaned['Business Type'] = self.clean_text(raw_data.get('business_type', ''))
-        cleaned['Species'] = self.clean_text(raw_data.get('species', ''))
-        cleaned['Breed(s)'] = self.clean_text(raw_data.get('breeds', ''))
-        
-        # Social networks
-        cleaned['Social Network1'] = self.clean_text(raw_data.get('social_network1', ''))
-        cleaned['Social Network 2'] = self.clean_text(raw_data.get('social_network2', ''))
-        cleaned['Social Network 3'] = self.clean_text(raw_data.get('social_network3', ''))
-        
-        # Dates and metadata
-        cleaned['Last Updated'] = self.clean_date(raw_data.get('last_updated', ''))
-        cleaned['About'] = self.clean_text(raw_data.get('about', ''))
-        cleaned['Notes'] = self.clean_text(raw_data.get('notes', ''))
-        cleaned['Data Source'] = raw_data.get('data_source', 'Suffolk DigitalOvine')
-        cleaned['Data Source URL'] = raw_data.get('data_source_url', '')
-        cleaned['Date Scraped'] = self.clean_date(raw_data.get('date_scraped', datetime.now().strftime('%Y-%m-%d')))
-        
-        return cleaned
 
     def clean_text(self, text):
         """Clean general text fields"""
@@ -258,6 +256,18 @@ class DataCleaner:
         
         return ''
 
+    def clean_coordinate(self, value, limit):
+        """Parse a latitude/longitude, returning None when missing or out of range"""
+        if value is None or value == '':
+            return None
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        if -limit <= value <= limit:
+            return round(value, 6)
+        return None
+
     def clean_date(self, date_str):
         """Normalize dates to YYYY-MM-DD format"""
         if not date_str:
@@ -298,14 +308,34 @@ class DataCleaner:
         """Export cleaned data to CSV file"""
         try:
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=self.csv_columns)
-                writer.writeheader()
-                
-                for record in cleaned_data:
-                    writer.writerow(record)
+                writer = csv.writer(csvfile)
+                writer.writerow(self.csv_columns)
+                writer.writerows(record.csv_row() for record in cleaned_data)
             
-            logging.info(f'Successfully exported {len(cleaned_data)} records to {filename}')
+            logger.info('Successfully exported %s records to %s', len(cleaned_data), filename)
             
         except Exception as e:
-            logging.error(f'Error exporting to CSV: {str(e)}')
+            logger.error('Error exporting to CSV: %s', e)
+            raise
+
+    def export_to_parquet(self, cleaned_data, filename):
+        """Export cleaned data to a Parquet file with the CSV columns; needs pyarrow"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError('Parquet export needs pyarrow (pip install pyarrow)')
+
+        try:
+            # Every column is text, as in the CSV; empty values become nulls
+            rows = [record.csv_row() for record in cleaned_data]
+            columns = {column: [None if row[position] in (None, '') else str(row[position]) for row in rows]
+                       for position, column in enumerate(self.csv_columns)}
+            table = pa.table({column: pa.array(values, type=pa.string()) for column, values in columns.items()})
+            pq.write_table(table, filename)
+
+            logger.info('Successfully exported %s records to %s', len(cleaned_data), filename)
+
+        except Exception as e:
+            logger.error('Error exporting to Parquet: %s', e)
             raise
@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import logging
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# scrape's writes; synchronous=NORMAL is durable across application crashes
+# under WAL and only risks the last commits on power loss.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    # Wait for another process's write lock instead of failing with "database is locked"
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '10000')),
+    'temp_store': 'MEMORY',
+    # Negative values are KiB: 32 MB of page cache per connection
+    'cache_size': -32000,
+}
+
+def is_sqlite(database_url):
+    return database_url.startswith('sqlite')
+
+def engine_options(database_url, role='writer'):
+    """SQLAlchemy engine options for the writer or reader engine of a database URL"""
+    if is_sqlite(database_url):
+        return {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', '5')),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+            'connect_args': {'check_same_thread': False, 'timeout': 30},
+        }
+
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': 30,
+        'pool_recycle': 300,
+        'pool_pre_ping': True,
+    }
+    if role == 'reader':
+        # Dashboard reads never need to see the scrape's uncommitted work
+        options['isolation_level'] = 'AUTOCOMMIT'
+    return options
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection, whichever engine opened it"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+class ReaderSessions:
+    """Sessions on a separate engine for the read-only API endpoints
+
+    Reads get their own connection pool, so a scrape holding writer
+    connections cannot starve the dashboard. DATABASE_READ_URL points them at
+    a replica; otherwise they use the main database (read-only on SQLite).
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.session = None
+
+    def init_app(self, app):
+        database_url = app.config.get('SQLALCHEMY_READ_DATABASE_URI') or app.config['SQLALCHEMY_DATABASE_URI']
+        self.engine = create_engine(database_url, **engine_options(database_url, role='reader'))
+
+        if is_sqlite(database_url):
+            @event.listens_for(self.engine, 'connect')
+            def set_query_only(dbapi_connection, connection_record):
+                dbapi_connection.execute('PRAGMA query_only=ON')
+
+        self.session = scoped_session(sessionmaker(bind=self.engine))
+
+        @app.teardown_appcontext
+        def remove_reader_session(exception=None):
+            self.session.remove()
+
+        logger.debug('Reader engine configured for %s', self.engine.url.render_as_string(hide_password=True))
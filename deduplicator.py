@@ -0,0 +1,247 @@
+import re
+import copy
+import hashlib
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+NON_DIGIT = re.compile(r'[^\d]')
+NAME_TOKEN = re.compile(r'[a-z0-9]+')
+
+class RecordDeduplicator:
+    """Merge duplicate member records using blocking keys and name similarity"""
+
+    # Free mail providers are shared by unrelated members, so the whole
+    # address is used as the blocking key instead of just the domain
+    free_email_domains = {
+        'gmail.com', 'yahoo.com', 'hotmail.com', 'aol.com', 'outlook.com',
+        'icloud.com', 'msn.com', 'live.com', 'comcast.net', 'att.net',
+        'sbcglobal.net', 'verizon.net', 'bellsouth.net', 'charter.net',
+        'earthlink.net', 'me.com', 'ymail.com', 'protonmail.com'
+    }
+
+    # Words that carry no identity when comparing names
+    name_stopwords = {'llc', 'inc', 'co', 'ltd', 'lp', 'llp', 'the', 'and', 'of'}
+
+    # Owner2 is often parser noise, so only the primary names identify a member
+    name_fields = ['business_name', 'owner1']
+    phone_fields = ['phone_primary', 'phone_cell', 'phone_office', 'phone_other']
+    email_fields = ['email1', 'email2']
+
+    def __init__(self, similarity_threshold=0.8, contact_threshold=0.5, max_block_size=500):
+        # Names must be this similar when records only share a ZIP, domain or name key
+        self.similarity_threshold = similarity_threshold
+        # Records sharing an exact phone number or email need less name agreement
+        self.contact_threshold = contact_threshold
+        # Oversized blocks are not discriminative and would bring back O(n²) work
+        self.max_block_size = max_block_size
+        self.last_stats = {}
+
+    def deduplicate(self, records):
+        """Return records with duplicates merged into one canonical record each"""
+        if not records:
+            self.last_stats = {'input': 0, 'output': 0, 'merged': 0, 'comparisons': 0}
+            return []
+
+        names = [self.record_name_keys(record) for record in records]
+        contacts = [self.contact_keys(record) for record in records]
+        blocks = self.build_blocks(names, contacts)
+        # Trigram sets are built lazily, once per record that shares a block
+        grams = {}
+
+        def record_grams(i):
+            if i not in grams:
+                grams[i] = [self.name_trigrams(name) for name in names[i]]
+            return grams[i]
+
+        parent = list(range(len(records)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        comparisons = 0
+        skipped_blocks = 0
+        for block_key, members in blocks.items():
+            if len(members) < 2:
+                continue
+            if len(members) > self.max_block_size:
+                skipped_blocks += 1
+                continue
+
+            threshold = self.contact_threshold if block_key[0] in ('phone', 'email') else self.similarity_threshold
+
+            for a_pos in range(len(members)):
+                a = members[a_pos]
+                for b in members[a_pos + 1:]:
+                    root_a, root_b = find(a), find(b)
+                    if root_a == root_b:
+                        continue
+                    comparisons += 1
+                    # A shared name alone does not identify a member: the two must not
+                    # carry a ZIP code, phone numbers or emails that disagree
+                    if block_key[0] == 'name' and self.contacts_conflict(contacts[a], contacts[b]):
+                        continue
+                    if self.name_similarity(record_grams(a), record_grams(b), block_key[0]) >= threshold:
+                        parent[root_b] = root_a
+
+        # Group records by cluster, keeping the order of first appearance
+        clusters = defaultdict(list)
+        for i in range(len(records)):
+            clusters[find(i)].append(i)
+
+        merged_records = []
+        for root in sorted(clusters, key=lambda r: clusters[r][0]):
+            indexes = clusters[root]
+            if len(indexes) == 1:
+                merged_records.append(records[indexes[0]])
+            else:
+                merged_records.append(self.merge_records([records[i] for i in indexes]))
+
+        self.last_stats = {
+            'input': len(records),
+            'output': len(merged_records),
+            'merged': len(records) - len(merged_records),
+            'comparisons': comparisons,
+            'blocks': len(blocks),
+            'skipped_blocks': skipped_blocks
+        }
+        logger.info('Deduplicated %s records into %s (%s comparisons across %s blocks)',
+                    len(records), len(merged_records), comparisons, len(blocks))
+
+        return merged_records
+
+    def build_blocks(self, names, contacts):
+        """Index records by blocking keys so only likely duplicates are compared"""
+        blocks = defaultdict(list)
+
+        for i, record_contacts in enumerate(contacts):
+            keys = set(record_contacts)
+
+            # Exact normalized names catch repeated rows that carry no contact data
+            for name in names[i]:
+                if name:
+                    keys.add(('name', name))
+
+            for key in keys:
+                blocks[key].append(i)
+
+        return blocks
+
+    def contact_keys(self, record):
+        """Blocking keys of a record's ZIP code, phone numbers and email addresses or domains"""
+        keys = set()
+
+        zip_code = record.zip_postal_code
+        zip_digits = NON_DIGIT.sub('', zip_code)[:5] if zip_code else ''
+        if len(zip_digits) == 5:
+            keys.add(('zip', zip_digits))
+
+        for field in self.phone_fields:
+            phone = getattr(record, field)
+            if not phone:
+                continue
+            digits = NON_DIGIT.sub('', phone)
+            if len(digits) >= 7:
+                keys.add(('phone', digits[-10:]))
+
+        for field in self.email_fields:
+            email = getattr(record, field)
+            if not email or '@' not in email:
+                continue
+            email = email.strip().lower()
+            domain = email.rsplit('@', 1)[1]
+            if domain in self.free_email_domains:
+                keys.add(('email', email))
+            else:
+                keys.add(('domain', domain))
+        return keys
+
+    def contacts_conflict(self, keys_a, keys_b):
+        """True when both records have a ZIP code, phone number or email and none of them agree"""
+        for kinds in (('zip',), ('phone',), ('email', 'domain')):
+            values_a = {key for key in keys_a if key[0] in kinds}
+            values_b = {key for key in keys_b if key[0] in kinds}
+            if values_a and values_b and not values_a & values_b:
+                return True
+        return False
+
+    def member_key(self, record):
+        """Stable identity of a member across crawls, or None when a record has nothing to key on
+
+        Names alone would make one member of two people who share a name, so
+        they are qualified by the ZIP code, or without one by the first phone
+        number or email. Records without names key on that phone or email.
+        """
+        names = [self.normalize_name(getattr(record, field)) for field in self.name_fields]
+        contact = self.contact_identity(record)
+        if any(names):
+            identity = 'name:' + '|'.join(names)
+            zip_digits = NON_DIGIT.sub('', record.zip_postal_code or '')[:5]
+            qualifier = 'zip:' + zip_digits if len(zip_digits) == 5 else contact
+            if qualifier:
+                identity += '|' + qualifier
+        elif contact:
+            identity = contact
+        else:
+            return None
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def contact_identity(self, record):
+        """'phone:<digits>' of the first usable phone number, else 'email:<address>', else None"""
+        for field in self.phone_fields:
+            digits = NON_DIGIT.sub('', getattr(record, field) or '')
+            if len(digits) >= 7:
+                return 'phone:' + digits[-10:]
+        for field in self.email_fields:
+            email = (getattr(record, field) or '').strip().lower()
+            if '@' in email:
+                return 'email:' + email
+        return None
+
+    def record_name_keys(self, record):
+        """Normalized name strings used for blocking and similarity scoring"""
+        keys = []
+        for field in self.name_fields:
+            key = self.normalize_name(getattr(record, field))
+            if key and key not in keys:
+                keys.append(key)
+        return keys
+
+    def name_trigrams(self, name):
+        """Padded character trigrams of a normalized name"""
+        padded = f'  {name} '
+        return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    def normalize_name(self, name):
+        """Lowercase, strip punctuation and stopwords, and sort tokens"""
+        if not name:
+            return ''
+        tokens = NAME_TOKEN.findall(name.lower())
+        tokens = [token for token in tokens if token not in self.name_stopwords]
+        return ' '.join(sorted(tokens))
+
+    def name_similarity(self, grams_a, grams_b, block_type):
+        """Best trigram Dice similarity between any pair of names from two records"""
+        if not grams_a or not grams_b:
+            # Without names only an exact shared phone or email identifies a member
+            return 1.0 if block_type in ('phone', 'email') and not grams_a and not grams_b else 0.0
+
+        best = 0.0
+        for a in grams_a:
+            for b in grams_b:
+                score = 2 * len(a & b) / (len(a) + len(b))
+                if score > best:
+                    best = score
+        return best
+
+    def merge_records(self, records):
+        """Merge a cluster of duplicates, preferring the most complete record"""
+        ranked = sorted(records, key=lambda r: sum(1 for value in r.values() if value), reverse=True)
+        merged = copy.copy(ranked[0])
+        for record in ranked[1:]:
+            merged.fill_missing(record)
+        return merged
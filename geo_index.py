@@ -0,0 +1,152 @@
+import math
+import logging
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+class SpatialIndex:
+    """Bounding-box and radius queries over member coordinates
+
+    SQLite keeps an R*Tree virtual table in sync with scraped_members through
+    triggers. Postgres uses a GiST index: on a PostGIS geography when the
+    extension is installed, otherwise on the built-in point type.
+    """
+
+    rtree_table = 'scraped_members_rtree'
+
+    def __init__(self, db):
+        self.db = db
+        self.backend = None
+
+    def init_index(self):
+        """Create the spatial index for the current database; safe to call repeatedly"""
+        dialect = self.db.engine.dialect.name
+        try:
+            if dialect == 'sqlite':
+                self._init_sqlite()
+            elif dialect == 'postgresql':
+                self._init_postgres()
+            else:
+                self.backend = 'scan'
+        except Exception as e:
+            logger.warning('Spatial index unavailable, falling back to table scans: %s', e)
+            self.backend = 'scan'
+        logger.info('Spatial index backend: %s', self.backend)
+
+    def _init_sqlite(self):
+        with self.db.engine.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+            ), {'name': self.rtree_table}).first()
+
+            conn.execute(text(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.rtree_table} '
+                'USING rtree(id, min_lat, max_lat, min_lng, max_lng)'
+            ))
+            conn.execute(text(f'''
+                CREATE TRIGGER IF NOT EXISTS {self.rtree_table}_insert
+                AFTER INSERT ON scraped_members WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+                BEGIN
+                    INSERT OR REPLACE INTO {self.rtree_table}
+                    VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+                END
+            '''))
+            conn.execute(text(f'''
+                CREATE TRIGGER IF NOT EXISTS {self.rtree_table}_update
+                AFTER UPDATE OF latitude, longitude ON scraped_members
+                BEGIN
+                    DELETE FROM {self.rtree_table} WHERE id = OLD.id;
+                    INSERT INTO {self.rtree_table}
+                    SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+                    WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+                END
+            '''))
+            conn.execute(text(f'''
+                CREATE TRIGGER IF NOT EXISTS {self.rtree_table}_delete
+                AFTER DELETE ON scraped_members
+                BEGIN
+                    DELETE FROM {self.rtree_table} WHERE id = OLD.id;
+                END
+            '''))
+
+            # Backfill rows that existed before the index did
+            if not exists:
+                conn.execute(text(
+                    f'INSERT OR REPLACE INTO {self.rtree_table} '
+                    'SELECT id, latitude, latitude, longitude, longitude FROM scraped_members '
+                    'WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+                ))
+        self.backend = 'rtree'
+
+    def _init_postgres(self):
+        with self.db.engine.begin() as conn:
+            has_postgis = conn.execute(text(
+                "SELECT 1 FROM pg_extension WHERE extname = 'postgis'"
+            )).first()
+            if has_postgis:
+                conn.execute(text(
+                    'CREATE INDEX IF NOT EXISTS ix_scraped_members_geog ON scraped_members USING gist '
+                    '((ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography))'
+                ))
+                self.backend = 'postgis'
+            else:
+                conn.execute(text(
+                    'CREATE INDEX IF NOT EXISTS ix_scraped_members_point ON scraped_members '
+                    'USING gist (point(longitude, latitude))'
+                ))
+                self.backend = 'gist'
+
+    def points_in_bbox(self, min_lat, min_lng, max_lat, max_lng, limit=None, session=None):
+        """(id, latitude, longitude) of members whose coordinates fall inside the box"""
+        params = {'min_lat': min_lat, 'max_lat': max_lat, 'min_lng': min_lng, 'max_lng': max_lng}
+        select = 'SELECT m.id, m.latitude, m.longitude FROM scraped_members m'
+
+        if self.backend == 'rtree':
+            sql = (f'{select} JOIN {self.rtree_table} r ON r.id = m.id '
+                   'WHERE r.max_lat >= :min_lat AND r.min_lat <= :max_lat '
+                   'AND r.max_lng >= :min_lng AND r.min_lng <= :max_lng '
+                   # The R*Tree stores 32-bit bounds, so re-check against the exact columns
+                   'AND m.latitude BETWEEN :min_lat AND :max_lat '
+                   'AND m.longitude BETWEEN :min_lng AND :max_lng')
+        elif self.backend == 'postgis':
+            sql = (f'{select} WHERE (ST_SetSRID(ST_MakePoint(m.longitude, m.latitude), 4326)::geography) && '
+                   'ST_MakeEnvelope(:min_lng, :min_lat, :max_lng, :max_lat, 4326)::geography')
+        elif self.backend == 'gist':
+            sql = (f'{select} WHERE point(m.longitude, m.latitude) <@ '
+                   'box(point(:min_lng, :min_lat), point(:max_lng, :max_lat))')
+        else:
+            sql = (f'{select} WHERE m.latitude BETWEEN :min_lat AND :max_lat '
+                   'AND m.longitude BETWEEN :min_lng AND :max_lng')
+
+        if limit:
+            sql += ' LIMIT :limit'
+            params['limit'] = limit
+
+        return (session or self.db.session).execute(text(sql), params).all()
+
+    def nearby(self, lat, lng, radius_km, limit=100, session=None):
+        """(id, distance_km) pairs within radius_km, nearest first"""
+        # Bounding box of the circle narrows the candidates through the index
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        lng_delta = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 1e-6)))
+        rows = self.points_in_bbox(lat - lat_delta, lng - lng_delta, lat + lat_delta, lng + lng_delta,
+                                   session=session)
+
+        results = []
+        for member_id, member_lat, member_lng in rows:
+            distance = haversine_km(lat, lng, member_lat, member_lng)
+            if distance <= radius_km:
+                results.append((member_id, distance))
+
+        results.sort(key=lambda item: item[1])
+        return results[:limit]
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,19 @@
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+# Threads keep slow clients and status polling from tying up whole processes
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so memory growth cannot accumulate
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = '-'
+errorlog = '-'
+
+# Web workers only queue scrapes; scrape_worker.py runs them
+raw_env = ['SCRAPER_RUN_MODE=worker']
@@ -0,0 +1,208 @@
+import re
+import json
+import time
+import random
+import asyncio
+import logging
+from urllib.parse import urljoin
+import httpx
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Marker positions as written by the Google Maps JS API in inline scripts
+LATLNG_PATTERN = re.compile(r'LatLng\(\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*\)')
+LATLNG_OBJECT_PATTERN = re.compile(r'\{\s*"?lat"?\s*:\s*(-?\d+(?:\.\d+)?)\s*,\s*"?lng"?\s*:\s*(-?\d+(?:\.\d+)?)')
+# Info window content assigned near a marker: content: '...', setContent("...") or html: "..."
+CONTENT_PATTERN = re.compile(
+    r'(?:content|setContent|html|info)\s*[:(=]\s*(?P<quote>["\'])(?P<body>(?:\\.|(?!(?P=quote)).)*)(?P=quote)',
+    re.DOTALL
+)
+# A per-member detail page URL, looked for only in the script code of one marker
+DETAIL_URL_PATTERN = re.compile(r'["\'](?P<url>(?=[^"\'\s]*(?:member|profile|info))[^"\'\s]*\?[^"\'\s]+)["\']', re.IGNORECASE)
+
+class HttpMapFetcher:
+    """Fetch marker and member data over plain HTTP, without starting a browser"""
+
+    def __init__(self, map_url, parser, max_connections=10, concurrency=5, max_retries=3, timeout=20, transport=None,
+                 rate_controller=None):
+        self.map_url = map_url
+        # Callable(text, html) -> raw record dict, normally SuffolkMapScraper.parse_popup_content
+        self.parser = parser
+        self.max_connections = max_connections
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.transport = transport
+        # Shared RateController (token bucket + AIMD) used by all HTTP and browser workers
+        self.rate_controller = rate_controller
+        self.user_agent = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                           "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+        self.stats = {'requests': 0, 'retries': 0, 'markers': 0, 'detail_pages': 0, 'elapsed': 0.0}
+
+    def fetch(self):
+        """Return raw records, or None when the page needs JS rendering"""
+        return asyncio.run(self.fetch_async())
+
+    async def fetch_async(self):
+        """Fetch the map page and any member detail pages it references"""
+        start = time.time()
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        try:
+            async with httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True,
+                                         headers={'User-Agent': self.user_agent},
+                                         transport=self.transport) as client:
+                page_html = await self.get_text(client, semaphore, self.map_url)
+                if page_html is None:
+                    return None
+
+                markers = self.extract_markers(page_html)
+                self.stats['markers'] = len(markers)
+
+                # Markers without inline content may link to a detail page instead
+                pending = [marker for marker in markers if not marker.get('html') and marker.get('detail_url')]
+                if pending:
+                    pages = await asyncio.gather(*[
+                        self.get_text(client, semaphore, marker['detail_url']) for marker in pending
+                    ])
+                    for marker, detail_html in zip(pending, pages):
+                        if detail_html:
+                            marker['html'] = detail_html
+                            self.stats['detail_pages'] += 1
+        except httpx.HTTPError as e:
+            logger.warning('HTTP fetch failed, falling back to browser: %s', e)
+            return None
+        finally:
+            self.stats['elapsed'] = round(time.time() - start, 3)
+
+        records = []
+        for marker in markers:
+            if not marker.get('html'):
+                continue
+            record = self.parse_marker(marker)
+            if record:
+                records.append(record)
+
+        if not records:
+            logger.info('No member data found in static HTML; browser rendering required')
+            return None
+
+        logger.info('Fetched %s records over HTTP from %s markers in %ss (%s requests)',
+                    len(records), len(markers), self.stats['elapsed'], self.stats['requests'])
+        return records
+
+    async def get_text(self, client, semaphore, url):
+        """GET a URL with retries and exponential backoff; None on final failure"""
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                if self.rate_controller:
+                    await self.rate_controller.enter_async()
+                started = time.monotonic()
+                try:
+                    self.stats['requests'] += 1
+                    response = await client.get(url)
+                    status = response.status_code
+                    self.record_outcome(started, error=status >= 500, throttled=status == 429)
+                    if status == 429 or status >= 500:
+                        raise httpx.HTTPStatusError(f'HTTP {status}', request=response.request, response=response)
+                    response.raise_for_status()
+                    return response.text
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                    if status is None:
+                        self.record_outcome(started, error=True, timeout=isinstance(e, httpx.TimeoutException))
+                    # Client errors other than throttling will not improve on retry
+                    if status and status < 500 and status != 429:
+                        logger.warning('HTTP %s for %s', status, url)
+                        return None
+                    if attempt == self.max_retries:
+                        logger.warning('Giving up on %s after %s attempts: %s', url, attempt + 1, e)
+                        return None
+                    self.stats['retries'] += 1
+                finally:
+                    if self.rate_controller:
+                        self.rate_controller.leave()
+            await asyncio.sleep(min(2 ** attempt, 10) + random.uniform(0, 0.5))
+        return None
+
+    def record_outcome(self, started, **outcome):
+        """Report request latency and errors to the shared rate controller"""
+        if self.rate_controller:
+            self.rate_controller.record(time.monotonic() - started, **outcome)
+
+    def extract_markers(self, page_html):
+        """Find marker positions with their info window HTML or detail link in the page's inline scripts"""
+        soup = BeautifulSoup(page_html, 'html.parser')
+        markers = []
+
+        for script in soup.find_all('script'):
+            script_text = script.string or ''
+            if 'LatLng' not in script_text and 'lat' not in script_text:
+                continue
+            markers.extend(self.extract_script_markers(script_text))
+
+        # Page links (navigation, account and footer links) are never treated as members; only a
+        # detail URL found next to a marker position in a script is followed
+        return markers
+
+    def extract_script_markers(self, script_text):
+        """Split an inline script at each marker position and pick up its info window content"""
+        positions = [(m.start(), float(m.group(1)), float(m.group(2)))
+                     for pattern in (LATLNG_PATTERN, LATLNG_OBJECT_PATTERN)
+                     for m in pattern.finditer(script_text)]
+        positions.sort()
+
+        markers = []
+        for index, (offset, lat, lng) in enumerate(positions):
+            end = positions[index + 1][0] if index + 1 < len(positions) else len(script_text)
+            segment = script_text[offset:end]
+
+            marker = {'latitude': lat, 'longitude': lng, 'html': '', 'detail_url': None}
+            for content_match in CONTENT_PATTERN.finditer(segment):
+                body = self.decode_js_string(content_match.group('body'))
+                if '<' in body:
+                    marker['html'] = body
+                    break
+
+            if not marker['html']:
+                for url_match in DETAIL_URL_PATTERN.finditer(segment):
+                    url = urljoin(self.map_url, url_match.group('url'))
+                    if not self.is_map_url(url):
+                        marker['detail_url'] = url
+                        break
+
+            markers.append(marker)
+
+        return markers
+
+    def is_map_url(self, url):
+        """True for the map page itself and Google Maps links, which are not member pages"""
+        return url.split('#')[0] == self.map_url.split('#')[0] or 'google' in url
+
+    def decode_js_string(self, body):
+        """Decode the escapes of a JS string literal body"""
+        try:
+            return json.loads('"' + body.replace("\\'", "'").replace('"', '\\"').replace('\\\\"', '\\"') + '"')
+        except ValueError:
+            return body.replace("\\'", "'").replace('\\"', '"').replace('\\/', '/').replace('\\n', '\n')
+
+    def parse_marker(self, marker):
+        """Turn a marker's info window or detail page HTML into a raw record"""
+        try:
+            soup = BeautifulSoup(marker['html'], 'html.parser')
+            for tag in soup(['script', 'style']):
+                tag.decompose()
+            text = soup.get_text('\n')
+            record = self.parser(text, marker['html'])
+            if record and marker.get('detail_url'):
+                record.data_source_url = marker['detail_url']
+            if record and marker.get('latitude') is not None:
+                record.latitude = marker['latitude']
+                record.longitude = marker['longitude']
+            return record
+        except Exception as e:
+            logger.debug('Failed to parse marker content: %s', e)
+            return None
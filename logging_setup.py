@@ -0,0 +1,118 @@
+import os
+import copy
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came in through `extra` and becomes a JSON field
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+# Chatty libraries that would otherwise log every WebDriver and HTTP request
+QUIET_LOGGERS = ('selenium', 'urllib3', 'httpx', 'httpcore', 'WDM')
+
+listener = None
+listener_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, extra fields and any traceback"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class RenderedQueueHandler(QueueHandler):
+    """Queue records with only their message rendered; formatting and I/O happen on the listener thread
+
+    The message is rendered here because its arguments may change after the
+    call (live stats dicts), and tracebacks because they hold frames.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def configure_logging(level=None, log_file=None):
+    """Send all logging through a queue to a rotating JSON log file and the console
+
+    Called by the entry points rather than at import. level defaults to
+    LOG_LEVEL, log_file to LOG_FILE (scraper.log); an empty log_file logs to
+    the console only. LOG_FORMAT=json makes the console JSON too.
+    """
+    global listener
+    with listener_lock:
+        if listener:
+            return listener
+
+        level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+        log_file = os.environ.get('LOG_FILE', 'scraper.log') if log_file is None else log_file
+
+        handlers = []
+        console = logging.StreamHandler()
+        console.setFormatter(JsonFormatter() if os.environ.get('LOG_FORMAT') == 'json' else logging.Formatter(TEXT_FORMAT))
+        handlers.append(console)
+        if log_file:
+            file_handler = RotatingFileHandler(
+                log_file,
+                maxBytes=int(os.environ.get('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+                backupCount=int(os.environ.get('LOG_BACKUP_COUNT', '5')),
+                encoding='utf-8',
+                delay=True
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(RenderedQueueHandler(log_queue))
+        root.setLevel(level)
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        listener.start()
+        # Flush whatever is still queued on exit
+        atexit.register(listener.stop)
+        return listener
+
+class LogSampler:
+    """Let the first and then every `every`-th event through, for logs inside per-pin loops
+
+    count keeps the total, so sampled messages can say how many they stand for.
+    """
+
+    def __init__(self, every=None):
+        self.every = max(1, every or int(os.environ.get('LOG_SAMPLE_EVERY', '50')))
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def sample(self):
+        with self.lock:
+            self.count += 1
+            return self.count == 1 or self.count % self.every == 0
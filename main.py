@@ -1,24 +1,22 @@
+import io
 import os
+import json
+import math
 import logging
 import uuid
-from flask import Flask, render_template, jsonify, send_file, request
-from flask_migrate import Migrate
-from scraper import SuffolkMapScraper
-from data_cleaner import DataCleaner
-from models import db, ScrapedMember, ScrapeSession
 import threading
-import time
-from datetime import datetime
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scraper.log'),
-        logging.StreamHandler()
-    ]
-)
+from flask import Flask, render_template, jsonify, send_file, request
+from flask.cli import AppGroup
+from models import db, ScrapedMember, ScrapeSession, SessionProfile, DataVersion
+from change_tracking import MemberHistory
+from geo_index import SpatialIndex
+from schema_upgrade import SchemaUpgrade
+from response_cache import ResponseCache
+from serializers import member_serializer
+from db_config import engine_options, ReaderSessions
+from logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
@@ -28,23 +26,101 @@ if not database_url:
     database_url = 'sqlite:///suffolk_scraper.db'  # Fallback to SQLite
 
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url)
+# Optional read replica for the API endpoints
+app.config['SQLALCHEMY_READ_DATABASE_URI'] = os.environ.get('DATABASE_READ_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SCRAPER_HTTP_FIRST'] = os.environ.get('SCRAPER_HTTP_FIRST', '1') != '0'
+app.config['SCRAPER_LEAN_BROWSER'] = os.environ.get('SCRAPER_LEAN_BROWSER', '1') != '0'
+# Tiling splits the default viewport into 4^levels tiles crawled by a pool of browsers
+app.config['SCRAPER_TILE_LEVELS'] = int(os.environ.get('SCRAPER_TILE_LEVELS', '0'))
+app.config['SCRAPER_BROWSER_WORKERS'] = int(os.environ.get('SCRAPER_BROWSER_WORKERS', '1'))
+# Click pins in batches inside the page instead of one WebDriver round trip at a time
+app.config['SCRAPER_BATCH_HARVEST'] = os.environ.get('SCRAPER_BATCH_HARVEST', '1') != '0'
+# Restart a browser once it (geckodriver plus Firefox processes) uses this much memory; 0 disables
+app.config['SCRAPER_BROWSER_MEMORY_MB'] = int(os.environ.get('SCRAPER_BROWSER_MEMORY_MB', '1500'))
+# Warn and collect garbage once the scraping process itself uses this much; 0 disables
+app.config['SCRAPER_PROCESS_MEMORY_MB'] = int(os.environ.get('SCRAPER_PROCESS_MEMORY_MB', '1024'))
+# Pins clicked between memory samples (batch harvesting samples after every batch)
+app.config['SCRAPER_MEMORY_CHECK_EVERY'] = int(os.environ.get('SCRAPER_MEMORY_CHECK_EVERY', '25'))
+# Rounds of end-of-run retries for pins that failed, each on a fresh browser
+app.config['SCRAPER_PIN_RETRIES'] = int(os.environ.get('SCRAPER_PIN_RETRIES', '2'))
+# Run every session under cProfile and time its WebDriver commands (or per run with profile=true)
+app.config['SCRAPER_PROFILE'] = os.environ.get('SCRAPER_PROFILE', '0') == '1'
+# 'thread' runs scrapes inside the web process (dev server); 'worker' leaves them to scrape_worker.py
+app.config['SCRAPER_RUN_MODE'] = os.environ.get('SCRAPER_RUN_MODE', 'thread')
+# Seconds without a progress heartbeat before a running session counts as abandoned
+app.config['SCRAPER_STALE_AFTER'] = int(os.environ.get('SCRAPER_STALE_AFTER', '600'))
 app.secret_key = os.environ.get("FLASK_SECRET_KEY") or "a secret key"
 
-# Initialize database and migrations
+# Initialize database: the scrape writes through db.session, API reads go through reader.session
 db.init_app(app)
-migrate = Migrate(app, db)
+reader = ReaderSessions()
+reader.init_app(app)
+
+migrate = None
+
+def init_migrations():
+    """Register Flask-Migrate, which only the `flask db` commands need"""
+    global migrate
+    if migrate is None:
+        from flask_migrate import Migrate
+        migrate = Migrate(app, db)
+    return migrate
+
+class AppCommands(AppGroup):
+    """app.cli that registers Flask-Migrate, and so imports Alembic, only once a `db` command is looked up
 
-# Create tables
-with app.app_context():
-    db.create_all()
+    Works however the CLI is started (`flask`, `python -m flask` or a
+    wrapper script); web and worker processes never load Flask-Migrate.
+    """
 
-# Global variables for tracking scraping progress
-scraping_status = {
+    def get_command(self, ctx, name):
+        if name == 'db':
+            init_migrations()
+        return super().get_command(ctx, name)
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | {'db'})
+
+app.cli = AppCommands()
+spatial_index = SpatialIndex(db)
+schema_upgrade = SchemaUpgrade(db)
+
+# Tables and indexes are created on first use, once per process, instead of at import
+schema_lock = threading.Lock()
+schema_ready = False
+
+def init_schema():
+    """Create missing tables, add columns older databases lack, and the spatial index; safe to call from every process"""
+    global schema_ready
+    if schema_ready:
+        return
+    with schema_lock:
+        if schema_ready:
+            return
+        with app.app_context():
+            try:
+                db.create_all()
+                schema_upgrade.upgrade()
+            except Exception as e:
+                # Another process created the same tables or columns between our check and CREATE
+                logger.warning('Schema creation raced with another process, retrying: %s', e)
+                db.session.rollback()
+                db.create_all()
+                schema_upgrade.upgrade()
+            spatial_index.init_index()
+        schema_ready = True
+
+@app.before_request
+def ensure_schema():
+    init_schema()
+
+# Serialized API responses, invalidated whenever any process bumps the shared data version
+response_cache = ResponseCache(version_source=lambda: DataVersion.current(reader.session))
+
+# Reported by /status before any session exists
+IDLE_STATUS = {
     'running': False,
     'progress': 0,
     'total_pins': 0,
@@ -53,185 +129,12 @@ scraping_status = {
     'completed': False,
     'error': None,
     'csv_file': None,
-    'session_id': None,
-    'records_saved': 0
+    'session_id': None
 }
 
-def run_scraping():
-    """Run the scraping process in a background thread"""
-    global scraping_status
-    session = None
-    
-    try:
-        # Create new scrape session
-        session_id = str(uuid.uuid4())
-        scraping_status['session_id'] = session_id
-        scraping_status['running'] = True
-        scraping_status['completed'] = False
-        scraping_status['error'] = None
-        scraping_status['records_saved'] = 0
-        scraping_status['message'] = 'Initializing scraper...'
-        
-        # Create database session record
-        with app.app_context():
-            session = ScrapeSession(
-                session_id=session_id,
-                status='running'
-            )
-            db.session.add(session)
-            db.session.commit()
-        
-        # Initialize scraper
-        scraper = SuffolkMapScraper()
-        scraper.setup_driver()
-        
-        scraping_status['message'] = 'Loading map page...'
-        
-        # Load the map page
-        scraper.load_map_page()
-        
-        scraping_status['message'] = 'Finding pins on map...'
-        
-        # Find all pins
-        pins = scraper.find_map_pins()
-        scraping_status['total_pins'] = len(pins)
-        
-        # Update session with pin count
-        with app.app_context():
-            session = ScrapeSession.query.filter_by(session_id=session_id).first()
-            if session:
-                session.total_pins_found = len(pins)
-                db.session.commit()
-        
-        if not pins:
-            scraping_status['error'] = 'No pins found on the map'
-            return
-        
-        scraping_status['message'] = f'Found {len(pins)} pins. Starting extraction...'
-        
-        # Extract data from each pin
-        raw_data = []
-        for i, pin in enumerate(pins):
-            scraping_status['current_pin'] = i + 1
-            scraping_status['progress'] = int((i / len(pins)) * 50)  # First 50% for scraping
-            scraping_status['message'] = f'Extracting data from pin {i + 1} of {len(pins)}'
-            
-            try:
-                pin_data = scraper.extract_pin_data(pin)
-                if pin_data:
-                    raw_data.append(pin_data)
-                    logging.info(f'Extracted data from pin {i + 1}: {pin_data.get("business_name", "Unknown")}')
-            except Exception as e:
-                logging.error(f'Error extracting data from pin {i + 1}: {str(e)}')
-                continue
-        
-        scraper.cleanup()
-        
-        if not raw_data:
-            scraping_status['error'] = 'No data extracted from any pins'
-            return
-        
-        scraping_status['message'] = f'Extracted {len(raw_data)} records. Cleaning and saving data...'
-        scraping_status['progress'] = 50
-        
-        # Clean and save the data
-        cleaner = DataCleaner()
-        cleaned_data = []
-        saved_count = 0
-        
-        for i, record in enumerate(raw_data):
-            scraping_status['progress'] = 50 + int((i / len(raw_data)) * 40)  # 40% for cleaning
-            scraping_status['message'] = f'Processing record {i + 1} of {len(raw_data)}'
-            
-            try:
-                cleaned_record = cleaner.clean_record(record)
-                cleaned_data.append(cleaned_record)
-                
-                # Save to database
-                with app.app_context():
-                    member = ScrapedMember(
-                        business_name=cleaned_record.get('Business Name'),
-                        owner1=cleaned_record.get('Owner1'),
-                        owner2=cleaned_record.get('Owner2'),
-                        phone_primary=cleaned_record.get('Phone_primary'),
-                        phone_cell=cleaned_record.get('Phone_cell'),
-                        phone_office=cleaned_record.get('Phone_office'),
-                        phone_other=cleaned_record.get('Phone_other'),
-                        address_line1=cleaned_record.get('Address_Line1'),
-                        address_line2=cleaned_record.get('Address_Line2'),
-                        city=cleaned_record.get('City'),
-                        state_province_region=cleaned_record.get('State / Province / Region'),
-                        zip_postal_code=cleaned_record.get('Zip / Postal Code'),
-                        country=cleaned_record.get('Country'),
-                        email1=cleaned_record.get('Email1'),
-                        email2=cleaned_record.get('Email2'),
-                        website=cleaned_record.get('Website'),
-                        business_type=cleaned_record.get('Business Type'),
-                        species=cleaned_record.get('Species'),
-                        breeds=cleaned_record.get('Breed(s)'),
-                        social_network1=cleaned_record.get('Social Network1'),
-                        social_network2=cleaned_record.get('Social Network 2'),
-                        social_network3=cleaned_record.get('Social Network 3'),
-                        last_updated=cleaned_record.get('Last Updated'),
-                        about=cleaned_record.get('About'),
-                        notes=cleaned_record.get('Notes'),
-                        data_source=cleaned_record.get('Data Source'),
-                        data_source_url=cleaned_record.get('Data Source URL'),
-                        date_scraped=cleaned_record.get('Date Scraped')
-                    )
-                    db.session.add(member)
-                    db.session.commit()
-                    saved_count += 1
-                    scraping_status['records_saved'] = saved_count
-                    
-            except Exception as e:
-                logging.error(f'Error processing record {i + 1}: {str(e)}')
-                continue
-        
-        # Export to CSV
-        scraping_status['message'] = 'Exporting to CSV...'
-        scraping_status['progress'] = 90
-        csv_filename = f'suffolk_members_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        cleaner.export_to_csv(cleaned_data, csv_filename)
-        
-        # Update session record
-        with app.app_context():
-            session = ScrapeSession.query.filter_by(session_id=session_id).first()
-            if session:
-                session.status = 'completed'
-                session.end_time = datetime.utcnow()
-                session.records_scraped = len(raw_data)
-                session.records_saved = saved_count
-                session.csv_filename = csv_filename
-                db.session.commit()
-        
-        scraping_status['csv_file'] = csv_filename
-        scraping_status['progress'] = 100
-        scraping_status['completed'] = True
-        scraping_status['message'] = f'Scraping completed! Saved {saved_count} records to database and exported to {csv_filename}'
-        
-        logging.info(f'Scraping completed successfully. {saved_count} records saved to database and exported to {csv_filename}')
-        
-    except Exception as e:
-        scraping_status['error'] = str(e)
-        scraping_status['message'] = f'Error: {str(e)}'
-        logging.error(f'Scraping failed: {str(e)}')
-        
-        # Update session record with error
-        if scraping_status.get('session_id'):
-            try:
-                with app.app_context():
-                    session = ScrapeSession.query.filter_by(session_id=scraping_status['session_id']).first()
-                    if session:
-                        session.status = 'failed'
-                        session.end_time = datetime.utcnow()
-                        session.error_message = str(e)
-                        db.session.commit()
-            except:
-                pass
-                
-    finally:
-        scraping_status['running'] = False
+def find_active_session(db_session=None):
+    """The queued or running session, if any"""
+    return ScrapeSession.find_active(app.config['SCRAPER_STALE_AFTER'], session=db_session)
 
 @app.route('/')
 def index():
@@ -240,35 +143,50 @@ def index():
 
 @app.route('/start_scraping', methods=['POST'])
 def start_scraping():
-    """Start the scraping process"""
-    global scraping_status
-    
-    if scraping_status['running']:
+    """Queue a scraping session and, on the dev server, start it in a background thread"""
+    if ScrapeSession.expire_queued(app.config['SCRAPER_STALE_AFTER']):
+        DataVersion.bump()
+    if find_active_session():
         return jsonify({'error': 'Scraping is already running'}), 400
     
-    # Reset status
-    scraping_status = {
-        'running': True,
-        'progress': 0,
-        'total_pins': 0,
-        'current_pin': 0,
-        'message': 'Starting scraper...',
-        'completed': False,
-        'error': None,
-        'csv_file': None
-    }
+    # profile=true in the query string, form or JSON body profiles this run
+    body = request.get_json(silent=True) or {}
+    profile = body.get('profile', request.values.get('profile', ''))
+    options = {'SCRAPER_PROFILE': True} if str(profile).lower() in ('1', 'true', 'yes', 'on') else {}
+    
+    session = ScrapeSession(
+        session_id=str(uuid.uuid4()),
+        status='queued',
+        trigger='manual',
+        options=json.dumps(options) if options else None,
+        message='Starting scraper...'
+    )
+    db.session.add(session)
+    db.session.commit()
+    DataVersion.bump()
     
-    # Start scraping in background thread
-    thread = threading.Thread(target=run_scraping)
-    thread.daemon = True
-    thread.start()
+    if app.config['SCRAPER_RUN_MODE'] == 'thread':
+        # The scraping stack (Selenium, httpx, BeautifulSoup) loads with the first scrape
+        from pipeline import ScrapePipeline
+        thread = threading.Thread(target=ScrapePipeline(app, session.id).run)
+        thread.daemon = True
+        thread.start()
     
-    return jsonify({'message': 'Scraping started'})
+    return jsonify({'message': 'Scraping started', 'session_id': session.session_id})
 
 @app.route('/status')
 def get_status():
-    """Get current scraping status"""
-    return jsonify(scraping_status)
+    """Get scraping status of the given, active or most recent session"""
+    session_id = request.args.get('session_id')
+    if session_id:
+        session = reader.session.query(ScrapeSession).filter_by(session_id=session_id).first()
+    else:
+        session = (find_active_session(reader.session) or
+                   reader.session.query(ScrapeSession).order_by(ScrapeSession.id.desc()).first())
+    
+    if session is None:
+        return jsonify(IDLE_STATUS)
+    return jsonify(session.to_status())
 
 @app.route('/download/<filename>')
 def download_file(filename):
@@ -279,73 +197,234 @@ def download_file(filename):
         return jsonify({'error': 'File not found'}), 404
 
 @app.route('/api/members')
+@response_cache.cached_json
 def get_members():
     """Get all scraped members from database"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         
-        members = ScrapedMember.query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        # Same clamping as paginate(error_out=False)
+        page = max(page, 1)
+        if per_page < 1:
+            per_page = 20
         
-        return jsonify({
-            'members': [member.to_dict() for member in members.items],
-            'total': members.total,
-            'pages': members.pages,
+        members, total = member_serializer.fetch_page(reader.session, page, per_page)
+        
+        return {
+            'members': members,
+            'total': total,
+            'pages': math.ceil(total / per_page),
             'current_page': page,
             'per_page': per_page
+        }
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/members/near')
+def get_members_near():
+    """Get members within a radius (km) of a point, nearest first"""
+    try:
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        radius_km = request.args.get('radius_km', 50, type=float)
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        
+        if lat is None or lng is None:
+            return jsonify({'error': 'lat and lng are required'}), 400
+        
+        matches = spatial_index.nearby(lat, lng, radius_km, limit=limit, session=reader.session)
+        members = {member['id']: member for member in member_serializer.fetch(
+            reader.session,
+            member_serializer.select().where(ScrapedMember.id.in_([member_id for member_id, _ in matches]))
+        )}
+        
+        results = []
+        for member_id, distance in matches:
+            member_data = members[member_id]
+            member_data['distance_km'] = round(distance, 3)
+            results.append(member_data)
+        
+        return jsonify({
+            'members': results,
+            'count': len(results),
+            'center': {'lat': lat, 'lng': lng},
+            'radius_km': radius_km
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/members/bbox')
+def get_members_in_bbox():
+    """Get members inside a map viewport"""
+    try:
+        bounds = {name: request.args.get(name, type=float) for name in ('min_lat', 'min_lng', 'max_lat', 'max_lng')}
+        limit = min(request.args.get('limit', 500, type=int), 5000)
+        
+        if any(value is None for value in bounds.values()):
+            return jsonify({'error': 'min_lat, min_lng, max_lat and max_lng are required'}), 400
+        
+        points = spatial_index.points_in_bbox(bounds['min_lat'], bounds['min_lng'],
+                                              bounds['max_lat'], bounds['max_lng'], limit=limit,
+                                              session=reader.session)
+        members = member_serializer.fetch(
+            reader.session, member_serializer.select().where(ScrapedMember.id.in_([point[0] for point in points]))
+        )
+        
+        return jsonify({
+            'members': members,
+            'count': len(members),
+            'bounds': bounds
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/members/<int:member_id>')
+@response_cache.cached_json
 def get_member(member_id):
     """Get a specific member by ID"""
     try:
-        member = ScrapedMember.query.get_or_404(member_id)
-        return jsonify(member.to_dict())
+        members = member_serializer.fetch(reader.session,
+                                          member_serializer.select().where(ScrapedMember.id == member_id))
+        if not members:
+            return jsonify({'error': 'Member not found'}), 404
+        return members[0]
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/members/<int:member_id>/history')
+@response_cache.cached_json
+def get_member_history(member_id):
+    """Get the changes recorded for a member, crawl by crawl"""
+    try:
+        member = reader.session.get(ScrapedMember, member_id)
+        if member is None:
+            return jsonify({'error': 'Member not found'}), 404
+        versions = MemberHistory(reader.session).versions(member.member_key)
+        sessions = {session.id: session for session in
+                    reader.session.query(ScrapeSession).filter(ScrapeSession.id.in_({version.session_ref for version in versions})).all()}
+        
+        history = []
+        for version in versions:
+            version_data = version.to_dict()
+            session = sessions.get(version.session_ref)
+            version_data['session_id'] = session.session_id if session else None
+            version_data['session_start'] = session.start_time.isoformat() if session and session.start_time else None
+            history.append(version_data)
+        
+        return {
+            'member_id': member.id,
+            'member_key': member.member_key,
+            'history': history
+        }
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/sessions')
+@response_cache.cached_json
 def get_sessions():
     """Get all scraping sessions"""
     try:
-        sessions = ScrapeSession.query.order_by(ScrapeSession.start_time.desc()).all()
-        return jsonify([session.to_dict() for session in sessions])
+        sessions = reader.session.query(ScrapeSession).order_by(ScrapeSession.start_time.desc()).all()
+        profiled = {ref for (ref,) in reader.session.query(SessionProfile.session_ref)}
+        return [{**session.to_dict(), 'profiled': session.id in profiled} for session in sessions]
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/sessions/<session_id>')
+@response_cache.cached_json
 def get_session(session_id):
     """Get a specific scraping session"""
     try:
-        session = ScrapeSession.query.filter_by(session_id=session_id).first_or_404()
-        return jsonify(session.to_dict())
+        session = reader.session.query(ScrapeSession).filter_by(session_id=session_id).first()
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        return session.to_dict()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sessions/<session_id>/profile')
+def get_session_profile(session_id):
+    """Download the profiler report of a session: format=json (default), text or pstats"""
+    try:
+        profile = (reader.session.query(SessionProfile)
+                   .join(ScrapeSession, SessionProfile.session_ref == ScrapeSession.id)
+                   .filter(ScrapeSession.session_id == session_id)
+                   .first())
+        if profile is None:
+            return jsonify({'error': 'No profile for this session'}), 404
+        
+        report_format = request.args.get('format', 'json')
+        if report_format == 'json':
+            data, mimetype = profile.report.encode('utf-8'), 'application/json'
+        elif report_format == 'text':
+            data, mimetype = profile.stats_text.encode('utf-8'), 'text/plain'
+        elif report_format == 'pstats':
+            data, mimetype = profile.pstats_data, 'application/octet-stream'
+        else:
+            return jsonify({'error': 'format must be json, text or pstats'}), 400
+        
+        extension = 'txt' if report_format == 'text' else report_format
+        return send_file(io.BytesIO(data), mimetype=mimetype, as_attachment=True,
+                         download_name=f'profile_{session_id}.{extension}')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sessions/<from_session_id>/diff/<to_session_id>')
+@response_cache.cached_json
+def get_session_diff(from_session_id, to_session_id):
+    """Get the net member changes between two scraping sessions"""
+    try:
+        from_session = reader.session.query(ScrapeSession).filter_by(session_id=from_session_id).first()
+        to_session = reader.session.query(ScrapeSession).filter_by(session_id=to_session_id).first()
+        if from_session is None or to_session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        if from_session.id > to_session.id:
+            return jsonify({'error': 'The first session must be older than the second'}), 400
+        
+        change_type = request.args.get('type')
+        limit = min(request.args.get('limit', 1000, type=int), 10000)
+        offset = request.args.get('offset', 0, type=int)
+        
+        changes = MemberHistory(reader.session).diff(from_session.id, to_session.id)
+        summary = {'added': 0, 'changed': 0, 'removed': 0}
+        for change in changes:
+            summary[change['change_type']] += 1
+        if change_type:
+            changes = [change for change in changes if change['change_type'] == change_type]
+        
+        return {
+            'from_session': from_session.session_id,
+            'to_session': to_session.session_id,
+            'summary': summary,
+            'total': len(changes),
+            'changes': changes[offset:offset + limit]
+        }
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stats')
+@response_cache.cached_json
 def get_stats():
     """Get database statistics"""
     try:
-        total_members = ScrapedMember.query.count()
-        total_sessions = ScrapeSession.query.count()
-        completed_sessions = ScrapeSession.query.filter_by(status='completed').count()
-        failed_sessions = ScrapeSession.query.filter_by(status='failed').count()
+        sessions = reader.session.query(ScrapeSession)
+        total_members = reader.session.query(ScrapedMember).count()
+        total_sessions = sessions.count()
+        completed_sessions = sessions.filter_by(status='completed').count()
+        failed_sessions = sessions.filter_by(status='failed').count()
+        total_rejected = reader.session.query(db.func.sum(ScrapeSession.records_rejected)).scalar() or 0
         
-        latest_session = ScrapeSession.query.order_by(ScrapeSession.start_time.desc()).first()
+        latest_session = sessions.order_by(ScrapeSession.start_time.desc()).first()
         
-        return jsonify({
+        return {
             'total_members': total_members,
             'total_sessions': total_sessions,
             'completed_sessions': completed_sessions,
             'failed_sessions': failed_sessions,
+            'total_records_rejected': total_rejected,
             'latest_session': latest_session.to_dict() if latest_session else None
-        })
+        }
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -355,4 +434,5 @@ def database_view():
     return render_template('database.html')
 
 if __name__ == '__main__':
+    configure_logging()
     app.run(host='0.0.0.0', port=5000, debug=True)
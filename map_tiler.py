@@ -0,0 +1,237 @@
+import math
+import queue
+import logging
+import threading
+from scraper import MAP_JS_HELPERS
+from logging_setup import LogSampler
+
+logger = logging.getLogger(__name__)
+
+# Current viewport of the page's map
+MAP_VIEW_SCRIPT = MAP_JS_HELPERS + """
+const map = findMap();
+if (!map || !map.getBounds()) return null;
+const ne = map.getBounds().getNorthEast(), sw = map.getBounds().getSouthWest();
+return {zoom: map.getZoom(), north: ne.lat(), east: ne.lng(), south: sw.lat(), west: sw.lng()};
+"""
+
+def mercator_y(lat):
+    return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+def inverse_mercator_y(y):
+    return math.degrees(2 * math.atan(math.exp(y)) - math.pi / 2)
+
+def compute_tiles(view, levels):
+    """Split a viewport into 2^levels x 2^levels tiles, each one zoom level deeper per level
+
+    Tiles are spaced evenly in Mercator space, so each tile exactly fills the
+    browser viewport at its zoom.
+    """
+    split = 2 ** levels
+    zoom = view['zoom'] + levels
+    top, bottom = mercator_y(view['north']), mercator_y(view['south'])
+    west, east = view['west'], view['east']
+    if east < west:
+        east += 360
+
+    tiles = []
+    for row in range(split):
+        lat = inverse_mercator_y(top - (row + 0.5) * (top - bottom) / split)
+        for col in range(split):
+            lng = west + (col + 0.5) * (east - west) / split
+            if lng > 180:
+                lng -= 360
+            tiles.append({'index': len(tiles), 'lat': round(lat, 6), 'lng': round(lng, 6), 'zoom': zoom})
+    return tiles
+
+class TiledCrawler:
+    """Crawl map tiles across a pool of browser workers, deduping pins across tile borders"""
+
+    def __init__(self, scraper_factory, workers=2, tile_levels=1, validity_gate=None,
+                 on_progress=None, move_timeout=10, retry_queue=None, tile_attempts=2):
+        # Callable returning a new SuffolkMapScraper; each worker drives its own Firefox
+        self.scraper_factory = scraper_factory
+        self.workers = max(1, workers)
+        self.tile_levels = tile_levels
+        self.validity_gate = validity_gate
+        # Callable(stats) invoked after every pin and tile
+        self.on_progress = on_progress
+        self.move_timeout = move_timeout
+        # PinRetryQueue for pins that fail; they are retried after all tiles are done
+        self.retry_queue = retry_queue
+        # A tile whose crawl raises is requeued on a restarted browser up to this many attempts in all
+        self.tile_attempts = max(1, tile_attempts)
+
+        self.lock = threading.Lock()
+        self.seen_pins = set()
+        self.records = []
+        # Shared by all workers, so per-pin failures are sampled across the whole crawl
+        self.failed_log = LogSampler()
+        self.attempts = {}
+        self.stats = {'tiles': 0, 'tiles_done': 0, 'tiles_failed': 0, 'tiles_retried': 0, 'pins_seen': 0,
+                      'pins_extracted': 0, 'duplicate_pins': 0, 'workers': self.workers}
+
+    def start_scraper(self):
+        scraper = self.scraper_factory()
+        try:
+            scraper.setup_driver()
+            scraper.load_map_page()
+        except Exception:
+            scraper.cleanup()
+            raise
+        return scraper
+
+    def run(self):
+        """Crawl every tile and return the raw records that passed the validity gate"""
+        first_scraper = self.start_scraper()
+
+        try:
+            view = first_scraper.driver.execute_script(MAP_VIEW_SCRIPT)
+        except Exception:
+            first_scraper.cleanup()
+            raise
+        if view and self.tile_levels > 0:
+            tiles = compute_tiles(view, self.tile_levels)
+        else:
+            # Without a reachable map object only the default viewport can be crawled
+            logger.info('Map viewport unavailable or tiling disabled; crawling default viewport')
+            tiles = [None]
+
+        tile_queue = queue.Queue()
+        for tile in tiles:
+            tile_queue.put(tile)
+        self.stats['tiles'] = len(tiles)
+        logger.info('Crawling %s tiles with %s browser workers', len(tiles), self.workers)
+
+        threads = []
+        for worker_index in range(min(self.workers, len(tiles))):
+            scraper = first_scraper if worker_index == 0 else None
+            thread = threading.Thread(target=self.worker, args=(worker_index, scraper, tile_queue), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        # Tiles given up on, plus any left queued after every worker's browser failed
+        self.stats['tiles_failed'] = self.stats['tiles'] - self.stats['tiles_done']
+        if self.stats['tiles_failed']:
+            logger.error('%s of %s tiles were not crawled', self.stats['tiles_failed'], self.stats['tiles'])
+
+        if self.retry_queue:
+            # Progress reports keep the session's heartbeat fresh through the retry rounds
+            self.retry_queue.run(self.start_scraper, on_record=self.add_record,
+                                 on_progress=lambda attempt, done, total: self.report_progress())
+
+        logger.info('Tiled crawl finished: %s', self.stats)
+        return self.records
+
+    @property
+    def complete(self):
+        """True when every tile was crawled, so members not seen are really gone from the map"""
+        return self.stats['tiles'] > 0 and self.stats['tiles_done'] == self.stats['tiles']
+
+    def worker(self, worker_index, scraper, tile_queue):
+        try:
+            if scraper is None:
+                scraper = self.start_scraper()
+
+            while True:
+                try:
+                    tile = tile_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self.crawl_tile(scraper, tile)
+                except Exception as e:
+                    self.requeue_tile(worker_index, tile, tile_queue, e)
+                    # The browser may be what failed, so the next tile gets a fresh one
+                    self.retire_scraper(scraper)
+                    scraper = None
+                    scraper = self.start_scraper()
+                    continue
+                with self.lock:
+                    self.stats['tiles_done'] += 1
+                self.report_progress()
+        except Exception as e:
+            logger.error('Browser worker %s failed: %s', worker_index, e)
+        finally:
+            if scraper:
+                self.retire_scraper(scraper)
+
+    def requeue_tile(self, worker_index, tile, tile_queue, error):
+        """Put a failed tile back on the queue unless it has used up its attempts"""
+        key = tile['index'] if tile else 0
+        with self.lock:
+            self.attempts[key] = self.attempts.get(key, 0) + 1
+            retry = self.attempts[key] < self.tile_attempts
+            if retry:
+                self.stats['tiles_retried'] += 1
+        if retry:
+            logger.warning('Browser worker %s failed on tile %s, retrying it: %s', worker_index, key, error)
+            tile_queue.put(tile)
+        else:
+            logger.error('Browser worker %s gave up on tile %s after %s attempts: %s',
+                         worker_index, key, self.tile_attempts, error)
+
+    def retire_scraper(self, scraper):
+        """Fold a browser's pin handle counts into the stats and close it"""
+        with self.lock:
+            for name, count in scraper.handle_stats.items():
+                self.stats[f'pin_{name}'] = self.stats.get(f'pin_{name}', 0) + count
+        scraper.cleanup()
+
+    def crawl_tile(self, scraper, tile):
+        """Move to a tile, claim its unseen pins and extract them"""
+        if tile:
+            settled = scraper.move_map(tile['lat'], tile['lng'], tile['zoom'], self.move_timeout)
+            if not settled:
+                logger.debug('Tile %s did not report idle; crawling anyway', tile['index'])
+
+        handles = scraper.pin_handles()
+
+        claimed = []
+        with self.lock:
+            for handle in handles:
+                self.stats['pins_seen'] += 1
+                identity = handle.identity()
+                if identity and identity in self.seen_pins:
+                    self.stats['duplicate_pins'] += 1
+                    continue
+                if identity:
+                    self.seen_pins.add(identity)
+                claimed.append(handle)
+
+        pending = {id(handle): handle for handle in claimed}
+        try:
+            for handle, pin_data in scraper.extract_pins(claimed):
+                pending.pop(id(handle), None)
+                if isinstance(pin_data, Exception):
+                    if self.failed_log.sample():
+                        logger.warning('Error extracting pin in tile %s (%s failed so far): %s',
+                                       tile['index'] if tile else 0, self.failed_log.count, pin_data)
+                    if self.retry_queue:
+                        self.retry_queue.defer(pin_data, handle, tile)
+                    continue
+
+                self.add_record(pin_data)
+                self.report_progress()
+        except Exception:
+            # Unextracted pins are released so the tile's next attempt claims them again
+            with self.lock:
+                for handle in pending.values():
+                    self.stats['pins_seen'] -= 1
+                    self.seen_pins.discard(handle.identity())
+            raise
+
+    def add_record(self, pin_data):
+        with self.lock:
+            self.stats['pins_extracted'] += 1
+            if pin_data and (self.validity_gate is None or self.validity_gate.is_valid(pin_data)):
+                self.records.append(pin_data)
+
+    def report_progress(self):
+        if self.on_progress:
+            with self.lock:
+                stats = dict(self.stats)
+            self.on_progress(stats)
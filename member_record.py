@@ -0,0 +1,119 @@
+from operator import attrgetter
+from dataclasses import dataclass, fields
+
+# MemberRecord field (and ScrapedMember attribute) -> CSV column; the only place the two are paired
+MEMBER_CSV_FIELDS = [
+    ('business_name', 'Business Name'),
+    ('owner1', 'Owner1'),
+    ('owner2', 'Owner2'),
+    ('phone_primary', 'Phone_primary'),
+    ('phone_cell', 'Phone_cell'),
+    ('phone_office', 'Phone_office'),
+    ('phone_other', 'Phone_other'),
+    ('address_line1', 'Address_Line1'),
+    ('address_line2', 'Address_Line2'),
+    ('city', 'City'),
+    ('state_province_region', 'State / Province / Region'),
+    ('zip_postal_code', 'Zip / Postal Code'),
+    ('country', 'Country'),
+    ('email1', 'Email1'),
+    ('email2', 'Email2'),
+    ('website', 'Website'),
+    ('business_type', 'Business Type'),
+    ('species', 'Species'),
+    ('breeds', 'Breed(s)'),
+    ('social_network1', 'Social Network1'),
+    ('social_network2', 'Social Network 2'),
+    ('social_network3', 'Social Network 3'),
+    ('last_updated', 'Last Updated'),
+    ('about', 'About'),
+    ('notes', 'Notes'),
+    ('data_source', 'Data Source'),
+    ('data_source_url', 'Data Source URL'),
+    ('date_scraped', 'Date Scraped'),
+    ('latitude', 'Latitude'),
+    ('longitude', 'Longitude'),
+]
+
+# Coordinates are stored in the database but are not part of the CSV layout
+CSV_FIELDS = [(field, column) for field, column in MEMBER_CSV_FIELDS if field not in ('latitude', 'longitude')]
+CSV_COLUMNS = [column for _, column in CSV_FIELDS]
+
+# Keys of the dict records used before MemberRecord: CSV columns, plus the parser's own state/zip names
+FIELD_ALIASES = {column: field for field, column in MEMBER_CSV_FIELDS}
+FIELD_ALIASES.update({'state': 'state_province_region', 'zip_code': 'zip_postal_code'})
+
+@dataclass(slots=True)
+class MemberRecord:
+    """One member from popup parsing through cleaning, deduplication, the database and exports
+
+    Fields are named after the ScrapedMember columns. Slots keep a record
+    to a fixed, small footprint and make a misspelt field an error instead
+    of a silently added key.
+    """
+    business_name: str = ''
+    owner1: str = ''
+    owner2: str = ''
+    phone_primary: str = ''
+    phone_cell: str = ''
+    phone_office: str = ''
+    phone_other: str = ''
+    address_line1: str = ''
+    address_line2: str = ''
+    city: str = ''
+    state_province_region: str = ''
+    zip_postal_code: str = ''
+    country: str = ''
+    email1: str = ''
+    email2: str = ''
+    website: str = ''
+    business_type: str = ''
+    species: str = ''
+    breeds: str = ''
+    social_network1: str = ''
+    social_network2: str = ''
+    social_network3: str = ''
+    last_updated: str = ''
+    about: str = ''
+    notes: str = ''
+    data_source: str = ''
+    data_source_url: str = ''
+    date_scraped: str = ''
+    latitude: float | None = None
+    longitude: float | None = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a dict keyed by field names, CSV columns or the old raw keys"""
+        record = cls()
+        for key, value in data.items():
+            field = key if key in FIELD_NAMES else FIELD_ALIASES.get(key)
+            if field:
+                setattr(record, field, value)
+        return record
+
+    def values(self):
+        """Field values in field order"""
+        return ALL_FIELDS(self)
+
+    def to_dict(self):
+        """Field name -> value, i.e. ScrapedMember keyword arguments"""
+        return dict(zip(FIELD_NAMES, ALL_FIELDS(self)))
+
+    def csv_row(self):
+        """Values in CSV column order"""
+        return CSV_VALUES(self)
+
+    def fill_missing(self, other):
+        """Copy other's values into the fields this record leaves empty"""
+        for field in FIELD_NAMES:
+            if not getattr(self, field):
+                value = getattr(other, field)
+                if value:
+                    setattr(self, field, value)
+        return self
+
+FIELD_NAMES = tuple(field.name for field in fields(MemberRecord))
+# Field getters returning a tuple in one C call
+ALL_FIELDS = attrgetter(*FIELD_NAMES)
+CSV_VALUES = attrgetter(*(field for field, _ in CSV_FIELDS))
@@ -0,0 +1,85 @@
+import gc
+import logging
+import threading
+import psutil
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+class MemoryWatchdog:
+    """Sample browser and Python process memory during a crawl and flag browsers to recycle
+
+    Firefox grows with every popup it opens, and restarting it is the only way
+    to get that memory back. Scrapers call check() every check_every pins; when
+    their browser (geckodriver plus every Firefox process under it) is over
+    browser_limit_mb they checkpoint and restart it. Restarting a browser
+    cannot shrink this process, so going over process_limit_mb only triggers a
+    garbage collection and a warning. A limit of 0 disables that check.
+    """
+
+    def __init__(self, browser_limit_mb=1500, process_limit_mb=1024, check_every=25, on_checkpoint=None):
+        self.browser_limit_mb = browser_limit_mb
+        self.process_limit_mb = process_limit_mb
+        self.check_every = max(1, check_every)
+        # Callable(stats) run before a browser restart, e.g. to save progress
+        self.on_checkpoint = on_checkpoint
+        self.process = psutil.Process()
+        self.lock = threading.Lock()
+        self.stats = {'samples': 0, 'browser_mb': None, 'process_mb': None, 'peak_browser_mb': 0,
+                      'peak_process_mb': 0, 'browser_restarts': 0, 'restart_failures': 0, 'process_over_limit': 0}
+
+    def browser_rss(self, driver):
+        """Resident memory in bytes of a WebDriver's driver process and all its children"""
+        try:
+            root = psutil.Process(driver.service.process.pid)
+        except (AttributeError, psutil.Error):
+            return 0
+
+        total = 0
+        for process in [root] + root.children(recursive=True):
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                # Content processes come and go while the page runs
+                continue
+        return total
+
+    def check(self, scraper):
+        """Sample memory; True when the scraper's browser should be restarted"""
+        browser_mb = round(self.browser_rss(scraper.driver) / MB, 1) if scraper.driver else 0
+        process_mb = round(self.process.memory_info().rss / MB, 1)
+
+        with self.lock:
+            self.stats['samples'] += 1
+            self.stats['browser_mb'] = browser_mb
+            self.stats['process_mb'] = process_mb
+            self.stats['peak_browser_mb'] = max(self.stats['peak_browser_mb'], browser_mb)
+            self.stats['peak_process_mb'] = max(self.stats['peak_process_mb'], process_mb)
+
+        if self.process_limit_mb and process_mb > self.process_limit_mb:
+            with self.lock:
+                self.stats['process_over_limit'] += 1
+            gc.collect()
+            logger.warning('Scraper process at %s MB, over its %s MB limit', process_mb, self.process_limit_mb)
+
+        if self.browser_limit_mb and browser_mb > self.browser_limit_mb:
+            logger.info('Browser at %s MB, over its %s MB limit; restarting it', browser_mb, self.browser_limit_mb)
+            return True
+        return False
+
+    def checkpoint(self):
+        """Count a browser restart and hand the current stats to on_checkpoint"""
+        with self.lock:
+            self.stats['browser_restarts'] += 1
+        if self.on_checkpoint:
+            self.on_checkpoint(self.snapshot())
+
+    def restart_failed(self):
+        """Count a browser restart that did not come back up"""
+        with self.lock:
+            self.stats['restart_failures'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats)
@@ -1,9 +1,12 @@
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, Index, ForeignKey, LargeBinary, update
+from member_record import MEMBER_CSV_FIELDS
 
 db = SQLAlchemy()
 
+
 class ScrapedMember(db.Model):
     """Model for storing scraped member data"""
     __tablename__ = 'scraped_members'
@@ -37,11 +40,24 @@ class ScrapedMember(db.Model):
     data_source = Column(String(100))
     data_source_url = Column(String(255))
     date_scraped = Column(String(50))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    
+    # Stable identity across crawls (see RecordDeduplicator.member_key)
+    member_key = Column(String(40), unique=True, index=True)
+    # scrape_sessions.id of the last crawl that saw this member, and of the crawl that found it gone
+    last_session_ref = Column(Integer, ForeignKey('scrape_sessions.id'))
+    removed_session_ref = Column(Integer, ForeignKey('scrape_sessions.id'))
     
     # Additional metadata fields
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Spatial R*Tree/GiST indexes are created by geo_index.SpatialIndex
+    __table_args__ = (
+        Index('ix_scraped_members_lat_lng', 'latitude', 'longitude'),
+    )
+    
     def __repr__(self):
         return f'<ScrapedMember {self.business_name}>'
     
@@ -77,6 +93,10 @@ class ScrapedMember(db.Model):
             'data_source': self.data_source,
             'data_source_url': self.data_source_url,
             'date_scraped': self.date_scraped,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'member_key': self.member_key,
+            'removed_session_ref': self.removed_session_ref,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -89,16 +109,111 @@ class ScrapeSession(db.Model):
     session_id = Column(String(100), unique=True, nullable=False)
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime)
-    status = Column(String(50))  # 'running', 'completed', 'failed'
+    status = Column(String(50))  # 'queued', 'running', 'completed', 'failed'
     total_pins_found = Column(Integer, default=0)
     records_scraped = Column(Integer, default=0)
     records_saved = Column(Integer, default=0)
+    duplicates_merged = Column(Integer, default=0)
+    records_rejected = Column(Integer, default=0)
+    rejection_reasons = Column(Text)  # JSON object of rejection reason -> count
+    fetch_mode = Column(String(20))  # 'http' or 'browser'
+    members_added = Column(Integer, default=0)
+    members_changed = Column(Integer, default=0)
+    members_removed = Column(Integer, default=0)
     error_message = Column(Text)
     csv_filename = Column(String(255))
     
+    # Browser pins that failed the first pass, and how the end-of-run retries fared
+    pins_retried = Column(Integer, default=0)
+    pins_recovered = Column(Integer, default=0)
+    pins_failed = Column(Integer, default=0)
+    pin_failures = Column(Text)  # JSON object of failure class -> {failures, retries, recovered, lost}
+    
+    # Live progress, written by whichever process runs the session
+    progress = Column(Integer, default=0)
+    current_pin = Column(Integer, default=0)
+    message = Column(Text)
+    run_stats = Column(Text)  # JSON object of tile, address, change and rate-control stats
+    heartbeat_at = Column(DateTime)
+    
+    # What started the session: 'manual', 'schedule', 'cli' or 'import', and the site profile it ran with
+    trigger = Column(String(20), default='manual')
+    profile = Column(String(50))
+    scheduled_for = Column(DateTime)
+    options = Column(Text)  # JSON object of app.config overrides for this run
+    
+    __table_args__ = (
+        Index('ix_scrape_sessions_profile_scheduled', 'profile', 'scheduled_for'),
+    )
+    
     def __repr__(self):
         return f'<ScrapeSession {self.session_id}>'
     
+    @classmethod
+    def find_active(cls, stale_after, session=None):
+        """The queued or running session, ignoring runs whose process stopped sending heartbeats
+
+        A queued session counts for stale_after seconds after it was queued;
+        one no process has picked up by then (no worker running, or a thread
+        that died before starting it) would otherwise block new runs forever.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=stale_after)
+        sessions = ((session or db.session).query(cls)
+                    .filter(cls.status.in_(('queued', 'running')))
+                    .order_by(cls.id.desc())
+                    .all())
+        for scrape_session in sessions:
+            if scrape_session.status == 'queued':
+                if scrape_session.start_time is None or scrape_session.start_time >= stale_before:
+                    return scrape_session
+            elif scrape_session.heartbeat_at and scrape_session.heartbeat_at >= stale_before:
+                return scrape_session
+        return None
+    
+    @classmethod
+    def expire_queued(cls, stale_after):
+        """Fail queued sessions nothing picked up within stale_after seconds; returns how many"""
+        stale_before = datetime.utcnow() - timedelta(seconds=stale_after)
+        result = db.session.execute(
+            update(cls)
+            .where(cls.status == 'queued', cls.start_time < stale_before)
+            .values(status='failed', end_time=datetime.utcnow(),
+                    error_message='No scrape worker picked up the session')
+        )
+        db.session.commit()
+        return result.rowcount
+    
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+    
+    def to_status(self):
+        """Progress in the shape polled by the scraping page"""
+        run_stats = json.loads(self.run_stats) if self.run_stats else {}
+        return {
+            'running': self.active,
+            'progress': self.progress or 0,
+            'total_pins': self.total_pins_found or 0,
+            'current_pin': self.current_pin or 0,
+            'message': self.message,
+            'completed': self.status == 'completed',
+            'error': self.error_message,
+            'csv_file': self.csv_filename,
+            'session_id': self.session_id,
+            'status': self.status,
+            'records_saved': self.records_saved or 0,
+            'duplicates_merged': self.duplicates_merged or 0,
+            'records_rejected': self.records_rejected or 0,
+            'rejection_reasons': json.loads(self.rejection_reasons) if self.rejection_reasons else {},
+            'fetch_mode': self.fetch_mode,
+            'pins_retried': self.pins_retried or 0,
+            'pins_recovered': self.pins_recovered or 0,
+            'pins_failed': self.pins_failed or 0,
+            'pin_failures': json.loads(self.pin_failures) if self.pin_failures else {},
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            **run_stats
+        }
+    
     def to_dict(self):
         """Convert model to dictionary for JSON serialization"""
         return {
@@ -110,6 +225,87 @@ class ScrapeSession(db.Model):
             'total_pins_found': self.total_pins_found,
             'records_scraped': self.records_scraped,
             'records_saved': self.records_saved,
+            'duplicates_merged': self.duplicates_merged,
+            'records_rejected': self.records_rejected,
+            'rejection_reasons': json.loads(self.rejection_reasons) if self.rejection_reasons else {},
+            'fetch_mode': self.fetch_mode,
+            'members_added': self.members_added,
+            'members_changed': self.members_changed,
+            'members_removed': self.members_removed,
+            'pins_retried': self.pins_retried,
+            'pins_recovered': self.pins_recovered,
+            'pins_failed': self.pins_failed,
+            'pin_failures': json.loads(self.pin_failures) if self.pin_failures else {},
             'error_message': self.error_message,
-            'csv_filename': self.csv_filename
-        }
\ No newline at end of file
+            'csv_filename': self.csv_filename,
+            'trigger': self.trigger,
+            'profile': self.profile,
+            'scheduled_for': self.scheduled_for.isoformat() if self.scheduled_for else None
+        }
+
+class DataVersion(db.Model):
+    """Single-row counter bumped whenever scraped data changes, so every process can invalidate its caches"""
+    __tablename__ = 'data_version'
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    
+    @classmethod
+    def current(cls, session=None):
+        row = (session or db.session).get(cls, 1)
+        return row.version if row else 0
+    
+    @classmethod
+    def bump(cls):
+        """Increment the version in its own commit"""
+        result = db.session.execute(update(cls).where(cls.id == 1).values(version=cls.version + 1))
+        if not result.rowcount:
+            db.session.add(cls(id=1, version=1))
+        db.session.commit()
+
+class MemberVersion(db.Model):
+    """Fields of one member that changed in one crawl"""
+    __tablename__ = 'member_versions'
+    
+    id = Column(Integer, primary_key=True)
+    member_key = Column(String(40), nullable=False)
+    member_id = Column(Integer)
+    session_ref = Column(Integer, ForeignKey('scrape_sessions.id'), nullable=False)
+    change_type = Column(String(20))  # 'added', 'changed', 'removed', 'restored'
+    changes = Column(Text)  # JSON object of field -> [old, new]
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Session diffs scan a session range; member history scans one key
+    __table_args__ = (
+        Index('ix_member_versions_session_key', 'session_ref', 'member_key'),
+        Index('ix_member_versions_key_session', 'member_key', 'session_ref'),
+    )
+    
+    def __repr__(self):
+        return f'<MemberVersion {self.member_key} {self.change_type}>'
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'member_key': self.member_key,
+            'member_id': self.member_id,
+            'session_ref': self.session_ref,
+            'change_type': self.change_type,
+            'changes': json.loads(self.changes) if self.changes else {},
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class SessionProfile(db.Model):
+    """Profiler report of a scrape session run with profiling on"""
+    __tablename__ = 'session_profiles'
+    
+    id = Column(Integer, primary_key=True)
+    session_ref = Column(Integer, ForeignKey('scrape_sessions.id'), unique=True, nullable=False)
+    report = Column(Text)  # JSON object: wall time, top functions and WebDriver command stats
+    stats_text = Column(Text)  # pstats listing by cumulative time
+    pstats_data = Column(LargeBinary)  # raw cProfile stats, loadable with pstats or snakeviz
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SessionProfile {self.session_ref}>'
@@ -0,0 +1,306 @@
+import os
+import sys
+import csv
+import glob
+import html
+import json
+import time
+import atexit
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from datetime import datetime
+
+DEFAULT_BASELINE_FILE = 'perf_baseline.json'
+# Changes to these files should come with a performance verdict
+WATCHED_FILES = ['scraper.py', 'data_cleaner.py', 'models.py']
+FIXTURE_URL = 'https://suffolk.digitalovine.com/modules.php?op=modload&name=_custom_maps&file=members#the-map'
+
+# Metric -> (label, unit, True when higher is better)
+METRICS = {
+    'pins_per_second': ('HTTP map fetch', 'pins/s', True),
+    'parse_records_per_second': ('Popup parsing', 'records/s', True),
+    'clean_records_per_second': ('Cleaning', 'records/s', True),
+    'db_insert_rows_per_second': ('Database save', 'rows/s', True),
+    'export_mb_per_second': ('CSV export', 'MB/s', True),
+    'peak_rss_mb': ('Peak RSS', 'MB', False),
+}
+
+def fixture_rows(pattern, copies):
+    """Member rows of the committed CSV exports, repeated `copies` times with distinct names"""
+    rows = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows.extend(row for row in csv.DictReader(f) if row.get('Business Name'))
+    if not rows:
+        raise SystemExit(f'No fixture rows found in {pattern}')
+
+    copied = []
+    for copy in range(copies):
+        for row in rows:
+            row = dict(row)
+            if copy:
+                # Distinct names keep every copy a separate member when saving
+                row['Business Name'] = f"{row['Business Name']} {copy + 1}"
+            copied.append(row)
+    return copied
+
+def popup_html(row):
+    """Info window markup like the map's, built from an exported row"""
+    lines = [row['Business Name'], row.get('Owner1'), row.get('Owner2'), row.get('Address_Line1'),
+             row.get('Address_Line2'), row.get('Phone_primary'), row.get('Email1')]
+    body = '<br>'.join(html.escape(line) for line in lines if line)
+    link = row.get('Website') or ''
+    if link:
+        body += f'<br><a href="{html.escape(link)}" target="_blank">View on Google Maps</a>'
+    return f'<div class="gm-style-iw"><div class="member-popup">{body}</div></div>'
+
+def fixture_page(rows):
+    """Offline stand-in for the map page: one marker and info window per row in an inline script"""
+    from scraper import MAPS_LINK_COORDINATES
+
+    markers = []
+    for index, row in enumerate(rows):
+        match = MAPS_LINK_COORDINATES.search(row.get('Website') or '')
+        lat, lng = (match.group(1), match.group(2)) if match else (40 + index % 100 / 100, -100 - index % 100 / 100)
+        markers.append(
+            f'var marker{index} = new google.maps.Marker({{map: map, position: new google.maps.LatLng({lat}, {lng})}});\n'
+            f'var info{index} = new google.maps.InfoWindow({{content: {json.dumps(popup_html(row))}}});\n'
+        )
+    return ('<html><head><title>Members Map</title></head><body><div id="the-map"></div>\n'
+            '<script>\nvar map = new google.maps.Map(document.getElementById("the-map"));\n'
+            + ''.join(markers) + '</script></body></html>')
+
+# Stages faster than this are run repeatedly until they add up to it, as timeit's autorange does
+MIN_STAGE_SECONDS = 0.5
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+def autoranged(function):
+    """(result of the first call, mean seconds per call) over at least MIN_STAGE_SECONDS"""
+    result, elapsed = timed(function)
+    calls = 1
+    while elapsed < MIN_STAGE_SECONDS:
+        elapsed += timed(function)[1]
+        calls += 1
+    return result, elapsed / calls
+
+def measure_once(page, repeat):
+    """One pass over every stage; returns (metric -> value, row count)"""
+    import httpx
+    from bs4 import BeautifulSoup
+    from scraper import SuffolkMapScraper
+    from http_fetcher import HttpMapFetcher
+    from data_cleaner import DataCleaner
+    from deduplicator import RecordDeduplicator
+    from change_tracking import MemberChangeTracker
+    from main import app
+    from models import db, ScrapedMember, ScrapeSession, MemberVersion
+
+    parser = SuffolkMapScraper()
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=page))
+    fetcher = HttpMapFetcher(FIXTURE_URL, parser.parse_popup_content, transport=transport)
+    records, fetch_seconds = timed(fetcher.fetch)
+    metrics = {'pins_per_second': fetcher.stats['markers'] / fetch_seconds}
+
+    markers = fetcher.extract_markers(page)
+    popups = [(BeautifulSoup(marker['html'], 'html.parser').get_text('\n'), marker['html']) for marker in markers]
+    _, parse_seconds = timed(lambda: [parser.parse_popup_content(text, markup) for text, markup in popups])
+    metrics['parse_records_per_second'] = len(popups) / parse_seconds
+
+    cleaner = DataCleaner()
+    cleaned, clean_seconds = autoranged(lambda: [cleaner.clean_record(record) for record in records])
+    metrics['clean_records_per_second'] = len(cleaned) / clean_seconds
+
+    with app.app_context():
+        MemberVersion.query.delete()
+        ScrapedMember.query.delete()
+        session = ScrapeSession(session_id=f'perf-baseline-{repeat}-{time.time()}', status='running', trigger='cli')
+        db.session.add(session)
+        db.session.commit()
+        tracker = MemberChangeTracker(session.id, RecordDeduplicator().member_key)
+        saved, save_seconds = timed(lambda: tracker.save(cleaned))
+    metrics['db_insert_rows_per_second'] = saved / save_seconds
+
+    with tempfile.TemporaryDirectory(prefix='perf_baseline_') as scratch_dir:
+        filename = os.path.join(scratch_dir, 'export.csv')
+        _, export_seconds = autoranged(lambda: cleaner.export_to_csv(cleaned, filename))
+        metrics['export_mb_per_second'] = os.path.getsize(filename) / 1024 / 1024 / export_seconds
+
+    return metrics, len(records)
+
+def measure(csv_pattern='suffolk_members_*.csv', copies=2, repeats=3, fixture=None):
+    """Best of `repeats` runs of every stage against the offline fixture, plus peak RSS"""
+    # The app reads its database URL at import, so a throwaway database is set first
+    scratch_dir = tempfile.mkdtemp(prefix='perf_baseline_db_')
+    atexit.register(shutil.rmtree, scratch_dir, ignore_errors=True)
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(scratch_dir, "perf.db")}'
+    from main import init_schema
+    from logging_setup import configure_logging
+
+    configure_logging('WARNING', log_file='')
+    init_schema()
+
+    if fixture:
+        with open(fixture, encoding='utf-8') as f:
+            page = f.read()
+    else:
+        page = fixture_page(fixture_rows(csv_pattern, copies))
+
+    best = {}
+    for repeat in range(repeats):
+        metrics, records = measure_once(page, repeat)
+        for name, value in metrics.items():
+            best[name] = max(best.get(name, 0), value)
+
+    best = {name: round(value, 2) for name, value in best.items()}
+    best['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return {'metrics': best, 'records': records, 'fixture': fixture or csv_pattern, 'copies': copies}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def watched_changes(since):
+    """Watched files changed since a git ref, including uncommitted changes"""
+    output = subprocess.run(['git', 'diff', '--name-only', since, '--', *WATCHED_FILES],
+                            capture_output=True, text=True, check=True).stdout
+    return [line for line in output.splitlines() if line]
+
+# A baseline measured over a different workload cannot be compared against at all;
+# one from another interpreter or machine can, but its numbers are only indicative
+WORKLOAD_KEYS = ['records', 'copies', 'fixture']
+ENVIRONMENT_KEYS = ['python', 'platform']
+
+def mismatches(baseline, current, keys):
+    """(key, baseline value, current value) for each key whose value differs"""
+    return [(key, baseline.get(key), current.get(key)) for key in keys if baseline.get(key) != current.get(key)]
+
+def compare(baseline, current, threshold):
+    """Per-metric verdicts; a metric regresses when it is more than threshold percent worse"""
+    rows = []
+    for name, (label, unit, higher_is_better) in METRICS.items():
+        before = baseline['metrics'].get(name)
+        after = current['metrics'].get(name)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            verdict = 'regression'
+        elif -worse > threshold:
+            verdict = 'improvement'
+        else:
+            verdict = 'ok'
+        rows.append({'metric': name, 'label': label, 'unit': unit, 'baseline': before, 'current': after,
+                     'change_pct': round(change, 1), 'verdict': verdict})
+    return rows
+
+def markdown_report(rows, baseline, current, threshold):
+    regressions = [row for row in rows if row['verdict'] == 'regression']
+    lines = [
+        '# Performance comparison',
+        '',
+        f"Baseline: commit {baseline.get('commit') or 'unknown'}, recorded {baseline.get('recorded_at', 'unknown')} "
+        f"on {baseline.get('platform', 'unknown')}  ",
+        f"Current: commit {current.get('commit') or 'unknown'}, {current['records']} records, "
+        f"threshold {threshold:g}%",
+        '',
+        '| Metric | Baseline | Current | Change | Verdict |',
+        '|---|---:|---:|---:|---|',
+    ]
+    for row in rows:
+        lines.append(f"| {row['label']} ({row['unit']}) | {row['baseline']:g} | {row['current']:g} | "
+                     f"{row['change_pct']:+.1f}% | {row['verdict']} |")
+    lines += ['', f"**{len(regressions)} regression(s)**" if regressions else '**No regressions**', '']
+    return '\n'.join(lines)
+
+def html_report(rows, baseline, current, threshold):
+    colors = {'regression': '#f8d7da', 'improvement': '#d1e7dd', 'ok': '#ffffff'}
+    body = ''.join(
+        f"<tr style=\"background:{colors[row['verdict']]}\"><td>{html.escape(row['label'])} ({row['unit']})</td>"
+        f"<td>{row['baseline']:g}</td><td>{row['current']:g}</td><td>{row['change_pct']:+.1f}%</td>"
+        f"<td>{row['verdict']}</td></tr>"
+        for row in rows
+    )
+    regressions = sum(1 for row in rows if row['verdict'] == 'regression')
+    return (
+        '<!DOCTYPE html><html><head><meta charset="UTF-8"><title>Performance comparison</title></head><body>'
+        '<h1>Performance comparison</h1>'
+        f"<p>Baseline: commit {html.escape(str(baseline.get('commit') or 'unknown'))}, "
+        f"recorded {html.escape(str(baseline.get('recorded_at', 'unknown')))}<br>"
+        f"Current: commit {html.escape(str(current.get('commit') or 'unknown'))}, {current['records']} records, "
+        f"threshold {threshold:g}%</p>"
+        '<table border="1" cellpadding="4" cellspacing="0"><tr><th>Metric</th><th>Baseline</th><th>Current</th>'
+        f'<th>Change</th><th>Verdict</th></tr>{body}</table>'
+        f"<p><strong>{f'{regressions} regression(s)' if regressions else 'No regressions'}</strong></p>"
+        '</body></html>\n'
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Record and compare scraper throughput against a stored baseline')
+    parser.add_argument('command', choices=['measure', 'record', 'compare'],
+                        help='measure prints metrics, record stores them as the baseline, '
+                             'compare checks them against the baseline')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_FILE, help='baseline file')
+    parser.add_argument('--csv', default='suffolk_members_*.csv', help='exported CSV files the fixture is built from')
+    parser.add_argument('--fixture', default=None, help='saved map page HTML to use instead of the generated fixture')
+    parser.add_argument('--copies', type=int, default=2, help='times the CSV rows are repeated in the fixture')
+    parser.add_argument('--repeats', type=int, default=3, help='runs per stage; the best one counts')
+    parser.add_argument('--threshold', type=float, default=float(os.environ.get('PERF_THRESHOLD_PCT', '20')),
+                        help='percent a metric may worsen before it counts as a regression')
+    parser.add_argument('--report', default=None, help='write the comparison to this .md or .html file')
+    parser.add_argument('--since', default=None,
+                        help=f'only compare when {", ".join(WATCHED_FILES)} changed since this git ref')
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if args.since:
+        changed = watched_changes(args.since)
+        if not changed:
+            print(f'No changes to {", ".join(WATCHED_FILES)} since {args.since}; nothing to compare')
+            sys.exit(0)
+        print(f'Changed since {args.since}: {", ".join(changed)}')
+
+    result = measure(args.csv, args.copies, args.repeats, args.fixture)
+    result.update({'commit': git_commit(), 'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                   'python': platform.python_version(), 'platform': platform.platform()})
+    for name, (label, unit, _) in METRICS.items():
+        print(f"{label}: {result['metrics'][name]:g} {unit}")
+
+    if args.command == 'record':
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(result, indent=2) + '\n')
+        print(f'Baseline written to {args.baseline}')
+    elif args.command == 'compare':
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        workload = mismatches(baseline, result, WORKLOAD_KEYS)
+        if workload:
+            for key, before, after in workload:
+                print(f'{key}: baseline {before}, current {after}')
+            print(f'ERROR: the baseline was measured over a different workload; '
+                  f'record a new one or rerun with the baseline\'s --csv/--fixture/--copies')
+            sys.exit(2)
+        for key, before, after in mismatches(baseline, result, ENVIRONMENT_KEYS):
+            print(f'WARNING: baseline {key} {before}, current {after}; the comparison is only indicative')
+        rows = compare(baseline, result, args.threshold)
+        report = markdown_report(rows, baseline, result, args.threshold)
+        print()
+        print(report)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                f.write(html_report(rows, baseline, result, args.threshold) if args.report.endswith('.html')
+                        else report)
+        if any(row['verdict'] == 'regression' for row in rows):
+            print(f'FAIL: metrics regressed more than {args.threshold:g}%')
+            sys.exit(1)
@@ -0,0 +1,134 @@
+import time
+import logging
+import threading
+from scraper import PIN_FAILURE_REASONS, PinHandle, PinExtractionError, classify_failure
+
+logger = logging.getLogger(__name__)
+
+class PinRetryQueue:
+    """Pins that failed during a crawl, retried at the end of the run on a fresh browser
+
+    Deferring keeps flaky pins from slowing the main pass. Each retry round
+    starts a new browser after an exponential backoff, resolves the pins'
+    handles again (by fingerprint, or by index when a pin has none) and
+    extracts them once more.
+    Pins still failing after max_attempts rounds are counted as lost.
+    """
+
+    def __init__(self, max_attempts=2, backoff_seconds=2.0, backoff_factor=2.0, move_timeout=10):
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_factor = backoff_factor
+        self.move_timeout = move_timeout
+        self.pending = []
+        self.lock = threading.Lock()
+        # Per first-pass failure class: pins failed, retry attempts, pins recovered and pins lost
+        self.stats = {reason: {'failures': 0, 'retries': 0, 'recovered': 0, 'lost': 0}
+                      for reason in PIN_FAILURE_REASONS}
+        self.deferred = 0
+
+    def defer(self, error, handle, tile=None):
+        """Queue the pin behind handle, whose extraction raised error; tile is where it was found"""
+        reason = classify_failure(error)
+        with self.lock:
+            self.stats[reason]['failures'] += 1
+            self.deferred += 1
+            self.pending.append({'reason': reason, 'last_reason': reason, 'index': handle.index,
+                                 'fingerprint': handle.fingerprint, 'occurrence': handle.occurrence,
+                                 'tile': tile, 'selectors': handle.selectors})
+        logger.debug('Deferred pin %s (%s): %s', handle.index, reason, error)
+
+    def totals(self):
+        """Pins deferred, recovered by a retry and lost for good"""
+        return {
+            'retried': self.deferred,
+            'recovered': sum(counts['recovered'] for counts in self.stats.values()),
+            'lost': sum(counts['lost'] for counts in self.stats.values()),
+        }
+
+    def failure_counts(self):
+        """Stats of the failure classes that occurred"""
+        return {reason: dict(counts) for reason, counts in self.stats.items() if counts['failures']}
+
+    def run(self, start_scraper, on_record=None, on_progress=None):
+        """Retry every deferred pin; returns the records recovered
+
+        start_scraper returns a new SuffolkMapScraper with its map page loaded.
+        on_progress(round, pins_done, pins_in_round) is called as each round
+        starts and before each pin, so a long retry phase can keep its
+        session's heartbeat fresh.
+        """
+        records = []
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.pending:
+                break
+            if on_progress:
+                on_progress(attempt, 0, len(self.pending))
+            delay = self.backoff_seconds * self.backoff_factor ** (attempt - 1)
+            logger.info('Retrying %s failed pins in %.1fs (round %s of %s)', len(self.pending), delay, attempt, self.max_attempts)
+            time.sleep(delay)
+
+            entries, self.pending = self.pending, []
+            for entry in entries:
+                entry['done'] = False
+            scraper = None
+            try:
+                scraper = start_scraper()
+                records.extend(self.retry_round(scraper, entries, on_record, on_progress, attempt))
+            except Exception as e:
+                # The browser itself failed: entries this round did not get to stay queued
+                logger.error('Pin retry round %s failed: %s', attempt, e)
+                self.pending.extend(entry for entry in entries if not entry.get('done'))
+            finally:
+                if scraper:
+                    scraper.cleanup()
+
+        for entry in self.pending:
+            self.stats[entry['reason']]['lost'] += 1
+        if self.pending:
+            last_reasons = sorted({entry['last_reason'] for entry in self.pending})
+            logger.warning('%s pins still failing after %s retry rounds (%s)',
+                           len(self.pending), self.max_attempts, ', '.join(last_reasons))
+        self.pending = []
+
+        logger.info('Pin retries finished: %s', self.totals())
+        return records
+
+    def retry_round(self, scraper, entries, on_record, on_progress=None, attempt=1):
+        records = []
+        done = 0
+        # Pins are found again tile by tile, so each tile's view is loaded once
+        by_tile = {}
+        for entry in entries:
+            tile = entry['tile']
+            by_tile.setdefault(tile['index'] if tile else None, []).append(entry)
+
+        for tile_entries in by_tile.values():
+            tile = tile_entries[0]['tile']
+            if tile:
+                scraper.move_map(tile['lat'], tile['lng'], tile['zoom'], self.move_timeout)
+            handles = [PinHandle(entry['index'], entry['fingerprint'], selectors=entry['selectors'],
+                                 occurrence=entry['occurrence'])
+                       for entry in tile_entries]
+            scraper.resolve_pins(handles)
+
+            for position, (entry, handle) in enumerate(zip(tile_entries, handles)):
+                if on_progress:
+                    on_progress(attempt, done, len(entries))
+                done += 1
+                self.stats[entry['reason']]['retries'] += 1
+                entry['done'] = True
+                try:
+                    if handle.element is None:
+                        raise PinExtractionError('stale_element', 'Pin not found again on the reloaded map')
+                    data = scraper.extract_handle(handle, handles[position:])
+                except Exception as e:
+                    entry['last_reason'] = classify_failure(e)
+                    self.pending.append(entry)
+                    continue
+
+                self.stats[entry['reason']]['recovered'] += 1
+                records.append(data)
+                if on_record:
+                    on_record(data)
+        return records
@@ -0,0 +1,491 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from data_cleaner import DataCleaner
+from deduplicator import RecordDeduplicator
+from address_normalizer import AddressNormalizer
+from record_filter import RecordValidityGate
+from rate_control import RateController
+from change_tracking import MemberChangeTracker
+from models import db, ScrapeSession, SessionProfile, DataVersion
+from logging_setup import LogSampler
+
+logger = logging.getLogger(__name__)
+
+# Live status keys stored together in ScrapeSession.run_stats
+RUN_STAT_KEYS = ('tile_stats', 'address_stats', 'member_changes', 'rate_control', 'timings', 'pin_handles',
+                 'memory')
+# Export formats the pipeline can write besides the database
+EXPORT_FORMATS = ('csv', 'parquet')
+
+class ScrapePipeline:
+    """Run one scrape session end to end, persisting its progress on the ScrapeSession row
+
+    The row is the only state shared with the web app, so a session can run in a
+    background thread of the dev server or in scrape_worker.py and still be
+    polled from any web worker.
+    """
+
+    def __init__(self, app, session_ref, progress_interval=1.0, export_formats=('csv',), output_dir='.',
+                 changed_only=False, version_interval=10.0):
+        self.app = app
+        self.config = app.config
+        # scrape_sessions.id of the session to run
+        self.session_ref = session_ref
+        # Progress is written at most this often, plus at every phase change
+        self.progress_interval = progress_interval
+        self.status = {'progress': 0, 'total_pins': 0, 'current_pin': 0, 'message': None}
+        self.status_lock = threading.Lock()
+        self.saved_at = 0.0
+        # Session views are cached until the data version changes, so progress writes bump it
+        # at most this often (and always with the first pin count)
+        self.version_interval = version_interval
+        self.bumped_at = 0.0
+        # Token bucket + AIMD controller shared by the HTTP fetcher and browser workers of this run
+        self.rate_controller = None
+        # Pins that failed in the browser, retried once the main pass is done
+        self.retry_queue = None
+        # Browser and process memory samples; restarts browsers that grow too large
+        self.watchdog = None
+        # False when part of the map was not crawled, so unseen members must not be marked removed
+        self.crawl_complete = True
+        # SessionProfiler of a run started with profiling on (SCRAPER_PROFILE)
+        self.profiler = None
+        self.export_formats = export_formats
+        self.output_dir = output_dir
+        # Export only the members this run added, changed or restored
+        self.changed_only = changed_only
+        # Export format -> file written
+        self.exports = {}
+        # Phase name -> seconds spent in it
+        self.timings = {}
+        self.phase = None
+        self.phase_started = None
+
+    def start_phase(self, name):
+        """Close the timing of the current phase and start timing the next (None to stop)"""
+        now = time.perf_counter()
+        if self.phase:
+            self.timings[self.phase] = round(self.timings.get(self.phase, 0) + now - self.phase_started, 3)
+        self.phase = name
+        self.phase_started = now
+
+    def export(self, cleaner, records):
+        """Write the records in each export format; returns the files written"""
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        for export_format in self.export_formats:
+            filename = os.path.join(self.output_dir, f'suffolk_members_{stamp}.{export_format}')
+            if self.output_dir == '.':
+                filename = os.path.basename(filename)
+            if export_format == 'csv':
+                cleaner.export_to_csv(records, filename)
+            elif export_format == 'parquet':
+                cleaner.export_to_parquet(records, filename)
+            else:
+                raise ValueError(f'Unknown export format: {export_format}')
+            self.exports[export_format] = filename
+        return self.exports
+
+    def update_status(self, force=False, **fields):
+        """Merge live status fields and write them to the session row when due"""
+        with self.status_lock:
+            self.status.update(fields)
+            if not force and time.monotonic() - self.saved_at < self.progress_interval:
+                return
+            self.saved_at = time.monotonic()
+            status = dict(self.status)
+
+        if self.rate_controller:
+            status['rate_control'] = self.rate_controller.snapshot()
+        try:
+            self.write_session(status)
+        except Exception as e:
+            logger.warning('Could not save progress of session %s: %s', self.session_ref, e)
+
+    def write_session(self, status, **columns):
+        with self.app.app_context():
+            session = db.session.get(ScrapeSession, self.session_ref)
+            first_pin_count = not session.total_pins_found and status.get('total_pins')
+            session.progress = status.get('progress', session.progress)
+            session.current_pin = status.get('current_pin', session.current_pin)
+            session.total_pins_found = status.get('total_pins', session.total_pins_found)
+            session.message = status.get('message', session.message)
+            session.heartbeat_at = datetime.utcnow()
+
+            run_stats = json.loads(session.run_stats) if session.run_stats else {}
+            run_stats.update({key: status[key] for key in RUN_STAT_KEYS if key in status})
+            session.run_stats = json.dumps(run_stats)
+
+            for name, value in columns.items():
+                setattr(session, name, value)
+            db.session.commit()
+
+            if first_pin_count or time.monotonic() - self.bumped_at >= self.version_interval:
+                self.bumped_at = time.monotonic()
+                DataVersion.bump()
+
+    def fail(self, error):
+        """Mark the session failed with an error message"""
+        self.start_phase(None)
+        self.update_status(force=True, message=f'Error: {error}', timings=self.timings)
+        with self.app.app_context():
+            session = db.session.get(ScrapeSession, self.session_ref)
+            session.status = 'failed'
+            session.end_time = datetime.utcnow()
+            session.error_message = error
+            db.session.commit()
+            DataVersion.bump()
+
+    def start_watchdog(self):
+        from memory_watchdog import MemoryWatchdog
+
+        self.watchdog = MemoryWatchdog(
+            browser_limit_mb=self.config['SCRAPER_BROWSER_MEMORY_MB'],
+            process_limit_mb=self.config['SCRAPER_PROCESS_MEMORY_MB'],
+            check_every=self.config['SCRAPER_MEMORY_CHECK_EVERY'],
+            on_checkpoint=lambda stats: self.update_status(
+                force=True, memory=stats, message='Restarting browser to free memory...')
+        )
+        return self.watchdog
+
+    def webdriver_stats(self):
+        """WebDriverCommandStats for new scrapers when profiling, else None"""
+        return self.profiler.commands if self.profiler else None
+
+    def save_profile(self):
+        """Stop the profiler and store its report with the session"""
+        self.profiler.stop()
+        report = self.profiler.report()
+        with self.app.app_context():
+            db.session.add(SessionProfile(
+                session_ref=self.session_ref,
+                report=json.dumps(report),
+                stats_text=self.profiler.stats_text(),
+                pstats_data=self.profiler.pstats_data()
+            ))
+            db.session.commit()
+            DataVersion.bump()
+        logger.info('Saved profile of session %s: %ss wall time, %s WebDriver commands',
+                    self.session_ref, report['wall_seconds'], report['webdriver_totals']['count'])
+
+    def extract_over_http(self, validity_gate):
+        """Fetch member data over plain HTTP; returns None when a browser is required"""
+        # Browser and HTTP stacks are imported only once a scrape reaches them
+        from scraper import SuffolkMapScraper
+        from http_fetcher import HttpMapFetcher
+
+        self.update_status(force=True, message='Fetching map data over HTTP...')
+
+        parser = SuffolkMapScraper()
+        fetcher = HttpMapFetcher(parser.map_url, parser.parse_popup_content, rate_controller=self.rate_controller)
+        records = fetcher.fetch()
+        if records is None:
+            return None
+
+        # Gated separately so that a fall back to the browser does not count these rejections
+        http_gate = RecordValidityGate()
+        valid = [record for record in records if http_gate.is_valid(record)]
+        if not valid:
+            logger.info('None of the %s records fetched over HTTP passed the validity gate; using the browser',
+                        len(records))
+            return None
+
+        validity_gate.merge(http_gate)
+        self.update_status(force=True, total_pins=len(records))
+        return valid
+
+    def extract_with_tiles(self, validity_gate):
+        """Crawl the map tile by tile across a pool of browser workers"""
+        from scraper import SuffolkMapScraper
+        from map_tiler import TiledCrawler
+        from pin_retry import PinRetryQueue
+
+        self.update_status(force=True, message='Starting browser workers for tiled crawl...')
+        self.retry_queue = PinRetryQueue(max_attempts=self.config['SCRAPER_PIN_RETRIES'])
+        watchdog = self.start_watchdog()
+
+        def on_progress(stats):
+            self.update_status(
+                total_pins=stats['pins_seen'],
+                current_pin=stats['pins_extracted'],
+                progress=int((stats['tiles_done'] / max(stats['tiles'], 1)) * 50),
+                message=(f"Crawled {stats['tiles_done']} of {stats['tiles']} tiles, "
+                         f"{stats['pins_extracted']} pins extracted"),
+                tile_stats=stats
+            )
+
+        crawler = TiledCrawler(
+            lambda: SuffolkMapScraper(rate_controller=self.rate_controller,
+                                      lean_profile=self.config['SCRAPER_LEAN_BROWSER'],
+                                      batch_harvest=self.config['SCRAPER_BATCH_HARVEST'],
+                                      watchdog=watchdog,
+                                      command_stats=self.webdriver_stats()),
+            workers=self.config['SCRAPER_BROWSER_WORKERS'],
+            tile_levels=self.config['SCRAPER_TILE_LEVELS'],
+            validity_gate=validity_gate,
+            on_progress=on_progress,
+            retry_queue=self.retry_queue
+        )
+        raw_data = crawler.run()
+        self.crawl_complete = crawler.complete and not self.restart_lost_pins()
+        self.update_status(force=True, tile_stats=crawler.stats, memory=watchdog.snapshot(),
+                           total_pins=crawler.stats['pins_seen'] - crawler.stats['duplicate_pins'])
+
+        if not crawler.stats['pins_seen']:
+            return None
+
+        return raw_data
+
+    def extract_with_browser(self, validity_gate):
+        """Click through the map pins in Firefox; returns None when no pins are found"""
+        if self.config['SCRAPER_TILE_LEVELS'] > 0 or self.config['SCRAPER_BROWSER_WORKERS'] > 1:
+            return self.extract_with_tiles(validity_gate)
+
+        from scraper import SuffolkMapScraper
+        from pin_retry import PinRetryQueue
+
+        watchdog = self.start_watchdog()
+
+        def start_scraper():
+            scraper = SuffolkMapScraper(rate_controller=self.rate_controller,
+                                        lean_profile=self.config['SCRAPER_LEAN_BROWSER'],
+                                        watchdog=watchdog,
+                                        command_stats=self.webdriver_stats())
+            try:
+                scraper.setup_driver()
+                scraper.load_map_page()
+            except Exception:
+                scraper.cleanup()
+                raise
+            return scraper
+
+        # Initialize scraper
+        scraper = SuffolkMapScraper(rate_controller=self.rate_controller,
+                                    lean_profile=self.config['SCRAPER_LEAN_BROWSER'],
+                                    batch_harvest=self.config['SCRAPER_BATCH_HARVEST'],
+                                    watchdog=watchdog,
+                                    command_stats=self.webdriver_stats())
+        # The browser is closed however extraction ends, so a failed run does not leak Firefox
+        try:
+            scraper.setup_driver()
+
+            self.update_status(force=True, message='Loading map page...')
+
+            # Load the map page
+            scraper.load_map_page()
+
+            self.update_status(force=True, message='Finding pins on map...')
+
+            # Find all pins, addressed by index and fingerprint so map re-renders can be recovered from
+            pins = scraper.pin_handles()
+            self.update_status(force=True, total_pins=len(pins))
+
+            if not pins:
+                return None
+
+            self.update_status(force=True, message=f'Found {len(pins)} pins. Starting extraction...')
+            self.retry_queue = PinRetryQueue(max_attempts=self.config['SCRAPER_PIN_RETRIES'])
+
+            # Extract data from each pin, dropping junk records before any further work
+            raw_data = []
+            # Per-pin messages are sampled; the retry queue and run stats keep the full counts
+            extracted_log, failed_log = LogSampler(), LogSampler()
+            for i, (pin, pin_data) in enumerate(scraper.extract_pins(pins)):
+                self.update_status(
+                    current_pin=i + 1,
+                    progress=int((i / len(pins)) * 50),  # First 50% for scraping
+                    message=f'Extracting data from pin {i + 1} of {len(pins)}'
+                )
+
+                if isinstance(pin_data, Exception):
+                    if failed_log.sample():
+                        logger.warning('Error extracting data from pin %s (%s failed so far): %s', i + 1, failed_log.count, pin_data)
+                    self.retry_queue.defer(pin_data, pin)
+                    continue
+                if validity_gate.is_valid(pin_data):
+                    raw_data.append(pin_data)
+                    if extracted_log.sample():
+                        logger.info('Extracted data from pin %s (%s so far): %s',
+                                    i + 1, extracted_log.count, pin_data.business_name or 'Unknown')
+
+            self.update_status(pin_handles=dict(scraper.handle_stats), memory=watchdog.snapshot())
+        finally:
+            scraper.cleanup()
+
+        if self.retry_queue.pending:
+            self.update_status(force=True, message=f'Retrying {len(self.retry_queue.pending)} failed pins...')
+            def on_retry_progress(attempt, done, total):
+                # Written at least every progress_interval, which also refreshes the session's heartbeat
+                self.update_status(force=not done, message=(f'Retrying failed pins (round {attempt} of '
+                                                            f'{self.retry_queue.max_attempts}): {done} of {total}'))
+
+            recovered = self.retry_queue.run(start_scraper, on_progress=on_retry_progress)
+            raw_data.extend(record for record in recovered if validity_gate.is_valid(record))
+        self.crawl_complete = not self.restart_lost_pins()
+
+        return raw_data
+
+    def restart_lost_pins(self):
+        """True when a browser restart failed and some of the pins it left behind were never extracted"""
+        return bool(self.watchdog and self.watchdog.snapshot()['restart_failures']
+                    and self.retry_queue and self.retry_queue.totals()['lost'])
+
+    def run(self):
+        """Run the session; failures are recorded on the session row rather than raised"""
+        try:
+            self.rate_controller = RateController()
+            with self.app.app_context():
+                session = db.session.get(ScrapeSession, self.session_ref)
+                session.status = 'running'
+                if session.options:
+                    # Site profile settings override the app defaults for this run
+                    self.config = {**self.app.config, **json.loads(session.options)}
+                db.session.commit()
+                DataVersion.bump()
+            self.bumped_at = time.monotonic()
+            if self.config.get('SCRAPER_PROFILE'):
+                from session_profiler import SessionProfiler
+                self.profiler = SessionProfiler()
+                self.profiler.start()
+            self.update_status(force=True, message='Initializing scraper...')
+
+            self.start_phase('extract')
+            validity_gate = RecordValidityGate()
+            raw_data = None
+            fetch_mode = 'http'
+
+            # Plain HTTP is far cheaper than Firefox, so it is tried first
+            if self.config['SCRAPER_HTTP_FIRST']:
+                try:
+                    raw_data = self.extract_over_http(validity_gate)
+                except Exception as e:
+                    logger.warning('HTTP fetch path failed: %s', e)
+                    raw_data = None
+
+            if raw_data is None:
+                fetch_mode = 'browser'
+                raw_data = self.extract_with_browser(validity_gate)
+                if raw_data is None:
+                    self.fail('No pins found on the map')
+                    return
+
+            # Update session with rejection counts
+            gate_stats = validity_gate.stats()
+            with self.app.app_context():
+                session = db.session.get(ScrapeSession, self.session_ref)
+                session.fetch_mode = fetch_mode
+                session.records_rejected = gate_stats['rejected']
+                session.rejection_reasons = json.dumps(gate_stats['reasons'])
+                if self.retry_queue:
+                    retry_totals = self.retry_queue.totals()
+                    session.pins_retried = retry_totals['retried']
+                    session.pins_recovered = retry_totals['recovered']
+                    session.pins_failed = retry_totals['lost']
+                    session.pin_failures = json.dumps(self.retry_queue.failure_counts())
+                db.session.commit()
+
+            if not raw_data:
+                self.fail('No data extracted from any pins')
+                return
+
+            self.update_status(force=True, progress=50,
+                               message=f'Extracted {len(raw_data)} records. Cleaning and saving data...')
+
+            # Clean the data
+            self.start_phase('clean')
+            cleaner = DataCleaner()
+            cleaned_data = []
+
+            for i, record in enumerate(raw_data):
+                self.update_status(
+                    progress=50 + int((i / len(raw_data)) * 20),  # 20% for cleaning
+                    message=f'Cleaning record {i + 1} of {len(raw_data)}'
+                )
+
+                try:
+                    cleaned_data.append(cleaner.clean_record(record))
+                except Exception as e:
+                    logger.error('Error cleaning record %s: %s', i + 1, e)
+                    continue
+
+            # Fill city/state/ZIP from the offline ZIP table and standardize street suffixes
+            self.start_phase('normalize')
+            self.update_status(force=True, message='Normalizing addresses...')
+            address_normalizer = AddressNormalizer()
+            for cleaned_record in cleaned_data:
+                address_normalizer.normalize(cleaned_record)
+                address_normalizer.learn(cleaned_record)
+            address_normalizer.save()
+            self.update_status(address_stats=dict(address_normalizer.stats))
+
+            # Merge duplicates before anything is persisted
+            self.start_phase('deduplicate')
+            self.update_status(force=True, progress=70, message='Removing duplicate records...')
+            deduplicator = RecordDeduplicator()
+            cleaned_data = deduplicator.deduplicate(cleaned_data)
+            duplicates_merged = deduplicator.last_stats.get('merged', 0)
+
+            # Upsert members by stable key, recording only what changed since the last crawl
+            def on_save_progress(done, total):
+                self.update_status(
+                    progress=70 + int((done / max(total, 1)) * 20),  # 20% for saving
+                    message=f'Saving record {done} of {total}'
+                )
+
+            self.start_phase('save')
+            with self.app.app_context():
+                tracker = MemberChangeTracker(self.session_ref, deduplicator.member_key)
+                saved_count = tracker.save(cleaned_data, on_progress=on_save_progress)
+                if self.crawl_complete:
+                    tracker.sweep_removed()
+                else:
+                    logger.warning('Part of the map was not crawled; not marking unseen members as removed')
+                DataVersion.bump()
+
+            # Export files
+            self.start_phase('export')
+            self.update_status(force=True, progress=90, message='Exporting files...', member_changes=tracker.stats)
+            if self.changed_only:
+                # Members without a key are stored as new rows on every crawl
+                keys = [deduplicator.member_key(record) for record in cleaned_data]
+                cleaned_data = [record for record, key in zip(cleaned_data, keys)
+                                if key is None or key in tracker.touched_keys]
+            self.export(cleaner, cleaned_data)
+            csv_filename = self.exports.get('csv')
+            self.start_phase(None)
+
+            # Update session record
+            exported = ', '.join(self.exports.values()) or 'no files'
+            message = f'Scraping completed! Saved {saved_count} records to database and exported to {exported}'
+            self.update_status(force=True, progress=100, message=message, timings=self.timings)
+            with self.app.app_context():
+                session = db.session.get(ScrapeSession, self.session_ref)
+                session.status = 'completed'
+                session.end_time = datetime.utcnow()
+                session.records_scraped = len(raw_data)
+                session.records_saved = saved_count
+                session.duplicates_merged = duplicates_merged
+                session.members_added = tracker.stats['added'] + tracker.stats['restored']
+                session.members_changed = tracker.stats['changed']
+                session.members_removed = tracker.stats['removed']
+                session.csv_filename = csv_filename
+                db.session.commit()
+                DataVersion.bump()
+
+            logger.info('Scraping completed successfully. %s records saved to database and exported to %s', saved_count, exported)
+
+        except Exception as e:
+            logger.error('Scraping failed: %s', e)
+            try:
+                self.fail(str(e))
+            except Exception as save_error:
+                logger.error('Could not mark session %s as failed: %s', self.session_ref, save_error)
+        finally:
+            if self.profiler:
+                try:
+                    self.save_profile()
+                except Exception as e:
+                    logger.error('Could not save profile of session %s: %s', self.session_ref, e)
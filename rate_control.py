@@ -0,0 +1,164 @@
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests per second across all workers"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available; otherwise return seconds to wait"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill()
+            self.rate = float(rate)
+            self.capacity = max(1.0, self.rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+class RateController:
+    """Token bucket plus AIMD control of request rate and concurrency
+
+    Healthy responses (fast, no errors) raise the concurrency limit and rate
+    additively; errors, timeouts and 429s cut them multiplicatively.
+    """
+
+    def __init__(self, initial_rate=2.0, min_rate=0.2, max_rate=20.0,
+                 initial_concurrency=2, max_concurrency=8,
+                 target_latency=3.0, decrease_factor=0.5, cooldown=5.0):
+        self.bucket = TokenBucket(initial_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        # Latency above this counts as a sign of strain even without an error
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        # Only one decrease per cooldown window, so a burst of failures isn't punished N times
+        self.cooldown = cooldown
+
+        self.concurrency_limit = float(initial_concurrency)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.last_decrease = 0.0
+        self.stats = {'requests': 0, 'errors': 0, 'throttled': 0, 'timeouts': 0,
+                      'increases': 0, 'decreases': 0}
+        self.latency_ewma = None
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    @contextmanager
+    def slot(self):
+        """Hold one concurrency slot and one rate token for the duration of a request"""
+        self.enter()
+        try:
+            yield
+        finally:
+            self.leave()
+
+    def enter(self):
+        with self.condition:
+            while self.in_flight >= int(self.concurrency_limit):
+                self.condition.wait()
+            self.in_flight += 1
+        self.bucket.acquire()
+
+    async def enter_async(self):
+        while True:
+            with self.condition:
+                if self.in_flight < int(self.concurrency_limit):
+                    self.in_flight += 1
+                    break
+            await asyncio.sleep(0.05)
+        await self.bucket.acquire_async()
+
+    def leave(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def acquire(self):
+        """Wait for a rate token only, for callers that manage their own concurrency"""
+        self.bucket.acquire()
+
+    def record(self, latency, error=False, throttled=False, timeout=False):
+        """Feed back the outcome of one request"""
+        with self.condition:
+            self.stats['requests'] += 1
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+            if throttled:
+                self.stats['throttled'] += 1
+            if timeout:
+                self.stats['timeouts'] += 1
+            if error:
+                self.stats['errors'] += 1
+
+            if error or throttled or timeout or latency > self.target_latency:
+                self._decrease()
+            else:
+                self._increase()
+            self.condition.notify_all()
+
+    def _increase(self):
+        # Additive increase: roughly +1 slot and +1 req/s per window of successful requests
+        if self.concurrency_limit < self.max_concurrency:
+            self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + 1 / max(1.0, self.bucket.rate)))
+        self.stats['increases'] += 1
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.concurrency_limit = max(1.0, self.concurrency_limit * self.decrease_factor)
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate * self.decrease_factor))
+        self.stats['decreases'] += 1
+
+    def snapshot(self):
+        """Current controller state for the status endpoint"""
+        with self.condition:
+            return {
+                'rate_per_second': round(self.bucket.rate, 2),
+                'concurrency_limit': int(self.concurrency_limit),
+                'in_flight': self.in_flight,
+                'latency_ewma': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                **self.stats
+            }
@@ -0,0 +1,108 @@
+import re
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Substrings that mark a popup line as Google Maps interface text
+POPUP_NOISE_TERMS = [
+    'keyboard shortcuts', 'map data', 'google', 'inegi', 'terms of use',
+    'report a map error', 'satellite', 'map', 'terrain', 'labels',
+    '©2025', 'imagery', 'close', 'directions', 'terms', 'visit website',
+    '10 km', '500 km', 'km', 'miles', 'mi'
+]
+
+# One alternation instead of a Python loop per line
+popup_noise_pattern = re.compile('|'.join(re.escape(term) for term in POPUP_NOISE_TERMS))
+
+# Whole-value patterns for fields that were filled from map chrome, one named group per reason
+FIELD_NOISE_PATTERNS = {
+    'map_controls': r'keyboard\s+shortcuts|map\s+data|report\s+a\s+map\s+error|terms\s+of\s+use'
+                    r'|satellite|terrain|labels|imagery|directions|visit\s+website|inegi|close',
+    'scale_bar': r'\d+\s*(?:km|mi|miles|m|ft)',
+    'legal': r'terms|©\s*\d{4}.*|map\s+data\s+©.*',
+    'maps_url': r'(?:https?://)?(?:[\w-]+\.)*(?:google\.[a-z.]+/maps|maps\.google\.[a-z.]+|gstatic\.com|googleapis\.com)\S*'
+}
+
+field_noise_pattern = re.compile(
+    '|'.join(f'(?P<{reason}>^(?:{pattern})$)' for reason, pattern in FIELD_NOISE_PATTERNS.items()),
+    re.IGNORECASE
+)
+
+class RecordValidityGate:
+    """Reject junk records right after extraction, before cleaning and persistence"""
+
+    name_fields = ['business_name', 'owner1']
+    phone_fields = ['phone_primary', 'phone_cell', 'phone_office', 'phone_other']
+    email_fields = ['email1', 'email2']
+
+    def __init__(self, min_score=3):
+        # A usable record needs a real name plus at least one contact or address signal
+        self.min_score = min_score
+        self.accepted = 0
+        self.rejections = Counter()
+
+    def noise_reason(self, value):
+        """Return the noise category of a field value, or None if it looks real"""
+        if not value:
+            return None
+        match = field_noise_pattern.match(value.strip())
+        return match.lastgroup if match else None
+
+    def score_record(self, record):
+        """Score a raw record; returns (score, rejection reason or None)"""
+        names = [getattr(record, field) or '' for field in self.name_fields]
+        real_names = [name for name in names if name.strip() and not self.noise_reason(name)]
+
+        if not real_names:
+            noisy = [self.noise_reason(name) for name in names if name.strip()]
+            return 0, f'noise_name:{noisy[0]}' if noisy else 'missing_name'
+
+        score = 2
+
+        if any(len(re.sub(r'[^\d]', '', getattr(record, field) or '')) >= 7 for field in self.phone_fields):
+            score += 2
+        if any('@' in (getattr(record, field) or '') for field in self.email_fields):
+            score += 2
+        if record.zip_postal_code or (record.address_line1 and not self.noise_reason(record.address_line1)):
+            score += 1
+        website = record.website or ''
+        if website and not self.noise_reason(website):
+            score += 1
+
+        if score < self.min_score:
+            return score, 'insufficient_data'
+
+        return score, None
+
+    def is_valid(self, record):
+        """Check a raw record and count the outcome"""
+        if not record:
+            self.rejections['empty'] += 1
+            return False
+
+        score, reason = self.score_record(record)
+        if reason:
+            self.rejections[reason] += 1
+            logger.debug('Rejected record %r: %s (score %s)', record.business_name, reason, score)
+            return False
+
+        self.accepted += 1
+        return True
+
+    def merge(self, other):
+        """Add another gate's counts to this one"""
+        self.accepted += other.accepted
+        self.rejections.update(other.rejections)
+
+    @property
+    def rejected(self):
+        return sum(self.rejections.values())
+
+    def stats(self):
+        """Counts of accepted and rejected records, with rejection reasons"""
+        return {
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'reasons': dict(self.rejections)
+        }
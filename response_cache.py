@@ -0,0 +1,119 @@
+import json
+import time
+import hashlib
+import threading
+from functools import wraps
+from collections import OrderedDict
+from flask import request, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(payload):
+    """Serialize a JSON payload to bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+
+class ResponseCache:
+    """Serialized JSON responses for read-only endpoints, valid until the data version changes
+
+    Views decorated with cached_json return a plain dict or list; the cache
+    serializes it once per data version and answers If-None-Match with 304.
+    Anything else a view returns (error tuples, Response objects) passes through
+    uncached.
+
+    With a version_source (a callable reading a version shared through the
+    database) caches in every web worker drop their entries at most
+    check_interval seconds after another process changed the data.
+    """
+
+    def __init__(self, max_entries=256, version_source=None, check_interval=1.0):
+        self.max_entries = max_entries
+        self.version_source = version_source
+        self.check_interval = check_interval
+        self.checked_at = 0.0
+        self.source_version = None
+        # Local generation: entries stored under an older one are stale
+        self.version = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def bump(self):
+        """Invalidate every cached response; call after data the endpoints read has changed"""
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+            self.checked_at = 0.0
+
+    def refresh_version(self):
+        """Pick up data changes made by other processes"""
+        if self.version_source is None or time.monotonic() - self.checked_at < self.check_interval:
+            return
+        source_version = self.version_source()
+        with self.lock:
+            self.checked_at = time.monotonic()
+            if source_version != self.source_version:
+                self.source_version = source_version
+                self.version += 1
+                self.entries.clear()
+
+    def request_key(self):
+        return (request.endpoint,
+                tuple(sorted((request.view_args or {}).items())),
+                tuple(sorted(request.args.items(multi=True))))
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != self.version:
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version, body, etag):
+        with self.lock:
+            # A bump while the view ran means the body may already be stale
+            if version != self.version:
+                return
+            self.entries[key] = (version, body, etag)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def cached_json(self, view):
+        """Decorator caching a view's JSON payload and honouring ETag/If-None-Match"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            self.refresh_version()
+            key = self.request_key()
+            entry = self.get(key)
+
+            if entry is None:
+                version = self.version
+                payload = view(*args, **kwargs)
+                if not isinstance(payload, (dict, list)):
+                    return payload
+                body = dumps(payload)
+                # Content-derived, so every web worker hands out the same tag for the same body
+                etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+                self.put(key, version, body, etag)
+                self.stats['misses'] += 1
+            else:
+                _, body, etag = entry
+                self.stats['hits'] += 1
+
+            if etag in request.if_none_match:
+                self.stats['not_modified'] += 1
+                response = Response(status=304)
+            else:
+                response = Response(body, mimetype='application/json')
+            response.set_etag(etag)
+            # Browsers may keep the body but must revalidate, which costs a 304
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        return wrapper
@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import uuid
+from datetime import datetime, timedelta
+from models import db, ScrapeSession, DataVersion
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULE_FILE = 'schedules.json'
+
+CRON_MACROS = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+}
+MONTH_NAMES = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+WEEKDAY_NAMES = {name: number for number, name in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])}
+
+# app.config keys a site profile may override for its runs
+PROFILE_OPTIONS = {'SCRAPER_HTTP_FIRST', 'SCRAPER_LEAN_BROWSER', 'SCRAPER_TILE_LEVELS', 'SCRAPER_BROWSER_WORKERS',
+                   'SCRAPER_PIN_RETRIES', 'SCRAPER_BATCH_HARVEST', 'SCRAPER_PROFILE'}
+MISSED_RUN_POLICIES = ('run_once', 'skip')
+
+class CronExpression:
+    """Five-field cron expression (minute hour day-of-month month day-of-week), evaluated in UTC
+
+    Supports *, lists, ranges, steps, month/weekday names and the @daily-style
+    macros. As in cron, when both day fields are restricted either may match.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = CRON_MACROS.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression needs 5 fields: {expression!r}')
+
+        self.minutes = self.parse_field(fields[0], 0, 59)
+        self.hours = self.parse_field(fields[1], 0, 23)
+        self.days = self.parse_field(fields[2], 1, 31)
+        self.months = self.parse_field(fields[3], 1, 12, MONTH_NAMES)
+        # 7 is accepted as Sunday too
+        self.weekdays = frozenset(day % 7 for day in self.parse_field(fields[4], 0, 7, WEEKDAY_NAMES))
+        # As in cron, a day field starting with * (including */2) does not restrict the day
+        self.days_restricted = not fields[2].startswith('*')
+        self.weekdays_restricted = not fields[4].startswith('*')
+
+    def parse_field(self, field, low, high, names=None):
+        values = set()
+        for item in field.lower().split(','):
+            step = 1
+            if '/' in item:
+                item, step_text = item.split('/', 1)
+                step = int(step_text)
+                if step < 1:
+                    raise ValueError(f'Invalid cron step in {field!r}')
+
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start_text, end_text = item.split('-', 1)
+                start, end = self.parse_value(start_text, names), self.parse_value(end_text, names)
+            else:
+                start = self.parse_value(item, names)
+                # "5/15" means every 15 starting at 5
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f'Cron field {field!r} outside {low}-{high}')
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def parse_value(self, text, names):
+        if names and text in names:
+            return names[text]
+        return int(text)
+
+    def day_matches(self, moment):
+        weekday = (moment.weekday() + 1) % 7  # cron counts from Sunday
+        if self.days_restricted and self.weekdays_restricted:
+            return moment.day in self.days or weekday in self.weekdays
+        return moment.day in self.days and weekday in self.weekdays
+
+    def next_after(self, moment):
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Leap days can be almost eight years apart
+        limit = candidate + timedelta(days=366 * 8)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self.day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+
+        raise ValueError(f'Cron expression never matches: {self.expression!r}')
+
+class SiteProfile:
+    """A named crawl schedule plus the scraper settings its runs use"""
+
+    def __init__(self, name, cron, enabled=True, jitter_seconds=0, missed_runs='run_once', options=None):
+        self.name = name
+        self.cron = CronExpression(cron)
+        self.enabled = enabled
+        # Runs start at a random (but stable) offset up to this long after their fire time
+        self.jitter_seconds = jitter_seconds
+        # 'run_once' catches up with a single run; 'skip' drops runs that could not start on time
+        if missed_runs not in MISSED_RUN_POLICIES:
+            raise ValueError(f'Profile {name}: missed_runs must be one of {", ".join(MISSED_RUN_POLICIES)}')
+        self.missed_runs = missed_runs
+
+        self.options = dict(options or {})
+        unknown = set(self.options) - PROFILE_OPTIONS
+        if unknown:
+            raise ValueError(f'Profile {name}: unsupported options {", ".join(sorted(unknown))}')
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data['name'],
+            cron=data['cron'],
+            enabled=data.get('enabled', True),
+            jitter_seconds=data.get('jitter_seconds', 0),
+            missed_runs=data.get('missed_runs', 'run_once'),
+            options=data.get('options')
+        )
+
+def load_profiles(path):
+    """Site profiles from a JSON file: {"profiles": [{"name": ..., "cron": ...}, ...]}"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    profiles = [SiteProfile.from_dict(entry) for entry in data.get('profiles', [])]
+
+    names = [profile.name for profile in profiles]
+    if len(names) != len(set(names)):
+        raise ValueError(f'Duplicate profile names in {path}')
+    return profiles
+
+class CrawlScheduler:
+    """Queue ScrapeSessions for site profiles as their cron schedules come due
+
+    The last scheduled run of each profile is read back from scrape_sessions,
+    so restarts neither repeat runs nor lose track of missed ones. Only one
+    session is active at a time: a due run waits while another is queued or
+    running.
+    """
+
+    def __init__(self, app, profiles, grace_seconds=300):
+        self.app = app
+        self.profiles = [profile for profile in profiles if profile.enabled]
+        # How late a 'skip' profile's run may start and still count as on time
+        self.grace_seconds = grace_seconds
+        self.stale_after = app.config['SCRAPER_STALE_AFTER']
+        self.next_due = {}
+
+    def last_scheduled(self, profile):
+        return (db.session.query(db.func.max(ScrapeSession.scheduled_for))
+                .filter(ScrapeSession.profile == profile.name, ScrapeSession.trigger == 'schedule')
+                .scalar())
+
+    def start_time(self, profile, due):
+        """Fire time plus the profile's jitter, stable for a given run"""
+        if not profile.jitter_seconds:
+            return due
+        offset = random.Random(f'{profile.name}|{due.isoformat()}').uniform(0, profile.jitter_seconds)
+        return due + timedelta(seconds=offset)
+
+    def tick(self, now=None):
+        """Queue every profile whose run is due; returns the session ids queued"""
+        now = now or datetime.utcnow()
+        queued = []
+
+        with self.app.app_context():
+            for profile in self.profiles:
+                due = self.next_due.get(profile.name)
+                if due is None:
+                    # A new profile starts from now rather than backfilling its history
+                    due = profile.cron.next_after(self.last_scheduled(profile) or now)
+
+                # Catch up to the most recent fire time that has passed
+                following = profile.cron.next_after(due)
+                missed = 0
+                while following <= now:
+                    missed += 1
+                    due, following = following, profile.cron.next_after(following)
+
+                if missed:
+                    logger.info('Profile %s missed %s runs', profile.name, missed)
+                self.next_due[profile.name] = due
+                start_at = self.start_time(profile, due)
+                if now < start_at:
+                    continue
+
+                if profile.missed_runs == 'skip' and (now - start_at).total_seconds() > self.grace_seconds:
+                    logger.info('Skipping run of %s due at %s: could not start on time', profile.name, due)
+                    self.next_due[profile.name] = following
+                    continue
+
+                active = ScrapeSession.find_active(self.stale_after)
+                if active:
+                    logger.debug('Run of %s due at %s waits for session %s', profile.name, due, active.session_id)
+                    continue
+
+                already_queued = ScrapeSession.query.filter_by(profile=profile.name, scheduled_for=due).first()
+                if not already_queued:
+                    session = ScrapeSession(
+                        session_id=str(uuid.uuid4()),
+                        status='queued',
+                        trigger='schedule',
+                        profile=profile.name,
+                        scheduled_for=due,
+                        options=json.dumps(profile.options),
+                        message=f'Scheduled run of {profile.name} queued'
+                    )
+                    db.session.add(session)
+                    db.session.commit()
+                    DataVersion.bump()
+                    queued.append(session.session_id)
+                    logger.info('Queued scheduled run of %s for %s as %s', profile.name, due, session.session_id)
+
+                self.next_due[profile.name] = following
+
+        return queued
+
+    def upcoming(self, now=None):
+        """(profile name, next fire time, start time with jitter) for every enabled profile"""
+        now = now or datetime.utcnow()
+        results = []
+        with self.app.app_context():
+            for profile in self.profiles:
+                due = self.next_due.get(profile.name)
+                if due is None:
+                    last = self.last_scheduled(profile)
+                    due = profile.cron.next_after(max(last, now) if last else now)
+                results.append((profile.name, due, self.start_time(profile, due)))
+        return results
+
+def schedule_file():
+    """The profile file to load, or None when none is configured or present"""
+    path = os.environ.get('SCRAPE_SCHEDULE_FILE', DEFAULT_SCHEDULE_FILE)
+    return path if os.path.exists(path) else None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Queue scheduled crawls for the scrape worker')
+    parser.add_argument('--file', default=None, help=f'site profile file (default: {DEFAULT_SCHEDULE_FILE})')
+    parser.add_argument('--interval', type=float, default=30.0, help='seconds between schedule checks')
+    parser.add_argument('--list', action='store_true', help='print the next run of each profile and exit')
+    args = parser.parse_args()
+
+    from main import app, init_schema
+    from logging_setup import configure_logging
+
+    configure_logging()
+    path = args.file or schedule_file()
+    if not path:
+        parser.error('no site profile file found; pass --file or set SCRAPE_SCHEDULE_FILE')
+
+    init_schema()
+    scheduler = CrawlScheduler(app, load_profiles(path))
+
+    if args.list:
+        for name, due, start_at in scheduler.upcoming():
+            print(f'{name}: due {due:%Y-%m-%d %H:%M} UTC, starts {start_at:%Y-%m-%d %H:%M:%S} UTC')
+    else:
+        logger.info('Scheduling %s profiles from %s', len(scheduler.profiles), path)
+        while True:
+            try:
+                scheduler.tick()
+            except Exception as e:
+                logger.error('Schedule check failed: %s', e)
+            time.sleep(args.interval)
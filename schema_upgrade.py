@@ -0,0 +1,57 @@
+import logging
+from sqlalchemy import inspect, literal, text
+from sqlalchemy.schema import CreateColumn
+
+logger = logging.getLogger(__name__)
+
+class SchemaUpgrade:
+    """Bring tables created by an older release up to the current models
+
+    db.create_all only creates missing tables, so columns and indexes the
+    models gained since a table was created are added here with ALTER TABLE
+    and CREATE INDEX. Columns come in nullable, with their scalar default
+    (if any) applied to the existing rows. Columns are only ever added;
+    renames and type changes still need a hand-written upgrade.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def upgrade(self):
+        """Add missing columns and indexes; returns the names of what was added"""
+        engine = self.db.engine
+        added = []
+        with engine.begin() as conn:
+            inspector = inspect(conn)
+            existing_tables = set(inspector.get_table_names())
+            for table in self.db.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                columns = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in columns:
+                        table_name = conn.dialect.identifier_preparer.format_table(table)
+                        conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {self.column_ddl(column, conn.dialect)}'))
+                        added.append(f'{table.name}.{column.name}')
+
+                indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in indexes:
+                        index.create(bind=conn)
+                        added.append(index.name)
+        if added:
+            logger.info('Schema upgraded: added %s', ', '.join(added))
+        return added
+
+    def column_ddl(self, column, dialect):
+        """Column definition for ADD COLUMN, with its default and foreign key but always nullable"""
+        ddl = str(CreateColumn(column).compile(dialect=dialect)).replace(' NOT NULL', '')
+        default = column.default
+        if column.server_default is None and default is not None and default.is_scalar:
+            value = literal(default.arg, column.type).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+            ddl += f' DEFAULT {value}'
+        for foreign_key in column.foreign_keys:
+            target = foreign_key.column
+            preparer = dialect.identifier_preparer
+            ddl += f' REFERENCES {preparer.format_table(target.table)} ({preparer.format_column(target)})'
+        return ddl
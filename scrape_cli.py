@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Exit codes
+EXIT_COMPLETED = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_BUSY = 3
+EXIT_INTERRUPTED = 130
+
+OUTPUT_FORMATS = ('csv', 'parquet', 'db')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m scrape_cli',
+        description='Run the full scrape pipeline headlessly, without the web server',
+        epilog=f'Exit codes: {EXIT_COMPLETED} completed, {EXIT_FAILED} scrape failed, {EXIT_USAGE} bad arguments, '
+               f'{EXIT_BUSY} another session is running, {EXIT_INTERRUPTED} interrupted'
+    )
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Firefox workers for the browser crawl (default: SCRAPER_BROWSER_WORKERS)')
+    parser.add_argument('--tile-levels', type=int, default=None,
+                        help='split the map into 4^n tiles (default: SCRAPER_TILE_LEVELS)')
+    parser.add_argument('--browser', action='store_true', help='skip the plain HTTP fetch and always use Firefox')
+    parser.add_argument('--full-browser', action='store_true', help='load map imagery and fonts in Firefox')
+    parser.add_argument('--format', default='csv,db',
+                        help=f'comma-separated outputs from {", ".join(OUTPUT_FORMATS)} (default: csv,db)')
+    parser.add_argument('--output-dir', default='.', help='directory for exported files')
+    parser.add_argument('--incremental', action='store_true',
+                        help='export only members this run added, changed or restored (needs the db output)')
+    parser.add_argument('--database', default=None, help='database URL (default: DATABASE_URL)')
+    parser.add_argument('--profile', action='store_true',
+                        help='run under cProfile, time WebDriver commands and write a .pstats file to --output-dir')
+    parser.add_argument('--summary-json', default=None, help="write a JSON run summary to this file ('-' for stdout)")
+    parser.add_argument('--quiet', action='store_true', help='only log warnings and errors')
+    args = parser.parse_args(argv)
+
+    args.formats = [name.strip() for name in args.format.split(',') if name.strip()]
+    unknown = set(args.formats) - set(OUTPUT_FORMATS)
+    if unknown or not args.formats:
+        parser.error(f'--format takes {", ".join(OUTPUT_FORMATS)}; got {args.format!r}')
+    if args.incremental and 'db' not in args.formats:
+        parser.error('--incremental compares against the database, so it needs the db output')
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if 'parquet' in args.formats:
+        try:
+            import pyarrow
+        except ImportError:
+            parser.error('parquet output needs pyarrow (pip install pyarrow)')
+    return args
+
+def run_options(args):
+    """Scraper settings for the session's options, overriding the app defaults"""
+    options = {}
+    if args.workers is not None:
+        options['SCRAPER_BROWSER_WORKERS'] = args.workers
+    if args.tile_levels is not None:
+        options['SCRAPER_TILE_LEVELS'] = args.tile_levels
+    if args.browser:
+        options['SCRAPER_HTTP_FIRST'] = False
+    if args.full_browser:
+        options['SCRAPER_LEAN_BROWSER'] = False
+    if args.profile:
+        options['SCRAPER_PROFILE'] = True
+    return options
+
+def database_label(database_url):
+    from sqlalchemy.engine import make_url
+    return make_url(database_url).render_as_string(hide_password=True)
+
+def write_summary(summary, path):
+    text = json.dumps(summary, indent=2, default=str)
+    if path == '-':
+        print(text)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text + '\n')
+
+def write_profile(profiler, output_dir, session_id):
+    """Save the raw cProfile stats next to the exports; returns the profile part of the summary"""
+    filename = os.path.join(output_dir, f'scrape_profile_{session_id}.pstats')
+    with open(filename, 'wb') as f:
+        f.write(profiler.pstats_data())
+    report = profiler.report(limit=10)
+    return {
+        'pstats_file': filename,
+        'wall_seconds': report['wall_seconds'],
+        'webdriver_totals': report['webdriver_totals'],
+        'webdriver_commands': report['webdriver_commands'],
+        'top_functions': report['top_functions'],
+    }
+
+def run(args):
+    """Run one session against the configured database; returns (exit code, summary)"""
+    # The app reads its database URL at import, so it is imported only now
+    from main import app, init_schema
+    from logging_setup import configure_logging
+    from models import db, ScrapeSession, DataVersion
+    from pipeline import ScrapePipeline
+
+    configure_logging('WARNING' if args.quiet else None)
+    init_schema()
+
+    options = run_options(args)
+    with app.app_context():
+        active = ScrapeSession.find_active(app.config['SCRAPER_STALE_AFTER'])
+        if active:
+            logger.error('Session %s is already %s', active.session_id, active.status)
+            return EXIT_BUSY, {'status': 'busy', 'active_session': active.session_id}
+
+        # Created as running so a scrape worker on the same database never claims it
+        session = ScrapeSession(
+            session_id=str(uuid.uuid4()),
+            status='running',
+            trigger='cli',
+            options=json.dumps(options),
+            heartbeat_at=datetime.utcnow(),
+            message='Started from the command line'
+        )
+        db.session.add(session)
+        db.session.commit()
+        DataVersion.bump()
+        session_ref = session.id
+
+    export_formats = [name for name in args.formats if name != 'db']
+    pipeline = ScrapePipeline(app, session_ref, export_formats=export_formats, output_dir=args.output_dir,
+                              changed_only=args.incremental)
+    started = time.perf_counter()
+    try:
+        pipeline.run()
+    except KeyboardInterrupt:
+        pipeline.fail('Interrupted')
+        exit_code = EXIT_INTERRUPTED
+    else:
+        exit_code = None
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        session = db.session.get(ScrapeSession, session_ref)
+        summary = session.to_dict()
+        summary['options'] = options
+        session_id = session.session_id
+
+    if exit_code is None:
+        exit_code = EXIT_COMPLETED if summary['status'] == 'completed' else EXIT_FAILED
+    summary.update({
+        'exit_code': exit_code,
+        'outputs': {**pipeline.exports, **({'db': database_label(args.database_url)} if 'db' in args.formats else {})},
+        'incremental': args.incremental,
+        'timings': {**pipeline.timings, 'total': round(elapsed, 3)},
+    })
+    if pipeline.profiler:
+        summary['profile'] = write_profile(pipeline.profiler, args.output_dir, session_id)
+    return exit_code, summary
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix='scrape_cli_') as scratch_dir:
+        if 'db' in args.formats:
+            args.database_url = args.database or os.environ.get('DATABASE_URL') or 'sqlite:///suffolk_scraper.db'
+        else:
+            # File-only runs use a throwaway database so they never touch the real one
+            args.database_url = f'sqlite:///{os.path.join(scratch_dir, "scrape.db")}'
+        os.environ['DATABASE_URL'] = args.database_url
+
+        exit_code, summary = run(args)
+
+    if args.summary_json:
+        write_summary(summary, args.summary_json)
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import os
+import time
+import signal
+import logging
+import argparse
+from datetime import datetime, timedelta
+from sqlalchemy import update, or_
+from main import app, init_schema
+from logging_setup import configure_logging
+from models import db, ScrapeSession, DataVersion
+from pipeline import ScrapePipeline
+from scheduler import CrawlScheduler, load_profiles, schedule_file
+
+logger = logging.getLogger(__name__)
+
+class ScrapeWorker:
+    """Run queued scrape sessions one at a time, outside the web server processes"""
+
+    def __init__(self, app, poll_interval=5.0, scheduler=None):
+        self.app = app
+        self.poll_interval = poll_interval
+        # Optional CrawlScheduler queueing cron-driven sessions between runs
+        self.scheduler = scheduler
+        self.stale_after = app.config['SCRAPER_STALE_AFTER']
+        self.stopping = False
+
+    def stop(self, *args):
+        logger.info('Scrape worker stopping after the current session')
+        self.stopping = True
+
+    def recover_stale(self):
+        """Fail running sessions whose process died before finishing them, and queued ones nothing ran"""
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        with self.app.app_context():
+            result = db.session.execute(
+                update(ScrapeSession)
+                .where(ScrapeSession.status == 'running',
+                       or_(ScrapeSession.heartbeat_at.is_(None), ScrapeSession.heartbeat_at < stale_before))
+                .values(status='failed', end_time=datetime.utcnow(),
+                        error_message='Scrape worker stopped before the session finished')
+            )
+            db.session.commit()
+            expired = ScrapeSession.expire_queued(self.stale_after)
+            if result.rowcount or expired:
+                DataVersion.bump()
+                logger.warning('Marked %s abandoned sessions as failed', result.rowcount + expired)
+
+    def claim_next(self):
+        """Take the oldest queued session; returns its id or None"""
+        with self.app.app_context():
+            candidate = (ScrapeSession.query
+                         .filter_by(status='queued')
+                         .order_by(ScrapeSession.id)
+                         .first())
+            if candidate is None:
+                return None
+
+            # Conditional update, so two workers never run the same session
+            result = db.session.execute(
+                update(ScrapeSession)
+                .where(ScrapeSession.id == candidate.id, ScrapeSession.status == 'queued')
+                .values(status='running', heartbeat_at=datetime.utcnow())
+            )
+            db.session.commit()
+            if not result.rowcount:
+                return None
+            DataVersion.bump()
+            return candidate.id
+
+    def run_once(self):
+        """Run every session that is queued right now; returns how many ran"""
+        ran = 0
+        while not self.stopping:
+            session_ref = self.claim_next()
+            if session_ref is None:
+                break
+            logger.info('Running scrape session %s', session_ref)
+            ScrapePipeline(self.app, session_ref).run()
+            ran += 1
+        return ran
+
+    def run_forever(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info('Scrape worker polling every %ss', self.poll_interval)
+
+        self.recover_stale()
+        while not self.stopping:
+            try:
+                if self.scheduler:
+                    self.scheduler.tick()
+                self.run_once()
+            except Exception as e:
+                logger.error('Scrape worker poll failed: %s', e)
+            time.sleep(self.poll_interval)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run queued Suffolk map scrape sessions')
+    parser.add_argument('--once', action='store_true', help='run the queued sessions, then exit')
+    parser.add_argument('--poll-interval', type=float,
+                        default=float(os.environ.get('SCRAPE_WORKER_POLL_INTERVAL', '5')))
+    parser.add_argument('--schedule', default=None,
+                        help='site profile file for scheduled crawls (default: SCRAPE_SCHEDULE_FILE or schedules.json)')
+    parser.add_argument('--no-schedule', action='store_true', help='only run sessions queued by the web app')
+    args = parser.parse_args()
+
+    configure_logging()
+    init_schema()
+    scheduler = None
+    schedule_path = None if args.no_schedule else (args.schedule or schedule_file())
+    if schedule_path:
+        scheduler = CrawlScheduler(app, load_profiles(schedule_path))
+        logger.info('Scheduling %s enabled profiles from %s', len(scheduler.profiles), schedule_path)
+    worker = ScrapeWorker(app, poll_interval=args.poll_interval, scheduler=scheduler)
+    if args.once:
+        worker.recover_stale()
+        worker.run_once()
+    else:
+        worker.run_forever()
@@ -1,22 +1,451 @@
 import time
 import logging
 import re
+from urllib.parse import quote
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from selenium.common.exceptions import (TimeoutException, NoSuchElementException, ElementClickInterceptedException,
+                                        ElementNotInteractableException, StaleElementReferenceException)
 from webdriver_manager.firefox import GeckoDriverManager
 from selenium.webdriver.firefox.service import Service
 from bs4 import BeautifulSoup
+from record_filter import popup_noise_pattern
+from member_record import MemberRecord
+
+logger = logging.getLogger(__name__)
+
+# Requests the lean profile sends to a dead proxy: map tiles, imagery, fonts, media and analytics.
+# Marker icons (pushpin/marker/mapfiles images) are still loaded because pins are found by them.
+LEAN_BLOCKED_URL_PATTERNS = [
+    "*maps.googleapis.com/maps/vt*",
+    "*maps.googleapis.com/maps/api/js/StaticMapService*",
+    "*.google.com/vt*",
+    "*.google.com/kh*",
+    "*khms*.google.com*",
+    "*mts*.google.com*",
+    "*streetviewpixels*",
+    "*fonts.googleapis.com*",
+    "*fonts.gstatic.com*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg"
+]
+
+LEAN_ALLOWED_URL_PATTERNS = [
+    "*pushpin*",
+    "*marker*",
+    "*mapfiles*",
+    "*colour*",
+    "*pin*.png*"
+]
+
+# Preferences that drop caches, animations and background services nobody needs for pin harvesting
+LEAN_FIREFOX_PREFERENCES = {
+    "browser.cache.disk.enable": False,
+    "browser.cache.memory.enable": False,
+    "browser.cache.offline.enable": False,
+    "network.http.use-cache": False,
+    "ui.prefersReducedMotion": 1,
+    "toolkit.cosmeticAnimations.enabled": False,
+    "image.animation_mode": "none",
+    "gfx.downloadable_fonts.enabled": False,
+    "media.autoplay.default": 5,
+    "media.peerconnection.enabled": False,
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.http.speculative-parallel-limit": 0,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "toolkit.telemetry.enabled": False,
+    "app.update.auto": False,
+    "extensions.update.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "browser.shell.checkDefaultBrowser": False,
+    "browser.sessionstore.resume_from_crash": False,
+    "browser.sessionhistory.max_entries": 2,
+    "geo.enabled": False,
+    "dom.webnotifications.enabled": False,
+    # Fewer content processes keep RSS per browser down
+    "fission.autostart": False,
+    "dom.ipc.processCount": 1
+}
+
+def build_block_pac(blocked_patterns, allowed_patterns):
+    """Proxy auto-config script sending blocked URLs to an unreachable proxy"""
+    allowed = ' || '.join(f'shExpMatch(url, "{pattern}")' for pattern in allowed_patterns) or 'false'
+    blocked = ' || '.join(f'shExpMatch(url, "{pattern}")' for pattern in blocked_patterns) or 'false'
+    return (
+        'function FindProxyForURL(url, host) {'
+        f' if ({allowed}) return "DIRECT";'
+        f' if ({blocked}) return "PROXY 127.0.0.1:9";'
+        ' return "DIRECT"; }'
+    )
+
+# Selectors that may hold a pin's popup, in order of preference
+POPUP_SELECTORS = [
+    ".popup",
+    ".modal",
+    ".info-window",
+    ".member-info",
+    "[class*='popup']",
+    "[class*='modal']",
+    "[class*='info']",
+    "div[style*='position: absolute']",
+    "div[style*='z-index']"
+]
+
+# Returns [element, text] for the first visible popup candidate, in one round trip
+POPUP_LOOKUP_SCRIPT = """
+const selectors = arguments[0];
+for (const selector of selectors) {
+    for (const element of document.querySelectorAll(selector)) {
+        const text = element.innerText ? element.innerText.trim() : '';
+        if (text && element.offsetParent !== null) {
+            return [element, text];
+        }
+    }
+}
+return [null, ''];
+"""
+
+# JS helpers shared by the pin scripts: locate the page's google.maps.Map and
+# project an element's on-screen position to lat/lng through the map bounds
+MAP_JS_HELPERS = """
+function findMap() {
+    const maps = window.google && window.google.maps;
+    if (!maps) return null;
+    for (const key of Object.keys(window)) {
+        try {
+            if (window[key] instanceof maps.Map) return window[key];
+        } catch (e) {}
+    }
+    return null;
+}
+function pinFingerprint(map, pin) {
+    // Position snapped to a ~2px grid at the current zoom plus the icon, or the attributes without layout
+    const step = map ? 720 / (256 * Math.pow(2, map.getZoom())) : 0;
+    const label = pin.getAttribute('src') || pin.getAttribute('title') || pin.getAttribute('alt') || pin.tagName;
+    const position = step ? projectPin(map, pin) : null;
+    if (position) {
+        return Math.round(position[0] / step) * step + ',' + Math.round(position[1] / step) * step + '|' + label;
+    }
+    const clone = pin.cloneNode(false);
+    clone.removeAttribute('style');
+    return clone.outerHTML;
+}
+function projectPin(map, pin) {
+    if (!map || !pin || !map.getBounds()) return null;
+    const ne = map.getBounds().getNorthEast(), sw = map.getBounds().getSouthWest();
+    const frame = map.getDiv().getBoundingClientRect();
+    const box = pin.getBoundingClientRect();
+    // Markers are anchored at their bottom centre
+    const x = (box.left + box.width / 2 - frame.left) / frame.width;
+    const y = (box.bottom - frame.top) / frame.height;
+    if (x < 0 || x > 1 || y < 0 || y > 1) return null;
+    const mercator = lat => Math.log(Math.tan(Math.PI / 4 + lat * Math.PI / 360));
+    const top = mercator(ne.lat()), bottom = mercator(sw.lat());
+    const lat = (2 * Math.atan(Math.exp(top - y * (top - bottom))) - Math.PI / 2) * 180 / Math.PI;
+    let west = sw.lng(), east = ne.lng();
+    if (east < west) east += 360;
+    let lng = west + x * (east - west);
+    if (lng > 180) lng -= 360;
+    return [lat, lng];
+}
+"""
+
+# Projects a pin's on-screen position to lat/lng
+PIN_POSITION_SCRIPT = MAP_JS_HELPERS + """
+return projectPin(findMap(), arguments[0]);
+"""
+
+# Move the map to a tile and wait for it to settle (async script: last argument is the callback)
+MOVE_MAP_SCRIPT = MAP_JS_HELPERS + """
+const lat = arguments[0], lng = arguments[1], zoom = arguments[2], timeoutMs = arguments[3];
+const done = arguments[arguments.length - 1];
+const map = findMap();
+if (!map) { done(false); return; }
+const timer = setTimeout(() => done(false), timeoutMs);
+google.maps.event.addListenerOnce(map, 'idle', () => { clearTimeout(timer); done(true); });
+map.setZoom(zoom);
+map.setCenter({lat: lat, lng: lng});
+"""
+
+# Viewport-independent identity for each pin
+PIN_FINGERPRINT_SCRIPT = MAP_JS_HELPERS + """
+const map = findMap();
+return arguments[0].map(pin => {
+    try {
+        return pinFingerprint(map, pin);
+    } catch (e) {
+        return null;
+    }
+});
+"""
+
+# Pin selectors, in the order find_map_pins tries them
+PIN_SELECTORS = [
+    "img[src*='pushpin']",
+    "img[src*='pin']", 
+    "img[src*='marker']",
+    "img[src*='colour']",  # Common in map pin naming
+    ".pushpin",
+    ".marker",
+    ".pin",
+    "area[shape='circle']",
+    "area[shape='rect']",
+    "area[onclick]",
+    "[onclick*='showInfo']",
+    "[onclick*='popup']",
+    "[onclick*='member']",
+    "[onclick*='info']",
+    "div[onclick]",
+    "span[onclick]",
+    "a[onclick]"
+]
+
+# Any clickable element, tried when no pin selector matches
+CLICKABLE_SELECTORS = [
+    "[onclick]",
+    "[onmousedown]",
+    "[onmouseup]",
+    "img[alt*='member']",
+    "img[title*='member']",
+    "a[href*='member']"
+]
+
+# Interactive elements inside a map container, the last resort
+CONTAINER_SELECTORS = ["#the-map", ".map", "[id*='map']", "[class*='map']", "div[style*='position']"]
+CONTAINER_PIN_SELECTORS = [
+    ', '.join(f'{container} {target}' for target in ('[onclick]', '[onmousedown]', '[onmouseup]', '[href]'))
+    for container in CONTAINER_SELECTORS
+]
+
+# find_map_pins uses the first list that finds any element
+PIN_SELECTOR_STAGES = [PIN_SELECTORS, CLICKABLE_SELECTORS, CONTAINER_PIN_SELECTORS]
+
+# Finds the current element of every [index, fingerprint, occurrence] pin
+# handle among the elements matched by the pin selectors: by fingerprint, with
+# pins sharing one told apart by their order of appearance, or by position in
+# the pin list for handles without one
+PIN_JS_HELPERS = MAP_JS_HELPERS + """
+function resolveHandles(map, selectors, handles) {
+    const seen = new Set(), pins = [];
+    for (const selector of selectors) {
+        for (const element of document.querySelectorAll(selector)) {
+            const html = element.outerHTML;
+            if (!seen.has(html)) { seen.add(html); pins.push(element); }
+        }
+    }
+    const byFingerprint = new Map();
+    const wanted = new Set(handles.map(handle => handle[1]).filter(Boolean));
+    if (wanted.size) {
+        for (const pin of pins) {
+            try {
+                const fingerprint = pinFingerprint(map, pin);
+                if (!wanted.has(fingerprint)) continue;
+                if (!byFingerprint.has(fingerprint)) byFingerprint.set(fingerprint, []);
+                byFingerprint.get(fingerprint).push(pin);
+            } catch (e) {}
+        }
+    }
+    return handles.map(([index, fingerprint, occurrence]) => fingerprint
+        ? ((byFingerprint.get(fingerprint) || [])[occurrence || 0] || null)
+        : (pins[index] || null));
+}
+"""
+
+# Re-resolves pin handles in one round trip
+PIN_RESOLVE_SCRIPT = PIN_JS_HELPERS + """
+return resolveHandles(findMap(), arguments[0], arguments[1]);
+"""
+
+# Closes whatever popup is open, in the order close_popup tries them
+CLOSE_SELECTORS = [
+    ".close",
+    ".x",
+    "[onclick*='close']",
+    "[onclick*='hide']",
+    "button[type='button']"
+]
+
+# Clicks a batch of pins inside the page (async script: last argument is the
+# callback). Each click waits for a new popup with a MutationObserver instead
+# of polling, captures its text and HTML and closes it. The handles' cached
+# elements are clicked as they are; only handles without one, or whose element
+# a re-render detached, are resolved again in the page. Reports one result per
+# handle: {text, html, position, latency} or {error, message}.
+HARVEST_SCRIPT = PIN_JS_HELPERS + """
+const [selectors, handles, elements, popupSelectors, closeSelectors, popupTimeoutMs, pauseMs] = arguments;
+const done = arguments[arguments.length - 1];
+const map = findMap();
+const pins = elements.slice();
+const refresh = from => {
+    const stale = [];
+    for (let j = from; j < handles.length; j++) {
+        if (!pins[j] || !pins[j].isConnected) stale.push(j);
+    }
+    if (!stale.length) return;
+    const found = resolveHandles(map, selectors, stale.map(j => handles[j]));
+    stale.forEach((j, k) => { pins[j] = found[k]; });
+};
+refresh(0);
+
+const visiblePopup = () => {
+    for (const selector of popupSelectors) {
+        for (const element of document.querySelectorAll(selector)) {
+            const text = element.innerText ? element.innerText.trim() : '';
+            if (text && element.offsetParent !== null) return [element, text];
+        }
+    }
+    return [null, ''];
+};
+const waitForPopup = previous => new Promise(resolve => {
+    const fresh = () => {
+        const [element, text] = visiblePopup();
+        return element && text !== previous ? element : null;
+    };
+    const found = fresh();
+    if (found) { resolve(found); return; }
+    let settled = false;
+    const finish = element => {
+        if (settled) return;
+        settled = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        resolve(element);
+    };
+    const observer = new MutationObserver(() => { const element = fresh(); if (element) finish(element); });
+    const timer = setTimeout(() => finish(null), popupTimeoutMs);
+    observer.observe(document.body, {childList: true, subtree: true, characterData: true,
+                                     attributes: true, attributeFilter: ['style', 'class']});
+});
+const closePopup = () => {
+    for (const selector of closeSelectors) {
+        for (const element of document.querySelectorAll(selector)) {
+            if (element.offsetParent !== null) { element.click(); return; }
+        }
+    }
+};
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+(async () => {
+    const results = [];
+    for (let i = 0; i < handles.length; i++) {
+        if (pins[i] && !pins[i].isConnected) refresh(i);
+        const pin = pins[i];
+        if (!pin) { results.push({error: 'stale_element', message: 'Pin is no longer on the map'}); continue; }
+        const started = performance.now();
+        try {
+            pin.scrollIntoView(true);
+            const position = projectPin(map, pin);
+            const previous = visiblePopup()[1];
+            pin.click();
+            const popup = await waitForPopup(previous);
+            const latency = (performance.now() - started) / 1000;
+            if (!popup) {
+                results.push({error: 'no_popup', message: 'No popup appeared after clicking pin', latency: latency});
+            } else {
+                results.push({text: popup.innerText, html: popup.innerHTML, position: position, latency: latency});
+                closePopup();
+            }
+        } catch (e) {
+            results.push({error: 'driver_error', message: String(e)});
+        }
+        if (pauseMs) await sleep(pauseMs);
+    }
+    return results;
+})().then(done, e => done({error: 'driver_error', message: String(e)}));
+"""
+
+# Why a pin yielded no record; 'driver_error' covers anything unexpected
+PIN_FAILURE_REASONS = ('click_intercepted', 'no_popup', 'stale_element', 'timeout', 'parse_error', 'driver_error')
+
+class PinHandle:
+    """A pin addressed by its index in the pin list and its fingerprint
+
+    The WebElement is a cache: a map re-render invalidates it, and
+    SuffolkMapScraper.resolve_pins finds it again from the index and
+    fingerprint among the elements of the selector list the pin was found
+    with.
+    """
+
+    def __init__(self, index, fingerprint, element=None, selectors=None, occurrence=0):
+        self.index = index
+        self.fingerprint = fingerprint
+        self.element = element
+        self.selectors = selectors
+        # Earlier pins with the same fingerprint (same-icon pins at one spot, or any pin without a map)
+        self.occurrence = occurrence
+
+    def reference(self):
+        """[index, fingerprint, occurrence], as resolveHandles takes it"""
+        return [self.index, self.fingerprint, self.occurrence]
+
+    def identity(self):
+        """Key telling this pin apart from every other pin of the map"""
+        return (self.fingerprint, self.occurrence) if self.fingerprint else None
+
+    def __repr__(self):
+        return f'<PinHandle {self.index} {self.fingerprint!r}>'
+
+class PinExtractionError(Exception):
+    """A pin could not be extracted; reason is one of PIN_FAILURE_REASONS"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+def classify_failure(error):
+    """Failure class of an exception raised while working on a pin"""
+    if isinstance(error, PinExtractionError):
+        return error.reason
+    if isinstance(error, StaleElementReferenceException):
+        return 'stale_element'
+    if isinstance(error, (ElementClickInterceptedException, ElementNotInteractableException)):
+        return 'click_intercepted'
+    if isinstance(error, TimeoutException):
+        return 'timeout'
+    return 'driver_error'
+
+# Coordinates embedded in Google Maps links: ll=lat,lng, q=lat,lng or @lat,lng
+MAPS_LINK_COORDINATES = re.compile(r'(?:[?&;](?:ll|q|center)=|@)(-?\d{1,2}\.\d+),(-?\d{1,3}\.\d+)')
 
 class SuffolkMapScraper:
-    def __init__(self):
+    def __init__(self, rate_controller=None, lean_profile=True, batch_harvest=True, watchdog=None, command_stats=None):
         self.driver = None
         self.wait = None
         self.map_url = "https://suffolk.digitalovine.com/modules.php?op=modload&name=_custom_maps&file=members#the-map"
+        # Shared RateController pacing pin clicks; popups are polled instead of fixed sleeps
+        self.rate_controller = rate_controller
+        self.popup_timeout = 5
+        self.popup_poll_interval = 0.25
+        # Block tiles/imagery/fonts/analytics and disable caches and animations in Firefox
+        self.lean_profile = lean_profile
+        # MemoryWatchdog deciding when the browser has grown enough to restart
+        self.watchdog = watchdog
+        # Why the last watchdog restart failed; the pins it left behind report it
+        self.restart_error = None
+        # (lat, lng, zoom) of the last move_map, restored after a restart
+        self.map_view = None
+        # WebDriverCommandStats timing this scraper's browser commands when the session is profiled
+        self.command_stats = command_stats
+        # The selector list find_map_pins found the pins with; handles are re-resolved through it
+        self.pin_selectors = PIN_SELECTORS
+        # Click pins in batches inside the page (harvest) rather than one WebDriver call at a time
+        self.batch_harvest = batch_harvest
+        self.harvest_batch_size = 50
+        # Batched re-resolutions of pin handles and pins they rescued from stale elements,
+        # plus in-page harvest batches and pins harvested through them
+        self.handle_stats = {'resolutions': 0, 'stale_recovered': 0, 'unresolved': 0,
+                             'harvest_batches': 0, 'harvested': 0, 'harvest_fallbacks': 0, 'stale_batches': 0}
         
     def setup_driver(self):
         """Setup Firefox WebDriver with headless configuration"""
@@ -32,22 +461,42 @@ class SuffolkMapScraper:
             firefox_options.set_preference("general.useragent.override", 
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
             
+            if self.lean_profile:
+                self.apply_lean_profile(firefox_options)
+            
             # Setup service with GeckoDriverManager
             service = Service(GeckoDriverManager().install())
             
             self.driver = webdriver.Firefox(service=service, options=firefox_options)
+            if self.command_stats:
+                self.command_stats.instrument(self.driver)
             self.wait = WebDriverWait(self.driver, 30)
             
-            logging.info('Firefox WebDriver initialized successfully')
+            logger.info('Firefox WebDriver initialized successfully')
             
         except Exception as e:
-            logging.error(f'Failed to setup Firefox WebDriver: {str(e)}')
+            logger.error('Failed to setup Firefox WebDriver: %s', e)
             raise
 
+    def apply_lean_profile(self, firefox_options):
+        """Block heavy resources by URL pattern and turn off caches, animations and services"""
+        for name, value in LEAN_FIREFOX_PREFERENCES.items():
+            firefox_options.set_preference(name, value)
+        
+        # A PAC script filters requests by full URL without needing a separate proxy process
+        pac_script = build_block_pac(LEAN_BLOCKED_URL_PATTERNS, LEAN_ALLOWED_URL_PATTERNS)
+        firefox_options.set_preference("network.proxy.type", 2)
+        firefox_options.set_preference("network.proxy.autoconfig_url", "data:text/javascript," + quote(pac_script))
+        firefox_options.set_preference("network.proxy.autoconfig_url.include_path", True)
+        # Otherwise Firefox retries blocked requests directly when the proxy is unreachable
+        firefox_options.set_preference("network.proxy.failover_direct", False)
+        
+        logger.info('Lean browser profile enabled (%s blocked URL patterns)', len(LEAN_BLOCKED_URL_PATTERNS))
+
     def load_map_page(self):
         """Load the Suffolk map page and wait for it to fully load"""
         try:
-            logging.info(f'Loading map page: {self.map_url}')
+            logger.info('Loading map page: %s', self.map_url)
             self.driver.get(self.map_url)
             
             # Wait for the page to load
@@ -67,18 +516,18 @@ class SuffolkMapScraper:
             map_container = None
             for selector in map_selectors:
                 try:
-                    logging.info(f'Trying map selector: {selector}')
+                    logger.debug('Trying map selector: %s', selector)
                     map_container = self.wait.until(
                         EC.presence_of_element_located((By.CSS_SELECTOR, selector))
                     )
-                    logging.info(f'Found map container with selector: {selector}')
+                    logger.debug('Found map container with selector: %s', selector)
                     break
                 except TimeoutException:
                     continue
             
             if not map_container:
                 # If no specific map container found, just wait for page body
-                logging.info('No specific map container found, waiting for page body')
+                logger.info('No specific map container found, waiting for page body')
                 self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
             
             # Wait additional time for the map and pins to fully load
@@ -87,174 +536,126 @@ class SuffolkMapScraper:
             # Check if we're on the right page by looking for expected content
             page_source = self.driver.page_source.lower()
             if 'suffolk' in page_source or 'member' in page_source or 'map' in page_source:
-                logging.info('Map page loaded successfully - Suffolk content detected')
+                logger.info('Map page loaded successfully - Suffolk content detected')
             else:
-                logging.warning('Map page loaded but Suffolk content not clearly detected')
+                logger.warning('Map page loaded but Suffolk content not clearly detected')
             
         except Exception as e:
-            logging.error(f'Error loading map page: {str(e)}')
+            logger.error('Error loading map page: %s', e)
             # Log page source for debugging
             try:
-                logging.info(f'Current page title: {self.driver.title}')
-                logging.info(f'Current page URL: {self.driver.current_url}')
+                logger.info('Current page title: %s', self.driver.title)
+                logger.info('Current page URL: %s', self.driver.current_url)
             except:
                 pass
             raise
 
     def find_map_pins(self):
-        """Find all clickable pins on the map"""
+        """Find all clickable pins on the map
+
+        Selector lists are tried from the most to the least specific, and the
+        one that finds pins is kept in pin_selectors so re-resolution and the
+        in-page harvest enumerate the same elements in the same order.
+        """
         try:
-            logging.info('Starting pin search...')
-            
-            # Look for various possible pin selectors
-            pin_selectors = [
-                "img[src*='pushpin']",
-                "img[src*='pin']", 
-                "img[src*='marker']",
-                "img[src*='colour']",  # Common in map pin naming
-                ".pushpin",
-                ".marker",
-                ".pin",
-                "area[shape='circle']",
-                "area[shape='rect']",
-                "area[onclick]",
-                "[onclick*='showInfo']",
-                "[onclick*='popup']",
-                "[onclick*='member']",
-                "[onclick*='info']",
-                "div[onclick]",
-                "span[onclick]",
-                "a[onclick]"
-            ]
+            logger.info('Starting pin search...')
             
-            all_pins = []
-            
-            for selector in pin_selectors:
-                try:
-                    pins = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if pins:
-                        logging.info(f'Found {len(pins)} elements using selector: {selector}')
-                        all_pins.extend(pins)
-                except Exception as e:
-                    logging.debug(f'Selector {selector} failed: {str(e)}')
-                    continue
-            
-            # Remove duplicates
-            unique_pins = []
-            seen_elements = set()
-            
-            for pin in all_pins:
-                try:
-                    element_id = pin.get_attribute('outerHTML')
-                    if element_id and element_id not in seen_elements:
-                        seen_elements.add(element_id)
-                        unique_pins.append(pin)
-                except:
-                    continue
-            
-            # If no pins found with standard selectors, try broader search
-            if not unique_pins:
-                logging.info('No pins found with standard selectors, trying broader search...')
-                
-                # Try looking for any clickable elements
-                clickable_selectors = [
-                    "[onclick]",
-                    "[onmousedown]", 
-                    "[onmouseup]",
-                    "img[alt*='member']",
-                    "img[title*='member']",
-                    "a[href*='member']"
-                ]
-                
-                for selector in clickable_selectors:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            logging.info(f'Found {len(elements)} clickable elements with: {selector}')
-                            unique_pins.extend(elements)
-                    except:
-                        continue
-            
-            # If still no pins, search within any map containers found
-            if not unique_pins:
-                logging.info('Still no pins found, searching within all containers...')
-                container_selectors = [
-                    "#the-map",
-                    ".map",
-                    "[id*='map']",
-                    "[class*='map']",
-                    "div[style*='position']"
-                ]
-                
-                for container_sel in container_selectors:
-                    try:
-                        containers = self.driver.find_elements(By.CSS_SELECTOR, container_sel)
-                        for container in containers:
-                            clickable_elements = container.find_elements(By.XPATH, ".//*[@onclick or @onmousedown or @onmouseup or @href]")
-                            if clickable_elements:
-                                logging.info(f'Found {len(clickable_elements)} clickable elements in container: {container_sel}')
-                                unique_pins.extend(clickable_elements)
-                    except:
-                        continue
-            
-            # Final deduplication
             final_pins = []
-            seen_final = set()
-            for pin in unique_pins:
-                try:
-                    pin_html = pin.get_attribute('outerHTML')
-                    if pin_html and pin_html not in seen_final:
-                        seen_final.add(pin_html)
-                        final_pins.append(pin)
-                except:
-                    continue
+            for stage, selectors in enumerate(PIN_SELECTOR_STAGES):
+                if stage == 1:
+                    logger.info('No pins found with standard selectors, trying broader search...')
+                elif stage == 2:
+                    logger.info('Still no pins found, searching within all containers...')
+                final_pins = self.collect_pins(selectors)
+                if final_pins:
+                    self.pin_selectors = selectors
+                    break
             
-            logging.info(f'Found {len(final_pins)} total unique interactive elements')
+            logger.info('Found %s total unique interactive elements', len(final_pins))
             
             # If we still have no pins, log page source for debugging
             if not final_pins:
-                logging.warning('No interactive elements found. Logging page info for debugging...')
+                logger.warning('No interactive elements found. Logging page info for debugging...')
                 try:
-                    logging.info(f'Page title: {self.driver.title}')
-                    logging.info(f'Page URL: {self.driver.current_url}')
+                    logger.info('Page title: %s', self.driver.title)
+                    logger.info('Page URL: %s', self.driver.current_url)
                     # Log a snippet of page source
                     page_source = self.driver.page_source
                     if len(page_source) > 1000:
-                        logging.info(f'Page source snippet: {page_source[:1000]}...')
+                        logger.info('Page source snippet: %s...', page_source[:1000])
                     else:
-                        logging.info(f'Full page source: {page_source}')
+                        logger.info('Full page source: %s', page_source)
                 except:
                     pass
             
             return final_pins
             
         except Exception as e:
-            logging.error(f'Error finding map pins: {str(e)}')
+            logger.error('Error finding map pins: %s', e)
             return []
 
+    def collect_pins(self, selectors):
+        """Elements matched by the selectors in order, without duplicates (the same walk as resolveHandles)"""
+        all_pins = []
+        for selector in selectors:
+            try:
+                pins = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                if pins:
+                    logger.debug('Found %s elements using selector: %s', len(pins), selector)
+                    all_pins.extend(pins)
+            except Exception as e:
+                logger.debug('Selector %s failed: %s', selector, e)
+                continue
+        
+        # Remove duplicates
+        unique_pins = []
+        seen_elements = set()
+        for pin in all_pins:
+            try:
+                element_id = pin.get_attribute('outerHTML')
+                if element_id and element_id not in seen_elements:
+                    seen_elements.add(element_id)
+                    unique_pins.append(pin)
+            except:
+                continue
+        return unique_pins
+
     def extract_pin_data(self, pin):
-        """Click a pin and extract the popup data"""
+        """Click a pin and extract the popup data; raises PinExtractionError when it yields nothing"""
+        if self.rate_controller:
+            with self.rate_controller.slot():
+                return self._extract_pin_data(pin)
+        return self._extract_pin_data(pin)
+
+    def _extract_pin_data(self, pin):
         try:
             # Scroll pin into view
             self.driver.execute_script("arguments[0].scrollIntoView(true);", pin)
-            time.sleep(1)
+            
+            # Read the pin's position before the click pans the map
+            coordinates = self.get_pin_coordinates(pin)
+            
+            # Whatever popup is visible now belongs to the previous pin
+            _, previous_text = self.find_popup()
             
             # Try different methods to click the pin
             clicked = False
+            click_error = None
             
             # Method 1: Regular click
             try:
                 pin.click()
                 clicked = True
-            except ElementClickInterceptedException:
+            except ElementClickInterceptedException as e:
+                click_error = e
                 # Method 2: JavaScript click
                 try:
                     self.driver.execute_script("arguments[0].click();", pin)
                     clicked = True
-                except:
-                    pass
-            except:
-                pass
+                except Exception as js_error:
+                    click_error = js_error
+            except Exception as e:
+                click_error = e
             
             # Method 3: ActionChains click
             if not clicked:
@@ -262,47 +663,25 @@ class SuffolkMapScraper:
                     actions = ActionChains(self.driver)
                     actions.move_to_element(pin).click().perform()
                     clicked = True
-                except:
-                    pass
+                except Exception as e:
+                    # A vanished pin explains the earlier failures better than the last attempt
+                    if not isinstance(click_error, StaleElementReferenceException):
+                        click_error = e
             
             if not clicked:
-                logging.warning('Failed to click pin')
-                return None
+                if self.rate_controller:
+                    self.rate_controller.record(0.0, error=True)
+                reason = 'stale_element' if isinstance(click_error, StaleElementReferenceException) else 'click_intercepted'
+                raise PinExtractionError(reason, f'Failed to click pin: {str(click_error)}')
             
             # Wait for popup to appear
-            time.sleep(3)
-            
-            # Look for popup content with various selectors
-            popup_selectors = [
-                ".popup",
-                ".modal",
-                ".info-window",
-                ".member-info",
-                "[class*='popup']",
-                "[class*='modal']",
-                "[class*='info']",
-                "div[style*='position: absolute']",
-                "div[style*='z-index']"
-            ]
-            
-            popup_content = None
-            
-            for selector in popup_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        if element.is_displayed() and element.text.strip():
-                            popup_content = element
-                            break
-                    if popup_content:
-                        break
-                except:
-                    continue
+            popup_content, latency = self.wait_for_popup(previous_text)
+            if self.rate_controller:
+                self.rate_controller.record(latency, timeout=popup_content is None)
             
             # If no popup found, try to get any newly appeared content
             if not popup_content:
                 # Look for any div that appeared after clicking
-                time.sleep(2)
                 all_divs = self.driver.find_elements(By.TAG_NAME, "div")
                 for div in all_divs:
                     try:
@@ -315,70 +694,285 @@ class SuffolkMapScraper:
                     except:
                         continue
             
-            if popup_content:
-                # Extract and parse the popup content
-                # Try to get HTML content first for better parsing
-                try:
-                    html_content = popup_content.get_attribute('innerHTML')
-                    text_content = popup_content.text
-                    data = self.parse_popup_content(text_content, html_content)
-                except:
-                    # Fallback to text content only
-                    data = self.parse_popup_content(popup_content.text, None)
-                
-                # Close popup if possible
-                self.close_popup()
+            if not popup_content:
+                raise PinExtractionError('no_popup', f'No popup content found {latency:.1f}s after clicking pin')
+            
+            # Extract and parse the popup content
+            # Try to get HTML content first for better parsing
+            try:
+                html_content = popup_content.get_attribute('innerHTML')
+                text_content = popup_content.text
+                data = self.parse_popup_content(text_content, html_content)
+            except StaleElementReferenceException:
+                raise
+            except:
+                # Fallback to text content only
+                data = self.parse_popup_content(popup_content.text, None)
+            
+            # Close popup if possible
+            self.close_popup()
+            
+            if not data:
+                raise PinExtractionError('parse_error', 'Popup content could not be parsed')
+            
+            # The pin's own position beats a coordinate picked up from a map link
+            if coordinates:
+                data.latitude, data.longitude = coordinates
+            
+            return data
                 
-                return data
+        except PinExtractionError:
+            raise
+        except Exception as e:
+            raise PinExtractionError(classify_failure(e), f'Error extracting pin data: {str(e)}') from e
+
+    def pin_handles(self):
+        """Find the map's pins and address each by index and fingerprint"""
+        pins = self.find_map_pins()
+        fingerprints = self.pin_fingerprints(pins)
+        handles = []
+        occurrences = {}
+        for index, (pin, fingerprint) in enumerate(zip(pins, fingerprints)):
+            occurrence = occurrences.get(fingerprint, 0)
+            occurrences[fingerprint] = occurrence + 1
+            handles.append(PinHandle(index, fingerprint, pin, self.pin_selectors, occurrence))
+        return handles
+
+    def handle_selectors(self, handles):
+        """Selector list the handles' pins were found with (all handles of one pass share it)"""
+        return handles[0].selectors or self.pin_selectors
+
+    def resolve_pins(self, handles):
+        """Refresh the elements of pin handles in one script call; returns how many were found"""
+        self.handle_stats['resolutions'] += 1
+        if not handles:
+            return 0
+        elements = self.driver.execute_script(
+            PIN_RESOLVE_SCRIPT, self.handle_selectors(handles), [handle.reference() for handle in handles]
+        )
+        for handle, element in zip(handles, elements):
+            handle.element = element
+        found = sum(1 for element in elements if element is not None)
+        logger.info('Re-resolved %s of %s pin handles after the map changed', found, len(handles))
+        return found
+
+    def extract_handle(self, handle, handles=None):
+        """Extract a pin by handle, re-resolving stale handles (all of `handles` at once) and retrying once"""
+        if handle.element is not None:
+            try:
+                return self.extract_pin_data(handle.element)
+            except PinExtractionError as e:
+                if e.reason != 'stale_element':
+                    raise
+
+        # The map re-rendered, so every remaining element is stale: refresh them together
+        self.resolve_pins(handles or [handle])
+        if handle.element is None:
+            self.handle_stats['unresolved'] += 1
+            raise PinExtractionError('stale_element', f'Pin {handle.index} is no longer on the map')
+        data = self.extract_pin_data(handle.element)
+        self.handle_stats['stale_recovered'] += 1
+        return data
+
+    def extract_pins(self, handles):
+        """Yield (handle, record or PinExtractionError) for every pin handle"""
+        if self.batch_harvest:
+            return self.harvest(handles)
+        return self.extract_each(handles)
+
+    def extract_each(self, handles):
+        """Click pins one at a time over WebDriver"""
+        for position, handle in enumerate(handles):
+            try:
+                yield handle, self.extract_handle(handle, handles[position:])
+            except PinExtractionError as e:
+                yield handle, e
+            except Exception as e:
+                yield handle, PinExtractionError(classify_failure(e), str(e))
+
+            if self.watchdog and (position + 1) % self.watchdog.check_every == 0:
+                if not self.check_memory(handles[position + 1:]):
+                    yield from self.abandon_pins(handles[position + 1:])
+                    return
+
+    def harvest(self, handles, batch_size=None):
+        """Yield (handle, record or PinExtractionError) for every pin, clicking them inside the page
+
+        Pins are harvested in batches with one async script call each instead
+        of several WebDriver round trips per pin. If the first batch finds no
+        popup at all, the page does not react to in-page clicks and the rest
+        falls back to extract_handle.
+        """
+        batch_size = batch_size or self.harvest_batch_size
+        for start in range(0, len(handles), batch_size):
+            batch = handles[start:start + batch_size]
+            results = self.harvest_batch(batch, handles[start:])
+
+            if start == 0 and not any('error' not in result for result in results):
+                logger.warning('In-page harvest found no popups; clicking pins one at a time instead')
+                self.handle_stats['harvest_fallbacks'] += 1
+                self.batch_harvest = False
+                yield from self.extract_each(handles)
+                return
+
+            for handle, result in zip(batch, results):
+                yield handle, self.harvest_record(result)
+
+            if self.watchdog and not self.check_memory(handles[start + batch_size:]):
+                yield from self.abandon_pins(handles[start + batch_size:])
+                return
+
+    def check_memory(self, remaining):
+        """Restart the browser if the watchdog finds it too large; remaining handles are resolved in the new one
+
+        Returns False when the browser could not be restarted, so the pass has
+        to stop and leave the remaining pins to the retry queue.
+        """
+        if not remaining or not self.watchdog.check(self):
+            return True
+        self.watchdog.checkpoint()
+        try:
+            self.restart_driver()
+            self.resolve_pins(remaining)
+        except Exception as e:
+            logger.error('Browser restart failed; leaving %s pins for retry: %s', len(remaining), e)
+            self.watchdog.restart_failed()
+            self.restart_error = e
+            return False
+        return True
+
+    def abandon_pins(self, handles):
+        """Yield a driver_error result for every handle the pass could not get to"""
+        for handle in handles:
+            yield handle, PinExtractionError('driver_error', f'Browser restart failed: {self.restart_error}')
+
+    def restart_driver(self):
+        """Replace the browser with a fresh one showing the same map view"""
+        self.cleanup()
+        self.setup_driver()
+        self.load_map_page()
+        if self.map_view:
+            self.move_map(*self.map_view)
+
+    def harvest_batch(self, batch, remaining=None):
+        """Run the harvest script over a batch of handles; returns one result per handle
+
+        remaining (the batch and every handle after it) lose their cached
+        elements when the page turns out to have re-rendered.
+        """
+        self.handle_stats['harvest_batches'] += 1
+        # Popups are paced at the rate controller's current rate, inside the page
+        pause = 1 / self.rate_controller.rate if self.rate_controller else 0
+        try:
+            self.driver.set_script_timeout(len(batch) * (self.popup_timeout + pause + 1) + 10)
+            if self.rate_controller:
+                with self.rate_controller.slot():
+                    results = self.run_harvest_script(batch, pause, remaining)
             else:
-                logging.warning('No popup content found after clicking pin')
-                return None
-                
+                results = self.run_harvest_script(batch, pause, remaining)
         except Exception as e:
-            logging.error(f'Error extracting pin data: {str(e)}')
-            return None
+            logger.error('In-page harvest of %s pins failed: %s', len(batch), e)
+            return [{'error': classify_failure(e), 'message': str(e)}] * len(batch)
+
+        if isinstance(results, dict):
+            # The script itself failed before reporting per-pin results
+            return [results] * len(batch)
+        return results
+
+    def run_harvest_script(self, batch, pause, remaining=None):
+        def run():
+            return self.driver.execute_async_script(
+                HARVEST_SCRIPT, self.handle_selectors(batch), [handle.reference() for handle in batch],
+                [handle.element for handle in batch], POPUP_SELECTORS, CLOSE_SELECTORS,
+                self.popup_timeout * 1000, int(pause * 1000)
+            )
+
+        try:
+            return run()
+        except StaleElementReferenceException:
+            # WebDriver refuses detached elements as arguments: the map re-rendered, so the
+            # elements cached for the rest of the pass are stale too and are found again in the page
+            self.handle_stats['stale_batches'] += 1
+            for handle in remaining or batch:
+                handle.element = None
+            return run()
+
+    def harvest_record(self, result):
+        """Parse one harvest result into a record, or a PinExtractionError"""
+        error = result.get('error')
+        if self.rate_controller and 'latency' in result:
+            self.rate_controller.record(result['latency'], timeout=error == 'no_popup')
+        if error:
+            return PinExtractionError(error if error in PIN_FAILURE_REASONS else 'driver_error',
+                                      result.get('message') or error)
+
+        data = self.parse_popup_content(result.get('text') or '', result.get('html'))
+        if not data:
+            return PinExtractionError('parse_error', 'Popup content could not be parsed')
+        self.handle_stats['harvested'] += 1
+
+        # The pin's own position beats a coordinate picked up from a map link
+        if result.get('position'):
+            data.latitude, data.longitude = round(result['position'][0], 6), round(result['position'][1], 6)
+        return data
+
+    def pin_fingerprints(self, pins):
+        """Viewport-independent identities of pins in one round trip (None where unavailable)"""
+        if not pins:
+            return []
+        try:
+            return self.driver.execute_script(PIN_FINGERPRINT_SCRIPT, pins)
+        except Exception as e:
+            logger.debug('Pin fingerprint lookup failed: %s', e)
+            return [None] * len(pins)
+
+    def move_map(self, lat, lng, zoom, timeout=10):
+        """Center the map on a point at a zoom level; False if it did not settle within timeout seconds"""
+        self.map_view = (lat, lng, zoom, timeout)
+        return self.driver.execute_async_script(MOVE_MAP_SCRIPT, lat, lng, zoom, timeout * 1000)
+
+    def get_pin_coordinates(self, pin):
+        """Return (lat, lng) of a pin from the map projection, or None"""
+        try:
+            position = self.driver.execute_script(PIN_POSITION_SCRIPT, pin)
+            if position:
+                return round(position[0], 6), round(position[1], 6)
+        except Exception as e:
+            logger.debug('Pin position lookup failed: %s', e)
+        return None
+
+    def find_popup(self):
+        """Return (element, text) of the first visible popup candidate"""
+        try:
+            element, text = self.driver.execute_script(POPUP_LOOKUP_SCRIPT, POPUP_SELECTORS)
+            return element, text or ''
+        except Exception as e:
+            logger.debug('Popup lookup failed: %s', e)
+            return None, ''
+
+    def wait_for_popup(self, previous_text=''):
+        """Poll until a new popup shows up; returns (element or None, seconds waited)"""
+        started = time.monotonic()
+        deadline = started + self.popup_timeout
+        element = None
+        
+        while time.monotonic() < deadline:
+            element, text = self.find_popup()
+            if element is not None and text != previous_text:
+                return element, time.monotonic() - started
+            time.sleep(self.popup_poll_interval)
+        
+        # Same text as before the click can still be the right popup (e.g. a repeated member)
+        return element, time.monotonic() - started
 
     def parse_popup_content(self, content, html_content=None):
-        """Parse the popup content to extract member data"""
+        """Parse the popup content into a MemberRecord"""
         try:
-            data = {
-                'business_name': '',
-                'owner1': '',
-                'owner2': '',
-                'phone_primary': '',
-                'phone_cell': '',
-                'phone_office': '',
-                'phone_other': '',
-                'address_line1': '',
-                'address_line2': '',
-                'city': '',
-                'state': '',
-                'zip_code': '',
-                'country': '',
-                'email1': '',
-                'email2': '',
-                'website': '',
-                'business_type': '',
-                'species': '',
-                'breeds': '',
-                'social_network1': '',
-                'social_network2': '',
-                'social_network3': '',
-                'last_updated': '',
-                'about': '',
-                'notes': '',
-                'data_source': 'Suffolk DigitalOvine',
-                'data_source_url': self.map_url,
-                'date_scraped': time.strftime('%Y-%m-%d')
-            }
-            
-            # Filter out Google Maps interface elements and noise
-            google_noise = [
-                'keyboard shortcuts', 'map data', 'google', 'inegi', 'terms of use',
-                'report a map error', 'satellite', 'map', 'terrain', 'labels',
-                '©2025', 'imagery', 'close', 'directions', 'terms', 'visit website',
-                '10 km', '500 km', 'km', 'miles', 'mi'
-            ]
+            data = MemberRecord(
+                data_source='Suffolk DigitalOvine',
+                data_source_url=self.map_url,
+                date_scraped=time.strftime('%Y-%m-%d')
+            )
             
             lines = []
             for line in content.split('\n'):
@@ -387,8 +981,7 @@ class SuffolkMapScraper:
                     continue
                     
                 # Skip Google Maps interface elements
-                line_lower = line.lower()
-                if any(noise in line_lower for noise in google_noise):
+                if popup_noise_pattern.search(line.lower()):
                     continue
                     
                 # Skip single characters or very short strings
@@ -398,7 +991,7 @@ class SuffolkMapScraper:
                 lines.append(line)
             
             # Log the cleaned content for debugging
-            logging.info(f'Cleaned popup content lines: {lines[:5]}...' if len(lines) > 5 else f'Cleaned popup content lines: {lines}')
+            logger.debug('Cleaned popup content lines: %s', lines[:5])
             
             all_text = ' '.join(lines)
             
@@ -416,13 +1009,13 @@ class SuffolkMapScraper:
                             href_attr = link.get('href')
                             if href_attr:
                                 href = str(href_attr)
-                                if 'mailto:' in href and not data['email1']:
+                                if 'mailto:' in href and not data.email1:
                                     email = href.replace('mailto:', '').strip()
-                                    data['email1'] = email
-                                elif 'http' in href and not data['website']:
+                                    data.email1 = email
+                                elif 'http' in href and not data.website:
                                     # Filter out Google Maps URLs
                                     if not any(domain in href.lower() for domain in excluded_domains):
-                                        data['website'] = href.strip()
+                                        data.website = href.strip()
                         except:
                             continue
                     
@@ -433,14 +1026,14 @@ class SuffolkMapScraper:
                             text_str = str(text_elem).strip()
                             if text_str and re.search(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', text_str):
                                 phone_clean = re.sub(r'[^\d]', '', text_str)
-                                if len(phone_clean) >= 10 and not data['phone_primary']:
-                                    data['phone_primary'] = text_str.strip()
+                                if len(phone_clean) >= 10 and not data.phone_primary:
+                                    data.phone_primary = text_str.strip()
                                     break
                         except:
                             continue
                     
                 except Exception as e:
-                    logging.debug(f'HTML parsing failed: {str(e)}')
+                    logger.debug('HTML parsing failed: %s', e)
                     pass
             
             # Extract different data types with improved patterns
@@ -470,21 +1063,21 @@ class SuffolkMapScraper:
             # Assign phones to different fields
             if phones_found:
                 if len(phones_found) >= 1:
-                    data['phone_primary'] = phones_found[0]
+                    data.phone_primary = phones_found[0]
                 if len(phones_found) >= 2:
-                    data['phone_cell'] = phones_found[1]
+                    data.phone_cell = phones_found[1]
                 if len(phones_found) >= 3:
-                    data['phone_office'] = phones_found[2]
+                    data.phone_office = phones_found[2]
                 if len(phones_found) >= 4:
-                    data['phone_other'] = phones_found[3]
+                    data.phone_other = phones_found[3]
             
             # Email addresses - improved pattern
             email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
             emails = re.findall(email_pattern, all_text)
             if emails:
-                data['email1'] = emails[0]
+                data.email1 = emails[0]
                 if len(emails) > 1:
-                    data['email2'] = emails[1]
+                    data.email2 = emails[1]
             
             # Website/URLs - filter out Google Maps and other unwanted URLs
             url_patterns = [
@@ -504,9 +1097,9 @@ class SuffolkMapScraper:
                     url_clean = url.lower().strip()
                     # Skip Google Maps and other unwanted URLs
                     if not any(domain in url_clean for domain in excluded_domains):
-                        data['website'] = url
+                        data.website = url
                         break
-                if data['website']:
+                if data.website:
                     break
             
             # Business/Farm names and owner names
@@ -543,37 +1136,37 @@ class SuffolkMapScraper:
                     # Parse joint names
                     parsed_owners = self.parse_joint_names(first_name)
                     if parsed_owners:
-                        data['owner1'] = parsed_owners.get('owner1', '')
-                        data['owner2'] = parsed_owners.get('owner2', '')
-                        data['business_name'] = parsed_owners.get('business_name', first_name)
+                        data.owner1 = parsed_owners.get('owner1', '')
+                        data.owner2 = parsed_owners.get('owner2', '')
+                        data.business_name = parsed_owners.get('business_name', first_name)
                 elif any(keyword in first_name.lower() for keyword in ['farm', 'ranch', 'acres', 'livestock', 'suffolks', 'sheep']):
                     # It's likely a business name
-                    data['business_name'] = self.apply_proper_case(first_name)
+                    data.business_name = self.apply_proper_case(first_name)
                     if len(name_candidates) > 1:
                         # Check if second candidate is also a joint name
                         second_name = name_candidates[1]
                         if any(pattern in second_name for pattern in joint_patterns):
                             parsed_owners = self.parse_joint_names(second_name)
                             if parsed_owners:
-                                data['owner1'] = parsed_owners.get('owner1', '')
-                                data['owner2'] = parsed_owners.get('owner2', '')
+                                data.owner1 = parsed_owners.get('owner1', '')
+                                data.owner2 = parsed_owners.get('owner2', '')
                         else:
-                            data['owner1'] = self.apply_proper_case(second_name)
+                            data.owner1 = self.apply_proper_case(second_name)
                     if len(name_candidates) > 2:
-                        data['owner2'] = self.apply_proper_case(name_candidates[2])
+                        data.owner2 = self.apply_proper_case(name_candidates[2])
                 else:
                     # Likely owner name
-                    data['owner1'] = self.apply_proper_case(first_name)
+                    data.owner1 = self.apply_proper_case(first_name)
                     if len(name_candidates) > 1:
                         second_name = name_candidates[1]
                         if any(keyword in second_name.lower() for keyword in ['farm', 'ranch', 'acres', 'livestock', 'suffolks', 'sheep']):
-                            data['business_name'] = self.apply_proper_case(second_name)
+                            data.business_name = self.apply_proper_case(second_name)
                         else:
-                            data['owner2'] = self.apply_proper_case(second_name)
+                            data.owner2 = self.apply_proper_case(second_name)
                     
                     # If no business name found yet, use owner name
-                    if not data['business_name']:
-                        data['business_name'] = data['owner1']
+                    if not data.business_name:
+                        data.business_name = data.owner1
             
             # Address parsing
             address_lines = []
@@ -585,38 +1178,45 @@ class SuffolkMapScraper:
                     address_lines.append(line)
             
             if address_lines:
-                data['address_line1'] = address_lines[0]
+                data.address_line1 = address_lines[0]
                 if len(address_lines) > 1:
-                    data['address_line2'] = address_lines[1]
+                    data.address_line2 = address_lines[1]
             
             # Extract city, state, ZIP from address-like lines
             for line in lines:
                 # Look for ZIP codes
                 zip_match = re.search(r'\b(\d{5}(-\d{4})?)\b', line)
-                if zip_match and not data['zip_code']:
-                    data['zip_code'] = zip_match.group(1)
+                if zip_match and not data.zip_postal_code:
+                    data.zip_postal_code = zip_match.group(1)
                     
                     # Try to extract city and state from same line
                     # Pattern: CITY, STATE ZIP
                     city_state_pattern = r'([A-Z\s]+),\s*([A-Z]{2})\s+\d{5}'
                     cs_match = re.search(city_state_pattern, line)
                     if cs_match:
-                        data['city'] = cs_match.group(1).strip()
-                        data['state'] = cs_match.group(2).strip()
+                        data.city = cs_match.group(1).strip()
+                        data.state_province_region = cs_match.group(2).strip()
+            
+            # Coordinates from a Google Maps link in the popup, if any
+            if html_content:
+                coordinate_match = MAPS_LINK_COORDINATES.search(html_content)
+                if coordinate_match:
+                    data.latitude = float(coordinate_match.group(1))
+                    data.longitude = float(coordinate_match.group(2))
             
             # Species and breeds - look for Suffolk-specific terms
             for line in lines:
                 line_lower = line.lower()
-                if 'suffolk' in line_lower and not data['species']:
-                    data['species'] = 'Sheep'
-                    data['breeds'] = 'Suffolk'
-                elif any(breed in line_lower for breed in ['sheep', 'lamb', 'ewe', 'ram']) and not data['species']:
-                    data['species'] = 'Sheep'
+                if 'suffolk' in line_lower and not data.species:
+                    data.species = 'Sheep'
+                    data.breeds = 'Suffolk'
+                elif any(breed in line_lower for breed in ['sheep', 'lamb', 'ewe', 'ram']) and not data.species:
+                    data.species = 'Sheep'
             
             return data
             
         except Exception as e:
-            logging.error(f'Error parsing popup content: {str(e)}')
+            logger.error('Error parsing popup content: %s', e)
             return None
 
     def parse_joint_names(self, name_string):
@@ -662,7 +1262,7 @@ class SuffolkMapScraper:
             return None
             
         except Exception as e:
-            logging.error(f'Error parsing joint names: {str(e)}')
+            logger.error('Error parsing joint names: %s', e)
             return None
 
     def apply_proper_case(self, text):
@@ -701,22 +1301,14 @@ class SuffolkMapScraper:
                 return text.strip()
                 
         except Exception as e:
-            logging.error(f'Error applying proper case: {str(e)}')
+            logger.error('Error applying proper case: %s', e)
             return text
 
     def close_popup(self):
         """Try to close any open popup"""
         try:
             # Try various methods to close popup
-            close_selectors = [
-                ".close",
-                ".x",
-                "[onclick*='close']",
-                "[onclick*='hide']",
-                "button[type='button']"
-            ]
-            
-            for selector in close_selectors:
+            for selector in CLOSE_SELECTORS:
                 try:
                     close_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
                     if close_btn.is_displayed():
@@ -743,13 +1335,13 @@ class SuffolkMapScraper:
                 pass
                 
         except Exception as e:
-            logging.warning(f'Could not close popup: {str(e)}')
+            logger.warning('Could not close popup: %s', e)
 
     def cleanup(self):
         """Close the browser and cleanup resources"""
         try:
             if self.driver:
                 self.driver.quit()
-                logging.info('WebDriver closed successfully')
+                logger.info('WebDriver closed successfully')
         except Exception as e:
-            logging.error(f'Error during cleanup: {str(e)}')
+            logger.error('Error during cleanup: %s', e)
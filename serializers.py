@@ -0,0 +1,50 @@
+from sqlalchemy import select, func, DateTime
+from models import ScrapedMember, MEMBER_CSV_FIELDS
+
+class RowSerializer:
+    """Build JSON-ready dicts straight from Core result rows
+
+    Column names and the positions of datetime columns are worked out once, so
+    each row costs one zip into a dict instead of hydrating an ORM instance and
+    walking its attributes.
+    """
+
+    def __init__(self, table, column_names):
+        self.table = table
+        self.columns = [table.c[name] for name in column_names]
+        self.names = tuple(column_names)
+        self.datetime_positions = tuple(position for position, column in enumerate(self.columns)
+                                        if isinstance(column.type, DateTime))
+
+    def select(self):
+        """SELECT of the serialized columns, to be narrowed by the caller"""
+        return select(*self.columns)
+
+    def serialize(self, row):
+        if self.datetime_positions:
+            row = list(row)
+            for position in self.datetime_positions:
+                value = row[position]
+                if value is not None:
+                    row[position] = value.isoformat()
+        return dict(zip(self.names, row))
+
+    def serialize_all(self, rows):
+        return [self.serialize(row) for row in rows]
+
+    def fetch(self, session, statement):
+        """Run a statement built from select() and serialize every row"""
+        return self.serialize_all(session.execute(statement))
+
+    def fetch_page(self, session, page, per_page, order_by=None):
+        """One page of rows plus the total row count, like Flask-SQLAlchemy's paginate"""
+        total = session.execute(select(func.count()).select_from(self.table)).scalar()
+        statement = self.select().order_by(order_by if order_by is not None else self.columns[0])
+        rows = self.fetch(session, statement.limit(per_page).offset((page - 1) * per_page))
+        return rows, total
+
+# Same keys, in the same order, as ScrapedMember.to_dict
+MEMBER_API_COLUMNS = (['id'] + [attribute for attribute, _ in MEMBER_CSV_FIELDS] +
+                      ['member_key', 'removed_session_ref', 'created_at', 'updated_at'])
+
+member_serializer = RowSerializer(ScrapedMember.__table__, MEMBER_API_COLUMNS)
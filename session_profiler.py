@@ -0,0 +1,119 @@
+import io
+import time
+import pstats
+import marshal
+import cProfile
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Functions listed in the report, by cumulative time
+TOP_FUNCTIONS = 40
+
+class WebDriverCommandStats:
+    """Count and time every WebDriver command, by command name, across all browsers of a run
+
+    Each browser's command executor is wrapped, so the timings cover the
+    HTTP round trip to geckodriver and the work Firefox does for the command.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = {}
+
+    def instrument(self, driver):
+        """Time the commands this driver sends from now on"""
+        executor = driver.command_executor
+        execute = executor.execute
+
+        def timed_execute(command, params):
+            started = time.perf_counter()
+            try:
+                return execute(command, params)
+            finally:
+                self.record(command, time.perf_counter() - started)
+
+        executor.execute = timed_execute
+        return driver
+
+    def record(self, command, seconds):
+        with self.lock:
+            stats = self.commands.setdefault(command, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            stats['count'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def snapshot(self):
+        """Command name -> count, total, mean and max seconds, slowest total first"""
+        with self.lock:
+            commands = {name: dict(stats) for name, stats in self.commands.items()}
+        report = {}
+        for name, stats in sorted(commands.items(), key=lambda item: item[1]['total_seconds'], reverse=True):
+            report[name] = {
+                'count': stats['count'],
+                'total_seconds': round(stats['total_seconds'], 4),
+                'mean_ms': round(stats['total_seconds'] / stats['count'] * 1000, 2),
+                'max_ms': round(stats['max_seconds'] * 1000, 2),
+            }
+        return report
+
+class SessionProfiler:
+    """cProfile a scrape session plus the WebDriver commands its browsers send
+
+    cProfile only sees the thread that started it, which runs the whole
+    pipeline except the worker threads of a tiled crawl; their browser time
+    still shows up in the WebDriver command stats.
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.commands = WebDriverCommandStats()
+        self.started = None
+        self.wall_seconds = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.wall_seconds = time.perf_counter() - self.started
+
+    def stats_text(self, limit=TOP_FUNCTIONS):
+        """The pstats listing of the slowest functions by cumulative time"""
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    def pstats_data(self):
+        """Raw stats in the format of Profile.dump_stats, for snakeviz or pstats"""
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+    def report(self, limit=TOP_FUNCTIONS):
+        """Wall time, the slowest functions by cumulative time and the WebDriver command stats"""
+        stats = pstats.Stats(self.profile)
+        functions = []
+        for (filename, line, name), (calls, primitive_calls, own_time, cumulative_time, callers) in stats.stats.items():
+            functions.append({
+                'function': f'{filename}:{line}({name})',
+                'calls': calls,
+                'primitive_calls': primitive_calls,
+                'own_seconds': round(own_time, 4),
+                'cumulative_seconds': round(cumulative_time, 4),
+            })
+        functions.sort(key=lambda entry: entry['cumulative_seconds'], reverse=True)
+
+        webdriver = self.commands.snapshot()
+        return {
+            'wall_seconds': round(self.wall_seconds, 3),
+            'profiled_calls': stats.total_calls,
+            'webdriver_commands': webdriver,
+            'webdriver_totals': {
+                'count': sum(entry['count'] for entry in webdriver.values()),
+                'total_seconds': round(sum(entry['total_seconds'] for entry in webdriver.values()), 3),
+            },
+            'top_functions': functions[:limit],
+        }
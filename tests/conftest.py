@@ -0,0 +1,20 @@
+import os
+import tempfile
+import pytest
+
+# main reads its database URL at import, so every test process gets a throwaway SQLite file
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(tempfile.mkdtemp(prefix="scraper_tests_"), "test.db")}'
+
+@pytest.fixture
+def app():
+    """The Flask app inside an app context, with every table emptied after the test"""
+    from main import app, init_schema
+    from models import db
+
+    init_schema()
+    with app.app_context():
+        yield app
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
@@ -0,0 +1,67 @@
+import json
+from deduplicator import RecordDeduplicator
+from member_record import MemberRecord
+from change_tracking import MemberChangeTracker
+from models import db, ScrapedMember, ScrapeSession, MemberVersion
+
+def start_session(name):
+    session = ScrapeSession(session_id=name, status='running', trigger='manual')
+    db.session.add(session)
+    db.session.commit()
+    return session.id
+
+def crawl(records):
+    """Save records as one crawl and sweep the members it did not see; returns the tracker"""
+    tracker = MemberChangeTracker(start_session(f'crawl-{ScrapeSession.query.count()}'),
+                                  RecordDeduplicator().member_key)
+    tracker.save(records)
+    tracker.sweep_removed()
+    return tracker
+
+def members():
+    return [MemberRecord(business_name='Oak Hill Farm', zip_postal_code='11901', phone_primary='631-555-0100'),
+            MemberRecord(business_name='Cedar Creek Alpacas', zip_postal_code='11933'),
+            MemberRecord(business_name='Maple Ridge', email1='maple@gmail.com')]
+
+def versions(change_type):
+    return MemberVersion.query.filter_by(change_type=change_type).all()
+
+def test_member_key_ignores_formatting():
+    key = RecordDeduplicator().member_key
+    assert key(MemberRecord(business_name='Oak Hill Farm, LLC', zip_postal_code='11901-2204')) == \
+        key(MemberRecord(business_name='oak hill farm', zip_postal_code='11901', phone_primary='631-555-0100'))
+    assert key(MemberRecord(business_name='Maple Ridge', phone_primary='(631) 555-0100')) == \
+        key(MemberRecord(business_name='Maple Ridge', phone_cell='631.555.0100'))
+    assert key(MemberRecord(business_name='Maple Ridge', phone_primary='(631) 555-0100')) != \
+        key(MemberRecord(business_name='Maple Ridge', phone_primary='(631) 555-0199'))
+    assert key(MemberRecord(city='Riverhead')) is None
+
+def test_recrawl_updates_members_in_place(app):
+    first = crawl(members())
+    ids = {member.member_key: member.id for member in ScrapedMember.query}
+    assert first.stats['added'] == 3
+
+    records = members()
+    records[1].city = 'Southampton'
+    second = crawl(records)
+    assert {member.member_key: member.id for member in ScrapedMember.query} == ids
+    assert (second.stats['unchanged'], second.stats['changed'], second.stats['removed']) == (2, 1, 0)
+    assert json.loads(versions('changed')[0].changes)['city'] == ['', 'Southampton']
+
+def test_members_missing_from_a_crawl_are_removed_and_restored(app):
+    crawl(members())
+    second = crawl(members()[:2])
+    assert second.stats['removed'] == 1
+    [removed] = ScrapedMember.query.filter(ScrapedMember.removed_session_ref.isnot(None)).all()
+    assert removed.business_name == 'Maple Ridge'
+    assert [version.member_id for version in versions('removed')] == [removed.id]
+
+    third = crawl(members())
+    assert third.stats['restored'] == 1
+    assert ScrapedMember.query.filter(ScrapedMember.removed_session_ref.isnot(None)).count() == 0
+
+def test_partial_crawl_does_not_remove_members(app):
+    crawl(members())
+    partial = crawl(members()[:1])
+    assert partial.stats['removed'] == 0
+    assert not versions('removed')
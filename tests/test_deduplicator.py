@@ -0,0 +1,66 @@
+from deduplicator import RecordDeduplicator
+from member_record import MemberRecord
+
+def test_same_name_with_conflicting_contacts_is_not_merged():
+    records = [
+        MemberRecord(business_name='Smith Farm', state_province_region='NY', zip_postal_code='12345',
+                     phone_primary='(555) 111-2222'),
+        MemberRecord(business_name='Smith Farm', state_province_region='CA', zip_postal_code='90210',
+                     phone_primary='(777) 333-4444'),
+    ]
+    deduplicator = RecordDeduplicator()
+    assert deduplicator.member_key(records[0]) != deduplicator.member_key(records[1])
+    assert deduplicator.deduplicate(records) == records
+
+def test_same_name_without_contacts_is_merged():
+    records = [MemberRecord(business_name='Smith Farm LLC'), MemberRecord(business_name='smith farm', owner1='Ann Smith')]
+    merged = RecordDeduplicator().deduplicate(records)
+    assert len(merged) == 1
+    assert merged[0].owner1 == 'Ann Smith'
+
+def test_similar_names_in_one_zip_are_merged():
+    records = [
+        MemberRecord(business_name='Oak Hill Farm', zip_postal_code='11901'),
+        MemberRecord(business_name='Oak Hill Farms', zip_postal_code='11901-2204', email1='info@oakhill.com'),
+    ]
+    merged = RecordDeduplicator().deduplicate(records)
+    assert len(merged) == 1
+    assert merged[0].email1 == 'info@oakhill.com'
+
+def test_shared_phone_needs_less_name_agreement():
+    # Dice similarity 0.67: too low for a shared ZIP alone, enough with the same phone number
+    records = [
+        MemberRecord(business_name='Green Acres Alpacas', zip_postal_code='11901'),
+        MemberRecord(business_name='Green Acres Llamas', zip_postal_code='11901'),
+    ]
+    assert len(RecordDeduplicator().deduplicate(records)) == 2
+    records[0].phone_primary = records[1].phone_cell = '631-555-0100'
+    assert len(RecordDeduplicator().deduplicate(records)) == 1
+
+def test_different_names_in_one_zip_are_not_merged():
+    records = [
+        MemberRecord(business_name='Smith Farm', zip_postal_code='11901'),
+        MemberRecord(business_name='Jones Ranch', zip_postal_code='11901'),
+    ]
+    deduplicator = RecordDeduplicator()
+    assert deduplicator.deduplicate(records) == records
+    assert deduplicator.last_stats['merged'] == 0
+
+def test_clusters_merge_transitively():
+    # A and B share a phone, B and C an email: union-find makes one member of all three
+    records = [
+        MemberRecord(business_name='Maple Ridge Farm', phone_primary='(631) 555-0101'),
+        MemberRecord(business_name='Maple Ridge Farm LLC', phone_office='631.555.0101', email1='maple@gmail.com'),
+        MemberRecord(business_name='Maple Ridge Farms', email2='Maple@Gmail.com', city='Riverhead'),
+        MemberRecord(business_name='Cedar Creek', phone_primary='(631) 555-0199'),
+    ]
+    merged = RecordDeduplicator().deduplicate(records)
+    assert [record.business_name for record in merged] == ['Maple Ridge Farm LLC', 'Cedar Creek']
+    assert merged[0].city == 'Riverhead'
+
+def test_oversized_blocks_are_skipped():
+    records = [MemberRecord(business_name='Smith Farm', zip_postal_code='11901') for _ in range(3)]
+    deduplicator = RecordDeduplicator(max_block_size=2)
+    # The name block is as oversized as the ZIP block, so nothing is compared
+    assert len(deduplicator.deduplicate(records)) == 3
+    assert deduplicator.last_stats['skipped_blocks'] == 2
@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Maximum time to import main, in milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', '1000'))
+
+# Modules an API-only web process must not load; they belong to the scraping stack or the CLI
+FORBIDDEN_MODULES = ['selenium', 'webdriver_manager', 'bs4', 'httpx', 'flask_migrate', 'alembic']
+
+# Runs in a fresh interpreter so nothing is already imported
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'forbidden': [name for name in %r if name in sys.modules]}))
+"""
+
+def import_main(database_url, runs=3):
+    """Import main in `runs` fresh interpreters and keep the fastest result"""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE % (FORBIDDEN_MODULES,)], cwd=PROJECT_DIR, capture_output=True,
+            text=True, check=True, env={**os.environ, 'DATABASE_URL': database_url}
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return min(results, key=lambda result: result['seconds'])
+
+def test_import_main_stays_within_budget(tmp_path):
+    result = import_main(f'sqlite:///{tmp_path / "budget.db"}')
+    assert result['forbidden'] == []
+    assert result['seconds'] * 1000 <= IMPORT_BUDGET_MS
@@ -0,0 +1,72 @@
+from flask import Flask, jsonify
+from response_cache import ResponseCache
+from models import db, ScrapedMember, DataVersion
+
+def counting_app(cache):
+    """App with a cached view reporting how often it ran, and one that fails"""
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/items')
+    @cache.cached_json
+    def items():
+        calls.append(1)
+        return {'calls': len(calls)}
+
+    @app.route('/broken')
+    @cache.cached_json
+    def broken():
+        calls.append(1)
+        return jsonify({'error': 'boom'}), 500
+
+    return app.test_client(), calls
+
+def test_etag_revalidation_answers_304():
+    client, calls = counting_app(ResponseCache())
+    first = client.get('/items')
+    assert first.status_code == 200 and first.get_json() == {'calls': 1}
+    etag = first.headers['ETag']
+
+    again = client.get('/items', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    assert again.headers['ETag'] == etag
+    assert client.get('/items').get_json() == {'calls': 1}
+    assert len(calls) == 1
+
+def test_bump_invalidates_cached_responses():
+    cache = ResponseCache()
+    client, calls = counting_app(cache)
+    etag = client.get('/items').headers['ETag']
+
+    cache.bump()
+    fresh = client.get('/items', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200 and fresh.get_json() == {'calls': 2}
+    assert fresh.headers['ETag'] != etag
+
+def test_error_responses_are_not_cached():
+    client, calls = counting_app(ResponseCache())
+    assert client.get('/broken').status_code == 500
+    assert client.get('/broken').status_code == 500
+    assert len(calls) == 2
+
+def test_data_version_bump_reaches_the_api(app, monkeypatch):
+    from main import response_cache
+
+    # Read the shared version on every request instead of once a second
+    monkeypatch.setattr(response_cache, 'check_interval', 0)
+    # Emptied tables reset the shared version, so responses of earlier tests must go too
+    response_cache.bump()
+    client = app.test_client()
+    before = client.get('/api/members')
+    assert before.get_json()['total'] == 0
+    assert client.get('/api/members', headers={'If-None-Match': before.headers['ETag']}).status_code == 304
+
+    db.session.add(ScrapedMember(business_name='Oak Hill Farm'))
+    db.session.commit()
+    # Without a version change the cached page is still served
+    assert client.get('/api/members').get_json()['total'] == 0
+
+    DataVersion.bump()
+    after = client.get('/api/members', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert after.get_json()['members'][0]['business_name'] == 'Oak Hill Farm'
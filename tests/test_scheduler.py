@@ -0,0 +1,18 @@
+from datetime import datetime
+from scheduler import CronExpression
+
+def test_stepped_day_of_month_is_unrestricted():
+    # */2 starts with *, so both day fields must match: an odd day that is a Monday
+    cron = CronExpression('0 0 */2 * 1')
+    assert cron.next_after(datetime(2026, 10, 19, 12, 0)) == datetime(2026, 11, 9, 0, 0)
+
+def test_stepped_day_of_week_is_unrestricted():
+    cron = CronExpression('0 0 13 * */2')
+    # The 13th that falls on Sunday, Tuesday, Thursday or Saturday
+    assert cron.next_after(datetime(2026, 10, 19, 12, 0)) == datetime(2026, 12, 13, 0, 0)
+
+def test_restricted_day_fields_match_either():
+    # The 1st of the month or any Friday
+    cron = CronExpression('0 0 1 * 5')
+    assert cron.next_after(datetime(2026, 10, 19, 12, 0)) == datetime(2026, 10, 23, 0, 0)
+    assert cron.next_after(datetime(2026, 10, 30, 12, 0)) == datetime(2026, 11, 1, 0, 0)
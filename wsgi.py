@@ -0,0 +1,8 @@
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+# Scrapes are run by scrape_worker.py, a separate process polling the database.
+import os
+from main import app
+from logging_setup import configure_logging
+
+# Several web workers cannot safely rotate one file, so they log to the console unless WEB_LOG_FILE is set
+configure_logging(log_file=os.environ.get('WEB_LOG_FILE', ''))